@@ -0,0 +1,843 @@
+# Imports gerais
+import numpy as np
+import pandas as pd
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas
+from tabulacao import (calcular_coocorrencia, calcular_tabela_estendida,
+                       calcular_tabela_estratificada, obter_rotulos, restringir_pesos)
+from segmentos import Segmento
+from cache import CacheLRU
+from intervalos import calcular_intervalos
+
+
+# constantes
+MODOS_UNIVARIADOS = ("Quantidade", "Percentual")
+MODOS_BIVARIADOS = ("Quantidade", "Percentual (linha)", "Percentual (coluna)")
+CAPACIDADE_AGREGADOS_SEGMENTOS = 4096
+ROTULO_OUTROS = "Outros"
+
+# Cache do processo para os agregados dos segmentos (indexado pela chave do segmento)
+_agregados_segmentos = CacheLRU(CAPACIDADE_AGREGADOS_SEGMENTOS)
+
+
+def contar_respostas_multiplas(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        mascara: np.ndarray = None,
+        pesos: np.ndarray = None) -> tuple:
+    """
+    Realiza a contagem das respostas de uma pergunta de multipla escolha
+    (soma dos pesos dos respondentes, quando informados).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta de multipla escolha.
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+    pesos:np.ndarray
+        Peso de cada respondente (opcional; todos os respondentes).
+
+    Retornos:
+    ----------
+    contagem:pd.Series
+        Quantidade de respostas de cada alternativa (indexada pelo texto da alternativa).
+    denominador:int|float
+        Quantidade de respondentes da pergunta (base para o percentual).
+    """
+
+    # Obtém as respostas da pergunta de multipla escolha (e realiza a soma)
+    indicadores, validos = respostas.indicadores(idx_pergunta, mascara)
+    pesos = restringir_pesos(pesos, mascara)
+    if pesos is None:
+        somas = indicadores.sum(axis=0, dtype=np.int64)
+    else:
+        # Somas ponderadas pelo produto (em blocos) com o indicador dos respondentes válidos
+        somas = calcular_coocorrencia(indicadores, validos.view(np.uint8)[:, None],
+                                      pesos=pesos)[:, 0]
+    contagem = pd.Series(somas, index=catalogo.textos_alternativas(idx_pergunta))
+
+    # Respondentes que responderam a pergunta (sem valores ausentes)
+    if pesos is None:
+        denominador = int(np.count_nonzero(validos))
+    else:
+        denominador = float(pesos[validos].sum())
+    return contagem, denominador
+
+
+def contar_resposta_unica(
+        respostas: RespostasCompactas,
+        idx_pergunta: int,
+        mascara: np.ndarray = None,
+        pesos: np.ndarray = None) -> tuple:
+    """
+    Realiza a contagem das respostas de uma pergunta de unica escolha
+    (soma dos pesos dos respondentes, quando informados).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    idx_pergunta:int
+        Índice da pergunta de unica escolha.
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+    pesos:np.ndarray
+        Peso de cada respondente (opcional; todos os respondentes).
+
+    Retornos:
+    ----------
+    contagem:pd.Series
+        Quantidade de respostas de cada alternativa, em ordem decrescente.
+    denominador:int|float
+        Quantidade total de respondentes (base para o percentual).
+    """
+
+    # Obtém as respostas da pergunta de unica escolha (e realiza a contagem)
+    codigos, categorias = respostas.codigos(idx_pergunta, mascara)
+    pesos = restringir_pesos(pesos, mascara)
+    respondidas = codigos >= 0
+    if pesos is None:
+        quantidades = np.bincount(codigos[respondidas],
+                                  minlength=len(categorias)).astype(np.int64)
+        denominador = len(codigos)
+    else:
+        quantidades = np.bincount(codigos[respondidas], weights=pesos[respondidas],
+                                  minlength=len(categorias))
+        denominador = float(pesos.sum())
+
+    # Realiza a ordenação pela quantidade de respostas
+    ordem = np.argsort(-quantidades, kind='stable')
+    ordem = ordem[quantidades[ordem] > 0]
+    contagem = pd.Series(quantidades[ordem], index=categorias[ordem])
+    return contagem, denominador
+
+
+def arredondar_quantidades(valores: np.ndarray) -> np.ndarray:
+    """
+    Arredonda as quantidades ponderadas (somas dos pesos) para exibição; as
+    quantidades inteiras não são alteradas.
+
+    Parâmetros:
+    -----------
+    valores:np.ndarray
+        Quantidades (inteiras ou ponderadas).
+
+    Retornos:
+    ----------
+    valores:np.ndarray
+        Quantidades para exibição.
+    """
+    if np.issubdtype(valores.dtype, np.floating):
+        return np.round(valores, 1)
+    return valores
+
+
+def formatar_contagem(
+        contagem: pd.Series,
+        denominador: int,
+        texto_pergunta: str,
+        qtde_perc: str,
+        intervalo: str = "Nenhum",
+        exclusivas: bool = True,
+        fator_efetivo: float = 1.0) -> pd.DataFrame:
+    """
+    Formata a contagem das respostas de uma pergunta para exibição.
+
+    No modo percentual, os limites do intervalo de confiança podem ser
+    acrescentados (colunas "Inferior (%)" e "Superior (%)"). As contagens
+    ponderadas são convertidas para o tamanho efetivo da amostra no cálculo
+    do intervalo.
+
+    Parâmetros:
+    -----------
+    contagem:pd.Series
+        Quantidade de respostas de cada alternativa.
+    denominador:int
+        Base para o cálculo do percentual.
+    texto_pergunta:str
+        Texto da pergunta (nome da primeira coluna).
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
+    exclusivas:bool
+        Indica se as alternativas são exclusivas (pergunta de unica escolha).
+    fator_efetivo:float
+        Fator de conversão das contagens ponderadas para o tamanho efetivo
+        da amostra (ver Segmento).
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as alternativas e a quantidade/percentual de respostas.
+    """
+
+    # Converte para percentual se necessário
+    if qtde_perc == "Percentual":
+        valores = np.round((contagem.to_numpy() / denominador) * 100, 2)
+        coluna = "Percentual (%)"
+    else:
+        valores = arredondar_quantidades(contagem.to_numpy())
+        coluna = "Quantidade"
+
+    sub = pd.DataFrame({texto_pergunta: contagem.index.to_numpy(dtype=object),
+                        coluna: valores})
+
+    # Intervalo de confiança de cada percentual
+    if qtde_perc == "Percentual" and intervalo != "Nenhum":
+        inferior, superior = calcular_intervalos(contagem.to_numpy() * fator_efetivo,
+                                                 denominador * fator_efetivo, intervalo,
+                                                 exclusivas)
+        sub["Inferior (%)"] = np.round(inferior, 2)
+        sub["Superior (%)"] = np.round(superior, 2)
+    return sub
+
+
+def obter_dataframe_respostas_multiplas(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        qtde_perc: str,
+        intervalo: str = "Nenhum") -> pd.DataFrame:
+    """
+    Obtém um dataframe com as respostas de uma pergunta de multipla escolha.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta de multipla escolha.
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
+
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as respostas de uma pergunta de multipla escolha.
+    """
+    contagem, denominador = contar_respostas_multiplas(respostas, catalogo, idx_pergunta)
+    return formatar_contagem(contagem, denominador,
+                             catalogo.texto(idx_pergunta), qtde_perc, intervalo,
+                             exclusivas=False)
+
+
+def obter_dataframe_resposta_unica(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        qtde_perc: str,
+        intervalo: str = "Nenhum") -> pd.DataFrame:
+    """
+    Obtém um dataframe com as respostas de uma pergunta de unica escolha.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int    
+        Índice da pergunta de unica escolha.
+    qtde_perc:str   
+        Quantidade ou percentual a ser apresentado.
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as respostas de uma pergunta de unica escolha.
+    """
+    contagem, denominador = contar_resposta_unica(respostas, idx_pergunta)
+    return formatar_contagem(contagem, denominador,
+                             catalogo.texto(idx_pergunta), qtde_perc, intervalo)
+
+
+def obter_contagem(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        agregados: dict = None,
+        segmento: Segmento = None) -> tuple:
+    """
+    Obtém a contagem das respostas de uma pergunta (de qualquer tipo).
+
+    As contagens de um segmento são armazenadas em cache (indexadas pela
+    chave do segmento), de forma que o segmento é calculado uma única vez.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta.
+    agregados:dict
+        Dicionário com as contagens pré-calculadas de cada pergunta (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+
+    Retornos:
+    ----------
+    contagem:pd.Series
+        Quantidade de respostas de cada alternativa.
+    denominador:int
+        Base para o cálculo do percentual.
+    """
+    if segmento is None:
+        if agregados and idx_pergunta in agregados:
+            return agregados[idx_pergunta]
+        if catalogo.eh_multipla(idx_pergunta):
+            return contar_respostas_multiplas(respostas, catalogo, idx_pergunta)
+        return contar_resposta_unica(respostas, idx_pergunta)
+
+    chave = (segmento.chave, idx_pergunta)
+    resultado = _agregados_segmentos.obter(chave)
+    if resultado is None:
+        if catalogo.eh_multipla(idx_pergunta):
+            resultado = contar_respostas_multiplas(respostas, catalogo, idx_pergunta,
+                                                   segmento.mascara, segmento.pesos)
+        else:
+            resultado = contar_resposta_unica(respostas, idx_pergunta, segmento.mascara,
+                                              segmento.pesos)
+        _agregados_segmentos.armazenar(chave, resultado)
+    return resultado
+
+
+def obter_dataframe_univariado(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        qtde_perc: str,
+        agregados: dict = None,
+        segmento: Segmento = None,
+        intervalo: str = "Nenhum") -> pd.DataFrame:
+    """
+    Obtém um dataframe com as respostas de uma pergunta (de qualquer tipo).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta.
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    agregados:dict
+        Dicionário com as contagens pré-calculadas de cada pergunta (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as alternativas e a quantidade/percentual de respostas.
+    """
+    contagem, denominador = obter_contagem(respostas, catalogo, idx_pergunta, agregados, segmento)
+    return formatar_contagem(contagem, denominador,
+                             catalogo.texto(idx_pergunta), qtde_perc, intervalo,
+                             exclusivas=not catalogo.eh_multipla(idx_pergunta),
+                             fator_efetivo=segmento.fator_efetivo if segmento else 1.0)
+
+
+def obter_tabela_estendida(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None,
+        segmento: Segmento = None) -> np.ndarray:
+    """
+    Obtém a tabela de contingência entre duas perguntas, acrescida dos totais
+    de linha e de coluna (do cubo de tabelas, quando disponível).
+
+    As tabelas de um segmento são armazenadas em cache (indexadas pela chave
+    do segmento), de forma que o segmento é calculado uma única vez.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional; utilizado apenas sem segmento).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Matriz (alternativas1 + 1 x alternativas2 + 1); a última linha/coluna
+        contém os totais.
+    """
+    if segmento is not None:
+        chave = (segmento.chave, idx_pergunta1, idx_pergunta2)
+        tabela = _agregados_segmentos.obter(chave)
+        if tabela is None:
+            tabela = calcular_tabela_estendida(respostas, catalogo, idx_pergunta1,
+                                               idx_pergunta2, segmento.mascara, segmento.pesos)
+            _agregados_segmentos.armazenar(chave, tabela)
+        return tabela
+
+    tabela = None
+    if cubo is not None:
+        tabela = cubo.tabela(idx_pergunta1, idx_pergunta2, estendida=True)
+    if tabela is None:
+        tabela = calcular_tabela_estendida(respostas, catalogo, idx_pergunta1, idx_pergunta2)
+    return tabela
+
+
+def selecionar_alternativas(totais: np.ndarray, limite: int) -> np.ndarray:
+    """
+    Seleciona as limite - 1 alternativas com maior total (a última posição é
+    reservada para "Outros").
+
+    Parâmetros:
+    -----------
+    totais:np.ndarray
+        Total de cada alternativa.
+    limite:int
+        Quantidade máxima de alternativas, incluindo "Outros".
+
+    Retornos:
+    ----------
+    mantidas:np.ndarray
+        Índices das alternativas selecionadas, na ordem original.
+    """
+    return np.sort(np.argsort(-totais, kind="stable")[:limite - 1])
+
+
+def agrupar_outros(
+        tabela: np.ndarray,
+        rotulos: pd.Index,
+        limite: int = None,
+        eixo: int = 0,
+        totais: np.ndarray = None) -> tuple:
+    """
+    Mantém, em um eixo da tabela estendida, apenas as limite - 1 alternativas
+    com maior total (na ordem original) e agrupa as demais em uma única
+    alternativa ("Outros"), posicionada antes dos totais.
+
+    Os totais da tabela não são alterados. Em perguntas de multipla escolha,
+    a contagem de "Outros" é a soma das menções das alternativas agrupadas.
+
+    Parâmetros:
+    -----------
+    tabela:np.ndarray
+        Tabela estendida (a última linha/coluna contém os totais).
+    rotulos:pd.Index
+        Alternativas do eixo.
+    limite:int
+        Quantidade máxima de alternativas do eixo, incluindo "Outros"
+        (opcional; sem agrupamento, se omitido).
+    eixo:int
+        0 para as linhas e 1 para as colunas.
+    totais:np.ndarray
+        Totais utilizados na seleção das alternativas (opcional; padrão: os
+        totais do eixo na tabela estendida).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Tabela estendida com as alternativas agrupadas.
+    rotulos:pd.Index
+        Alternativas mantidas, seguidas de "Outros" (mesmo nome do índice).
+    """
+    tabela = np.moveaxis(tabela, eixo, 0)
+    qtde = tabela.shape[0] - 1
+    if limite is None or qtde <= limite:
+        return np.moveaxis(tabela, 0, eixo), rotulos
+
+    mantidas = selecionar_alternativas(tabela[:-1, -1] if totais is None else totais, limite)
+    agrupadas = np.setdiff1d(np.arange(qtde), mantidas)
+    tabela = np.concatenate([tabela[mantidas],
+                             tabela[agrupadas].sum(axis=0, keepdims=True),
+                             tabela[-1:]])
+    rotulos = pd.Index(list(rotulos[mantidas]) + [ROTULO_OUTROS], dtype=object,
+                       name=rotulos.name)
+    return np.moveaxis(tabela, 0, eixo), rotulos
+
+
+def obter_tabela_rotulada(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None,
+        segmento: Segmento = None,
+        limites: tuple = None) -> tuple:
+    """
+    Obtém a tabela estendida entre duas perguntas e os rótulos das linhas e
+    das colunas, com as alternativas excedentes agrupadas em "Outros".
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (opcional).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Tabela estendida (a última linha/coluna contém os totais).
+    linhas:pd.Index
+        Rótulos das linhas.
+    colunas:pd.Index
+        Rótulos das colunas.
+    """
+    produto = obter_tabela_estendida(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                     cubo, segmento)
+    linhas = obter_rotulos(respostas, catalogo, idx_pergunta1)
+    colunas = obter_rotulos(respostas, catalogo, idx_pergunta2)
+    if limites is not None:
+        produto, linhas = agrupar_outros(produto, linhas, limites[0], eixo=0)
+        produto, colunas = agrupar_outros(produto, colunas, limites[1], eixo=1)
+    return produto, linhas, colunas
+
+
+def obter_tabela_cruzada(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None,
+        segmento: Segmento = None,
+        limites: tuple = None) -> pd.DataFrame:
+    """
+    Obtém a tabela cruzada (quantidade de respondentes) entre duas perguntas.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (as demais
+        são agrupadas em "Outros"; opcional).
+
+    Retornos:
+    ----------
+    tabela:pd.DataFrame
+        Tabela com as alternativas da primeira pergunta nas linhas e as da
+        segunda pergunta nas colunas.
+    """
+    produto, linhas, colunas = obter_tabela_rotulada(respostas, catalogo, idx_pergunta1,
+                                                     idx_pergunta2, cubo, segmento, limites)
+    return pd.DataFrame(produto[:-1, :-1], index=linhas, columns=colunas)
+
+
+def obter_tabelas_bivariadas(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None,
+        segmento: Segmento = None,
+        limites: tuple = None) -> dict:
+    """
+    Obtém a tabela cruzada entre duas perguntas (quantidade e percentuais por
+    linha e por coluna).
+
+    O percentual por linha (coluna) é calculado em relação aos respondentes
+    de ambas as perguntas que marcaram a alternativa da linha (coluna).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (as demais
+        são agrupadas em "Outros"; opcional).
+
+    Retornos:
+    ----------
+    tabelas:dict
+        Dicionário com os dataframes "Quantidade", "Percentual (linha)" e
+        "Percentual (coluna)".
+    """
+    produto, linhas, colunas = obter_tabela_rotulada(respostas, catalogo, idx_pergunta1,
+                                                     idx_pergunta2, cubo, segmento, limites)
+    return formatar_tabelas(produto, linhas, colunas)
+
+
+def formatar_tabelas(produto: np.ndarray, linhas: pd.Index, colunas: pd.Index) -> dict:
+    """
+    Obtém os dataframes de quantidade e de percentuais (por linha e por
+    coluna) de uma tabela estendida.
+
+    Parâmetros:
+    -----------
+    produto:np.ndarray
+        Tabela estendida (a última linha/coluna contém os totais).
+    linhas:pd.Index
+        Rótulos das linhas.
+    colunas:pd.Index
+        Rótulos das colunas.
+
+    Retornos:
+    ----------
+    tabelas:dict
+        Dicionário com os dataframes "Quantidade", "Percentual (linha)" e
+        "Percentual (coluna)".
+    """
+    contagem = produto[:-1, :-1]
+    total_linhas = produto[:-1, -1]
+    total_colunas = produto[-1, :-1]
+
+    perc_linha = np.divide(contagem * 100, total_linhas[:, None],
+                           out=np.zeros(contagem.shape), where=total_linhas[:, None] > 0)
+    perc_coluna = np.divide(contagem * 100, total_colunas[None, :],
+                            out=np.zeros(contagem.shape), where=total_colunas[None, :] > 0)
+
+    return {
+        "Quantidade": pd.DataFrame(arredondar_quantidades(contagem), index=linhas,
+                                   columns=colunas),
+        "Percentual (linha)": pd.DataFrame(np.round(perc_linha, 2), index=linhas, columns=colunas),
+        "Percentual (coluna)": pd.DataFrame(np.round(perc_coluna, 2), index=linhas, columns=colunas),
+    }
+
+
+def obter_tabelas_estratificadas(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        idx_controle: int,
+        segmento: Segmento = None,
+        limites: tuple = None,
+        limite_estratos: int = None) -> dict:
+    """
+    Obtém a tabela cruzada entre duas perguntas (quantidade e percentuais por
+    linha e por coluna) em cada estrato de uma pergunta de controle.
+
+    As alternativas agrupadas em "Outros" são as mesmas em todos os estratos
+    (selecionadas pelos totais de todos os estratos). Os estratos sem
+    respondentes não são retornados.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas das tabelas).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas das tabelas).
+    idx_controle:int
+        Índice da pergunta de controle (unica escolha).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (as demais
+        são agrupadas em "Outros"; opcional).
+    limite_estratos:int
+        Quantidade máxima de estratos (os menores são agrupados em "Outros";
+        opcional).
+
+    Retornos:
+    ----------
+    tabelas:dict
+        Dicionário com o estrato (alternativa da pergunta de controle) e o
+        dicionário de dataframes do estrato (ver obter_tabelas_bivariadas).
+    """
+    cubo = calcular_tabela_estratificada(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                         idx_controle,
+                                         segmento.mascara if segmento is not None else None,
+                                         segmento.pesos if segmento is not None else None)
+    linhas = obter_rotulos(respostas, catalogo, idx_pergunta1)
+    colunas = obter_rotulos(respostas, catalogo, idx_pergunta2)
+    estratos = obter_rotulos(respostas, catalogo, idx_controle)
+
+    # Os estratos são uma partição dos respondentes: os totais são aditivos
+    tamanhos = cubo[:, -1, -1]
+    cubo, estratos = cubo[tamanhos > 0], estratos[tamanhos > 0]
+    if limite_estratos is not None and len(estratos) > limite_estratos:
+        mantidos = selecionar_alternativas(cubo[:, -1, -1], limite_estratos)
+        agrupados = np.setdiff1d(np.arange(len(estratos)), mantidos)
+        cubo = np.concatenate([cubo[mantidos], cubo[agrupados].sum(axis=0, keepdims=True)])
+        estratos = pd.Index(list(estratos[mantidos]) + [ROTULO_OUTROS], dtype=object,
+                            name=estratos.name)
+    if limites is not None:
+        total = cubo.sum(axis=0)
+        cubo, linhas = agrupar_outros(cubo, linhas, limites[0], eixo=1,
+                                      totais=total[:-1, -1])
+        cubo, colunas = agrupar_outros(cubo, colunas, limites[1], eixo=2,
+                                       totais=total[-1, :-1])
+
+    return {estrato: formatar_tabelas(produto, linhas, colunas)
+            for estrato, produto in zip(estratos, cubo)}
+
+
+def obter_intervalos_bivariados(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        tabela: tuple,
+        modo: str,
+        intervalo: str,
+        segmento: Segmento = None) -> tuple:
+    """
+    Obtém o intervalo de confiança dos percentuais (por linha ou por coluna)
+    da tabela cruzada entre duas perguntas.
+
+    As alternativas de uma linha (coluna) são exclusivas quando a pergunta
+    das colunas (linhas) é de unica escolha. As somas ponderadas são
+    convertidas para o tamanho efetivo da amostra. O intervalo de "Outros"
+    de uma pergunta de multipla escolha não é calculado (a soma das
+    alternativas agrupadas não corresponde a uma quantidade de respondentes).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    tabela:tuple
+        Tabela estendida e rótulos das linhas e das colunas, como obtidos por
+        obter_tabela_rotulada (a tabela não é calculada novamente).
+    modo:str
+        "Percentual (linha)" ou "Percentual (coluna)".
+    intervalo:str
+        Método do intervalo de confiança (ver METODOS_INTERVALO).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+
+    Retornos:
+    ----------
+    inferior:np.ndarray
+        Limite inferior dos percentuais de cada célula.
+    superior:np.ndarray
+        Limite superior dos percentuais de cada célula.
+    """
+    produto, linhas, colunas = tabela
+    fator = segmento.fator_efetivo if segmento is not None else 1.0
+    produto = produto * fator
+    contagem = produto[:-1, :-1]
+    if modo == "Percentual (linha)":
+        inferior, superior = calcular_intervalos(contagem, produto[:-1, -1], intervalo,
+                                                 not catalogo.eh_multipla(idx_pergunta2))
+    else:
+        inferior, superior = calcular_intervalos(contagem.T, produto[-1, :-1], intervalo,
+                                                 not catalogo.eh_multipla(idx_pergunta1))
+        inferior, superior = inferior.T, superior.T
+
+    # "Outros" de multipla escolha: soma das menções (sem intervalo)
+    if (catalogo.eh_multipla(idx_pergunta1)
+            and len(linhas) < len(obter_rotulos(respostas, catalogo, idx_pergunta1))):
+        inferior[-1, :] = superior[-1, :] = np.nan
+    if (catalogo.eh_multipla(idx_pergunta2)
+            and len(colunas) < len(obter_rotulos(respostas, catalogo, idx_pergunta2))):
+        inferior[:, -1] = superior[:, -1] = np.nan
+    return inferior, superior
+
+
+
+def obter_dataframe_combinacoes(tabela: pd.DataFrame, coluna: str = "Quantidade") -> pd.DataFrame:
+    """
+    Converte uma tabela cruzada para o formato longo (apenas as combinações
+    observadas, em ordem decrescente).
+
+    Parâmetros:
+    -----------
+    tabela:pd.DataFrame
+        Tabela cruzada (alternativas da primeira pergunta nas linhas).
+    coluna:str
+        Nome da coluna dos valores.
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as colunas das duas perguntas e a coluna dos valores.
+    """
+    valores = tabela.to_numpy()
+    linhas, colunas = np.nonzero(valores)
+    sub = pd.DataFrame({
+        tabela.index.name: tabela.index[linhas],
+        tabela.columns.name: tabela.columns[colunas],
+        coluna: valores[linhas, colunas]})
+    return sub.sort_values(by=[coluna], ascending=False, ignore_index=True)
+
+
+def paginar(sub: pd.DataFrame, pagina: int, tamanho: int) -> tuple:
+    """
+    Obtém uma página de um dataframe (apenas a página é enviada ao navegador).
+
+    Parâmetros:
+    -----------
+    sub:pd.DataFrame
+        Dataframe completo.
+    pagina:int
+        Número da página (a partir de 1; limitado à última página).
+    tamanho:int
+        Quantidade de linhas por página.
+
+    Retornos:
+    ----------
+    pagina:pd.DataFrame
+        Linhas da página.
+    qtde_paginas:int
+        Quantidade de páginas.
+    """
+    qtde_paginas = max(1, -(-len(sub) // tamanho))
+    pagina = min(max(pagina, 1), qtde_paginas)
+    return sub.iloc[(pagina - 1) * tamanho:pagina * tamanho], qtde_paginas
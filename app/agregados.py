@@ -0,0 +1,192 @@
+# Imports gerais
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Imports específicos
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from agregacao import contar_resposta_unica, contar_respostas_multiplas
+
+
+# constantes
+ARQUIVO_AGREGADOS = "agregados_univariados.parquet"
+VERSAO_AGREGADOS = 2
+
+# Cache do processo para o armazenamento de agregados
+_cache = {}
+_trava = threading.Lock()
+
+
+def construir_agregados_univariados(dados: ConjuntoDados) -> pd.DataFrame:
+    """
+    Calcula as contagens (e denominadores) de todas as perguntas do questionário.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+
+    Retornos:
+    ----------
+    agregados:pd.DataFrame
+        Dataframe (formato longo) com as colunas pergunta, resposta (texto),
+        tipo (tipo original das respostas), quantidade e denominador.
+    """
+    partes = []
+    for perguntas in dados.catalogo.partes.values():
+        for p in perguntas:
+            if dados.catalogo.eh_multipla(p):
+                contagem, denominador = contar_respostas_multiplas(
+                    dados.respostas, dados.catalogo, p)
+            else:
+                contagem, denominador = contar_resposta_unica(dados.respostas, p)
+
+            partes.append(pd.DataFrame({
+                "pergunta": np.full(len(contagem), p, dtype=np.int32),
+                "resposta": contagem.index.astype(str),
+                # As respostas numéricas são convertidas para o tipo original na leitura
+                "tipo": str(contagem.index.dtype),
+                "quantidade": contagem.to_numpy(dtype=np.int64),
+                "denominador": np.full(len(contagem), denominador, dtype=np.int64),
+            }))
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def obter_caminho_agregados(pasta: str = PASTA_DADOS) -> str:
+    """
+    Obtém o caminho do arquivo de agregados univariados.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    caminho:str
+        Caminho do arquivo de agregados.
+    """
+    return os.path.join(pasta, ARQUIVO_AGREGADOS)
+
+
+def salvar_agregados_univariados(dados: ConjuntoDados, pasta: str = PASTA_DADOS) -> str:
+    """
+    Calcula e grava em disco (Parquet) os agregados univariados.
+
+    Os hashes dos arquivos de origem são gravados nos metadados do arquivo,
+    permitindo identificar posteriormente se os agregados estão desatualizados.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta onde o arquivo será gravado.
+
+    Retornos:
+    ----------
+    caminho:str
+        Caminho do arquivo gravado.
+    """
+    agregados = construir_agregados_univariados(dados)
+    tabela = pa.Table.from_pandas(agregados, preserve_index=False)
+    metadados = {
+        **(tabela.schema.metadata or {}),
+        b"versao": str(VERSAO_AGREGADOS).encode(),
+        b"origem": json.dumps(dados.hashes, sort_keys=True).encode(),
+    }
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    caminho = obter_caminho_agregados(pasta)
+    pq.write_table(tabela, caminho, compression="zstd")
+    return caminho
+
+
+def _ler_agregados(caminho: str, dados: ConjuntoDados) -> dict:
+    """
+    Lê os agregados univariados gravados em disco.
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do arquivo de agregados.
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard (usados na verificação de atualização).
+
+    Retornos:
+    ----------
+    agregados:dict
+        Dicionário com o índice da pergunta e a tupla (contagem, denominador),
+        ou None caso o arquivo esteja desatualizado.
+    """
+    tabela = pq.read_table(caminho)
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(b"versao") != str(VERSAO_AGREGADOS).encode():
+        return None
+    if json.loads(metadados.get(b"origem", b"{}")) != dados.hashes:
+        return None
+
+    agregados = {}
+    for p, sub in tabela.to_pandas().groupby("pergunta", sort=False):
+        respostas = pd.Index(sub["resposta"].to_numpy(dtype=object))
+        tipo = sub["tipo"].iloc[0]
+        if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(tipo)):
+            respostas = respostas.astype(tipo)
+        contagem = pd.Series(sub["quantidade"].to_numpy(), index=respostas)
+        agregados[int(p)] = (contagem, int(sub["denominador"].iloc[0]))
+    return agregados
+
+
+def obter_agregados_univariados(dados: ConjuntoDados, pasta: str = PASTA_DADOS) -> dict:
+    """
+    Obtém os agregados univariados pré-calculados.
+
+    O arquivo é lido uma única vez por processo (enquanto não for alterado).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    agregados:dict
+        Dicionário com o índice da pergunta e a tupla (contagem, denominador).
+        Caso o arquivo não exista ou esteja desatualizado, retorna um dicionário
+        vazio (e as contagens devem ser calculadas a partir do dataframe).
+    """
+    caminho = obter_caminho_agregados(pasta)
+    if not os.path.exists(caminho):
+        return {}
+
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size, dados.assinatura)
+    if _cache.get(pasta, (None, None))[0] == chave:
+        return _cache[pasta][1]
+
+    with _trava:
+        if _cache.get(pasta, (None, None))[0] != chave:
+            _cache[pasta] = (chave, _ler_agregados(caminho, dados) or {})
+    return _cache[pasta][1]
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Pré-calcula os agregados univariados do dashboard.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados.")
+    args = parser.parse_args()
+
+    caminho = salvar_agregados_univariados(carregar_dados(args.pasta), args.pasta)
+    print(f"Agregados gravados em {caminho}")
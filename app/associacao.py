@@ -0,0 +1,300 @@
+# Imports gerais
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Imports específicos
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from cubo import obter_cubo, obter_perguntas
+from agregacao import obter_tabela_estendida
+from tabulacao import obter_rotulos
+
+
+# constantes
+ARQUIVO_ASSOCIACOES = "associacoes.parquet"
+VERSAO_ASSOCIACOES = 1
+SUPORTE_MINIMO_LIFT = 10
+
+# Cache do processo para as associações gravadas em disco
+_cache = {}
+_trava = threading.Lock()
+
+# Dados (e cubo) carregados em cada processo de cálculo das associações
+_dados_processo = None
+
+
+def calcular_estatisticas(tabelas: list) -> dict:
+    """
+    Calcula as estatísticas de associação de um lote de tabelas estendidas.
+
+    As tabelas são empilhadas (com preenchimento de zeros) em um único
+    arranjo e as estatísticas são calculadas de forma vetorizada:
+
+    - qui-quadrado de Pearson, com os esperados obtidos dos totais de linha
+      e de coluna (alternativas sem respostas são desconsideradas);
+    - V de Cramér (entre 0 e 1);
+    - lift (observado / esperado) da combinação de alternativas mais
+      frequente que o esperado, entre as combinações com ao menos
+      SUPORTE_MINIMO_LIFT respondentes.
+
+    Para perguntas de multipla escolha os totais não correspondem à soma da
+    linha (coluna), e as estatísticas são uma aproximação (as alternativas
+    de um mesmo respondente não são independentes).
+
+    Parâmetros:
+    -----------
+    tabelas:list
+        Tabelas estendidas (ver tabulacao.calcular_tabela_estendida).
+
+    Retornos:
+    ----------
+    estatisticas:dict
+        Dicionário com os vetores n, qui_quadrado, graus_liberdade, v_cramer,
+        lift, linha_lift e coluna_lift (um elemento por tabela).
+    """
+    n = len(tabelas)
+    k1 = max(t.shape[0] for t in tabelas) - 1
+    k2 = max(t.shape[1] for t in tabelas) - 1
+
+    corpo = np.zeros((n, k1, k2))
+    linhas = np.zeros((n, k1))
+    colunas = np.zeros((n, k2))
+    total = np.zeros(n)
+    for a, tabela in enumerate(tabelas):
+        l, c = tabela.shape[0] - 1, tabela.shape[1] - 1
+        corpo[a, :l, :c] = tabela[:-1, :-1]
+        linhas[a, :l] = tabela[:-1, -1]
+        colunas[a, :c] = tabela[-1, :-1]
+        total[a] = tabela[-1, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        esperado = linhas[:, :, None] * colunas[:, None, :] / total[:, None, None]
+        validos = esperado > 0
+        qui_quadrado = np.where(validos, (corpo - esperado) ** 2 / esperado, 0).sum(axis=(1, 2))
+
+        k_linhas = np.count_nonzero(linhas > 0, axis=1)
+        k_colunas = np.count_nonzero(colunas > 0, axis=1)
+        k_minimo = np.minimum(k_linhas, k_colunas)
+        definido = (k_minimo > 1) & (total > 0)
+        v_cramer = np.where(definido,
+                            np.minimum(np.sqrt(qui_quadrado / (total * (k_minimo - 1))), 1.0),
+                            np.nan)
+
+        lift = np.where(validos & (corpo >= SUPORTE_MINIMO_LIFT), corpo / esperado, -np.inf)
+
+    posicao = lift.reshape(n, -1).argmax(axis=1)
+    lift_maximo = lift.reshape(n, -1)[np.arange(n), posicao]
+    return {
+        "n": total.astype(np.int64),
+        "qui_quadrado": np.where(definido, qui_quadrado, np.nan),
+        "graus_liberdade": np.where(definido, (k_linhas - 1) * (k_colunas - 1), 0),
+        "v_cramer": v_cramer,
+        "lift": np.where(np.isfinite(lift_maximo), lift_maximo, np.nan),
+        "linha_lift": np.where(np.isfinite(lift_maximo), posicao // k2, -1),
+        "coluna_lift": np.where(np.isfinite(lift_maximo), posicao % k2, -1),
+    }
+
+
+def _inicializar_processo(pasta: str):
+    """
+    Carrega os dados (e o cubo) em um processo de cálculo das associações.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    """
+    global _dados_processo
+    dados = carregar_dados(pasta)
+    _dados_processo = (dados, obter_cubo(dados, pasta))
+
+
+def _calcular_associacoes(idx_pergunta1: int, perguntas2: list) -> pd.DataFrame:
+    """
+    Calcula (em um processo de cálculo) as associações de uma pergunta com
+    uma lista de perguntas.
+
+    Parâmetros:
+    -----------
+    idx_pergunta1:int
+        Índice da primeira pergunta.
+    perguntas2:list
+        Índices das segundas perguntas.
+
+    Retornos:
+    ----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas.
+    """
+    dados, cubo = _dados_processo
+    respostas, catalogo = dados.respostas, dados.catalogo
+    tabelas = [obter_tabela_estendida(respostas, catalogo, idx_pergunta1, j, cubo)
+               for j in perguntas2]
+    estatisticas = calcular_estatisticas(tabelas)
+
+    # Alternativas da combinação de maior lift
+    rotulos1 = obter_rotulos(respostas, catalogo, idx_pergunta1)
+    alternativas1, alternativas2 = [], []
+    for j, linha, coluna in zip(perguntas2, estatisticas.pop("linha_lift"),
+                                estatisticas.pop("coluna_lift")):
+        alternativas1.append(str(rotulos1[linha]) if linha >= 0 else "")
+        alternativas2.append(str(obter_rotulos(respostas, catalogo, j)[coluna])
+                             if coluna >= 0 else "")
+
+    return pd.DataFrame({
+        "pergunta1": np.full(len(perguntas2), idx_pergunta1, dtype=np.int32),
+        "pergunta2": np.asarray(perguntas2, dtype=np.int32),
+        **estatisticas,
+        "alternativa1_lift": alternativas1,
+        "alternativa2_lift": alternativas2,
+    })
+
+
+def construir_associacoes(pasta: str = PASTA_DADOS, processos: int = None) -> pd.DataFrame:
+    """
+    Calcula as associações de todos os pares de perguntas (das partes do
+    questionário) e as grava em disco.
+
+    As tabelas são obtidas do cubo (quando disponível) ou calculadas a
+    partir das respostas; os pares são distribuídos entre os processos
+    (uma tarefa por primeira pergunta).
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    processos:int
+        Quantidade de processos utilizados no cálculo (None: quantidade de CPUs).
+
+    Retornos:
+    ----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas.
+    """
+    dados = carregar_dados(pasta)
+    perguntas = obter_perguntas(dados.catalogo)
+    pendentes = {i: perguntas[a + 1:] for a, i in enumerate(perguntas[:-1])}
+
+    if processos == 1:
+        _inicializar_processo(pasta)
+        partes = [_calcular_associacoes(i, js) for i, js in pendentes.items()]
+    else:
+        with ProcessPoolExecutor(processos, initializer=_inicializar_processo,
+                                 initargs=(pasta,)) as executor:
+            partes = list(executor.map(_calcular_associacoes, pendentes.keys(),
+                                       pendentes.values()))
+
+    associacoes = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+
+    tabela = pa.Table.from_pandas(associacoes, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        b"versao": str(VERSAO_ASSOCIACOES).encode(),
+        b"origem": json.dumps(dados.hashes, sort_keys=True).encode(),
+    })
+    # Troca atômica: os processos do dashboard nunca leem um arquivo incompleto
+    caminho = obter_caminho_associacoes(pasta)
+    temporario = f"{caminho}.tmp"
+    pq.write_table(tabela, temporario, compression="zstd")
+    os.replace(temporario, caminho)
+    return associacoes
+
+
+def obter_caminho_associacoes(pasta: str = PASTA_DADOS) -> str:
+    """
+    Obtém o caminho do arquivo de associações.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    caminho:str
+        Caminho do arquivo de associações.
+    """
+    return os.path.join(pasta, ARQUIVO_ASSOCIACOES)
+
+
+def _ler_associacoes(caminho: str, dados: ConjuntoDados) -> pd.DataFrame:
+    """
+    Lê as associações gravadas em disco.
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do arquivo de associações.
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard (usados na verificação de atualização).
+
+    Retornos:
+    ----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas, ou None caso o arquivo
+        esteja desatualizado.
+    """
+    tabela = pq.read_table(caminho)
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(b"versao") != str(VERSAO_ASSOCIACOES).encode():
+        return None
+    if json.loads(metadados.get(b"origem", b"{}")) != dados.hashes:
+        return None
+    return tabela.to_pandas()
+
+
+def obter_associacoes(dados: ConjuntoDados, pasta: str = PASTA_DADOS) -> pd.DataFrame:
+    """
+    Obtém as associações calculadas de todos os pares de perguntas.
+
+    O arquivo é lido uma única vez por processo (enquanto não for alterado).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas, ou None caso o arquivo
+        não exista ou esteja desatualizado.
+    """
+    caminho = obter_caminho_associacoes(pasta)
+    if not os.path.exists(caminho):
+        return None
+
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size, dados.assinatura)
+    if _cache.get(pasta, (None, None))[0] == chave:
+        return _cache[pasta][1]
+
+    with _trava:
+        if _cache.get(pasta, (None, None))[0] != chave:
+            _cache[pasta] = (chave, _ler_associacoes(caminho, dados))
+    return _cache[pasta][1]
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Calcula as associações (qui-quadrado, V de Cramér e lift) de todos os "
+                    "pares de perguntas.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados.")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Quantidade de processos (padrão: quantidade de CPUs).")
+    args = parser.parse_args()
+
+    associacoes = construir_associacoes(args.pasta, args.processos)
+    print(f"Associações de {len(associacoes)} pares gravadas em "
+          f"{obter_caminho_associacoes(args.pasta)}")
@@ -0,0 +1,270 @@
+# Imports gerais
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Imports específicos
+import agregacao as modulo_agregacao
+import dados as modulo_dados
+import segmentos as modulo_segmentos
+from dados import carregar_dados
+from agregados import construir_agregados_univariados
+from sintetico import gerar_dados
+from tabulacao import tabela_cruzada
+from agregacao import (obter_contagem, obter_dataframe_resposta_unica,
+                       obter_dataframe_respostas_multiplas, obter_tabelas_bivariadas)
+from segmentos import obter_segmento
+
+
+# constantes
+VERSAO_RESULTADOS = 1
+QTDE_PARES = 20
+LIMIAR_REGRESSAO = 1.2
+
+
+def medir(funcao, repeticoes: int) -> dict:
+    """
+    Mede o tempo de execução e o pico de memória alocada de uma função.
+
+    O tempo é medido sem o tracemalloc (que adiciona overhead às alocações);
+    o pico de memória é medido em uma execução adicional.
+
+    Parâmetros:
+    -----------
+    funcao:callable
+        Função (sem parâmetros) a ser medida.
+    repeticoes:int
+        Quantidade de execuções para a medição do tempo.
+
+    Retornos:
+    ----------
+    medicao:dict
+        Dicionário com o tempo mínimo, mediano e o pico de memória.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "tempo_min_s": min(tempos),
+        "tempo_mediana_s": statistics.median(tempos),
+        "memoria_pico_mb": pico / 2**20,
+    }
+
+
+def obter_pares(dados: modulo_dados.ConjuntoDados, rng: np.random.Generator) -> dict:
+    """
+    Sorteia os pares de perguntas utilizados na medição da análise multivariada.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    rng:np.random.Generator
+        Gerador de números aleatórios.
+
+    Retornos:
+    ----------
+    pares:dict
+        Dicionário com o tipo do par e a lista de pares de perguntas.
+    """
+    unicas = np.array(dados.catalogo.unicas)
+    multiplas = np.array(dados.catalogo.multiplas)
+
+    def sortear(a, b):
+        return [(int(i), int(j)) for i, j in
+                zip(rng.choice(a, QTDE_PARES), rng.choice(b, QTDE_PARES)) if i != j]
+
+    return {
+        "unica_unica": sortear(unicas, unicas),
+        "unica_multipla": sortear(unicas, multiplas),
+        "multipla_unica": sortear(multiplas, unicas),
+        "multipla_multipla": sortear(multiplas, multiplas),
+    }
+
+
+def executar_benchmark(pasta: str, repeticoes: int, semente: int = 42) -> dict:
+    """
+    Executa a medição de todos os caminhos de agregação (sem o Streamlit).
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    repeticoes:int
+        Quantidade de execuções de cada caso.
+    semente:int
+        Semente utilizada no sorteio dos pares de perguntas.
+
+    Retornos:
+    ----------
+    casos:dict
+        Dicionário com o nome do caso e a sua medição.
+    """
+
+    def carga():
+        modulo_dados._conjuntos.limpar()
+        carregar_dados(pasta)
+
+    casos = {"carga": medir(carga, repeticoes)}
+    dados = carregar_dados(pasta)
+    respostas = dados.respostas
+    catalogo = dados.catalogo
+
+    # Análise univariada (todas as perguntas de cada tipo)
+    for qtde_perc in ("Quantidade", "Percentual"):
+        casos[f"univariada_unica_{qtde_perc.lower()}"] = medir(lambda: [
+            obter_dataframe_resposta_unica(respostas, catalogo, p, qtde_perc)
+            for p in catalogo.unicas], repeticoes)
+        casos[f"univariada_multipla_{qtde_perc.lower()}"] = medir(lambda: [
+            obter_dataframe_respostas_multiplas(respostas, catalogo, p, qtde_perc)
+            for p in catalogo.multiplas], repeticoes)
+    casos["agregados_univariados"] = medir(
+        lambda: construir_agregados_univariados(dados), repeticoes)
+
+    # Segmento (filtro em duas perguntas de unica escolha), sem os caches de segmentos
+    filtros = {p: list(respostas.codigos(p)[1][:2]) for p in catalogo.unicas[:2]}
+
+    def segmento_univariado():
+        modulo_segmentos._indices.limpar()
+        modulo_segmentos._segmentos.limpar()
+        modulo_agregacao._agregados_segmentos.limpar()
+        segmento = obter_segmento(dados, filtros)
+        for p in catalogo.unicas + catalogo.multiplas:
+            obter_contagem(respostas, catalogo, p, None, segmento)
+
+    casos["univariada_segmento"] = medir(segmento_univariado, repeticoes)
+
+    # Análise multivariada (pares sorteados de cada tipo)
+    pares = obter_pares(dados, np.random.default_rng(semente))
+    for tipo, lista in pares.items():
+        casos[f"multivariada_{tipo}"] = medir(lambda: [
+            tabela_cruzada(respostas, catalogo, i, j) for i, j in lista], repeticoes)
+    casos["multivariada_coocorrencia"] = medir(lambda: [
+        obter_tabelas_bivariadas(respostas, catalogo, i, j)
+        for i, j in pares["multipla_multipla"]], repeticoes)
+
+    return casos
+
+
+def obter_commit() -> str:
+    """
+    Obtém o commit atual do repositório (caso disponível).
+
+    Retornos:
+    ----------
+    commit:str
+        Hash do commit ou None.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+                              ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultados: dict, base: dict) -> list:
+    """
+    Compara os resultados de duas execuções do benchmark.
+
+    Parâmetros:
+    -----------
+    resultados:dict
+        Resultados da execução atual.
+    base:dict
+        Resultados da execução de referência.
+
+    Retornos:
+    ----------
+    linhas:list
+        Lista de tuplas (caso, tempo base, tempo atual, razão, regressão).
+    """
+    linhas = []
+    for caso, medicao in resultados["casos"].items():
+        if caso not in base["casos"]:
+            continue
+        anterior = base["casos"][caso]["tempo_mediana_s"]
+        atual = medicao["tempo_mediana_s"]
+        razao = atual / anterior if anterior > 0 else float("inf")
+        linhas.append((caso, anterior, atual, razao, razao > LIMIAR_REGRESSAO))
+    return linhas
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo e a memória dos caminhos de agregação do dashboard.")
+    parser.add_argument("--pasta", default=None,
+                        help="Pasta com os arquivos de dados (se omitida, gera dados sintéticos).")
+    parser.add_argument("--respondentes", type=int, default=100_000,
+                        help="Quantidade de respondentes dos dados sintéticos.")
+    parser.add_argument("--repeticoes", type=int, default=5,
+                        help="Quantidade de execuções de cada caso.")
+    parser.add_argument("--semente", type=int, default=42,
+                        help="Semente dos dados sintéticos e do sorteio dos pares.")
+    parser.add_argument("--saida", default=None,
+                        help="Arquivo JSON com os resultados.")
+    parser.add_argument("--comparar", default=None,
+                        help="Arquivo JSON de uma execução anterior (referência).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporaria:
+        pasta = args.pasta
+        if pasta is None:
+            pasta = temporaria
+            gerar_dados(args.respondentes, pasta, args.semente)
+        casos = executar_benchmark(pasta, args.repeticoes, args.semente)
+        n_respondentes = carregar_dados(pasta).respostas.n_respondentes
+
+    commit = obter_commit()
+    resultados = {
+        "versao": VERSAO_RESULTADOS,
+        "commit": commit,
+        "data_hora": datetime.now(timezone.utc).isoformat(),
+        "respondentes": n_respondentes,
+        "sintetico": args.pasta is None,
+        "ambiente": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+        },
+        "casos": casos,
+    }
+
+    saida = args.saida or f"benchmark_{(commit or 'local')[:8]}_{n_respondentes}.json"
+    with open(saida, "w", encoding="utf-8") as output_file:
+        json.dump(resultados, output_file, indent=2, ensure_ascii=False)
+
+    for caso, medicao in casos.items():
+        print(f"{caso:40s} {medicao['tempo_mediana_s'] * 1000:10.2f} ms "
+              f"{medicao['memoria_pico_mb']:10.2f} MB")
+    print(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as input_file:
+            base = json.load(input_file)
+        print(f"\nComparação com {base.get('commit')} ({base.get('respondentes')} respondentes):")
+        for caso, anterior, atual, razao, regressao in comparar(resultados, base):
+            marcador = "  <-- regressão" if regressao else ""
+            print(f"{caso:40s} {anterior * 1000:10.2f} ms -> {atual * 1000:10.2f} ms "
+                  f"({razao:.2f}x){marcador}")
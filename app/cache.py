@@ -0,0 +1,98 @@
+# Imports gerais
+import threading
+from collections import OrderedDict
+
+
+# constantes
+CAPACIDADE_PADRAO = 1024
+
+
+class CacheLRU:
+    """
+    Cache (em memória) com descarte do item menos recentemente utilizado.
+
+    O acesso é protegido por uma trava, de forma que o cache pode ser
+    compartilhado entre as threads do processo.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE_PADRAO):
+        """
+        Cria o cache vazio.
+
+        Parâmetros:
+        -----------
+        capacidade:int
+            Quantidade máxima de itens armazenados.
+        """
+        self.capacidade = capacidade
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._itens)
+
+    def obter(self, chave, padrao=None):
+        """
+        Obtém um item do cache.
+
+        Parâmetros:
+        -----------
+        chave:hashable
+            Chave do item.
+        padrao:object
+            Valor retornado caso o item não esteja no cache.
+
+        Retornos:
+        ----------
+        valor:object
+            Valor armazenado (ou o valor padrão).
+        """
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave]
+            self.faltas += 1
+            return padrao
+
+    def armazenar(self, chave, valor):
+        """
+        Armazena um item no cache (descartando o menos recentemente utilizado,
+        caso a capacidade seja excedida).
+
+        Parâmetros:
+        -----------
+        chave:hashable
+            Chave do item.
+        valor:object
+            Valor a ser armazenado.
+        """
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def limpar(self):
+        """
+        Remove todos os itens do cache (e zera os contadores).
+        """
+        with self._trava:
+            self._itens.clear()
+            self.acertos = 0
+            self.faltas = 0
+
+    def estatisticas(self) -> dict:
+        """
+        Obtém as estatísticas de utilização do cache.
+
+        Retornos:
+        ----------
+        estatisticas:dict
+            Dicionário com a capacidade, a quantidade de itens, de acertos e de faltas.
+        """
+        with self._trava:
+            return {"capacidade": self.capacidade, "itens": len(self._itens),
+                    "acertos": self.acertos, "faltas": self.faltas}
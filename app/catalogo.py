@@ -0,0 +1,302 @@
+# Imports gerais
+import argparse
+import json
+import os
+import pickle
+
+
+# constantes
+ARQUIVO_CATALOGO = "catalogo.json"
+VERSAO_CATALOGO = 1
+
+
+class CatalogoPerguntas:
+    """
+    Catálogo (indexado) das perguntas do questionário.
+
+    Reúne, em estruturas de acesso direto (dicionários), as informações que
+    antes eram consultadas nas listas/dicionários tipo_pergunta,
+    resposta_multipla, categoria_pergunta e textos_alternativo:
+
+    - texto -> índice da pergunta/alternativa;
+    - índice -> tipo da pergunta ('unica' ou 'multipla');
+    - pergunta -> índices das colunas das alternativas;
+    - parte -> perguntas (e os seus textos).
+    """
+
+    def __init__(
+            self,
+            textos_alternativo: list,
+            tipo_pergunta: dict,
+            resposta_multipla: dict,
+            categoria_pergunta: dict):
+        """
+        Constrói o catálogo a partir das estruturas originais.
+
+        Parâmetros:
+        -----------
+        textos_alternativo:list
+            Lista de textos alternativos para as perguntas e respostas.
+        tipo_pergunta:dict
+            Dicionário com o tipo de pergunta.
+        resposta_multipla:dict
+            Dicionário com os índices das alternativas das perguntas de multipla escolha.
+        categoria_pergunta:dict
+            Dicionário com as perguntas de cada parte do questionário.
+        """
+        self.textos = tuple(textos_alternativo)
+        self.unicas = tuple(tipo_pergunta['unica'])
+        self.multiplas = tuple(tipo_pergunta['multipla'])
+        self.partes = {parte: tuple(perguntas)
+                       for parte, perguntas in categoria_pergunta.items()}
+
+        self._tipos = {idx: 'unica' for idx in self.unicas}
+        self._tipos.update({idx: 'multipla' for idx in self.multiplas})
+        self._alternativas = {idx: tuple(colunas)
+                              for idx, colunas in resposta_multipla.items()}
+
+        # Em caso de textos repetidos, prevalece o primeiro (como em list.index)
+        self._indices = {}
+        for idx, texto in enumerate(self.textos):
+            self._indices.setdefault(texto, idx)
+
+        self._textos_partes = {parte: tuple(self.textos[p] for p in perguntas)
+                               for parte, perguntas in self.partes.items()}
+
+    def indice(self, texto: str) -> int:
+        """
+        Obtém o índice de uma pergunta (ou alternativa) a partir do seu texto.
+
+        Parâmetros:
+        -----------
+        texto:str
+            Texto da pergunta ou alternativa.
+
+        Retornos:
+        ----------
+        idx:int
+            Índice da pergunta ou alternativa.
+        """
+        return self._indices[texto]
+
+    def texto(self, idx: int) -> str:
+        """
+        Obtém o texto de uma pergunta (ou alternativa).
+
+        Parâmetros:
+        -----------
+        idx:int
+            Índice da pergunta ou alternativa.
+
+        Retornos:
+        ----------
+        texto:str
+            Texto da pergunta ou alternativa.
+        """
+        return self.textos[idx]
+
+    def tipo(self, idx: int) -> str:
+        """
+        Obtém o tipo de uma pergunta.
+
+        Parâmetros:
+        -----------
+        idx:int
+            Índice da pergunta.
+
+        Retornos:
+        ----------
+        tipo:str
+            'unica' ou 'multipla' (perguntas sem tipo são tratadas como 'unica').
+        """
+        return self._tipos.get(idx, 'unica')
+
+    def eh_multipla(self, idx: int) -> bool:
+        """
+        Verifica se uma pergunta é de multipla escolha.
+
+        Parâmetros:
+        -----------
+        idx:int
+            Índice da pergunta.
+
+        Retornos:
+        ----------
+        multipla:bool
+            True caso a pergunta seja de multipla escolha.
+        """
+        return self._tipos.get(idx) == 'multipla'
+
+    def alternativas(self, idx: int) -> tuple:
+        """
+        Obtém os índices das colunas das alternativas de uma pergunta de
+        multipla escolha.
+
+        Parâmetros:
+        -----------
+        idx:int
+            Índice da pergunta de multipla escolha.
+
+        Retornos:
+        ----------
+        colunas:tuple
+            Índices das colunas das alternativas.
+        """
+        return self._alternativas[idx]
+
+    def textos_alternativas(self, idx: int) -> list:
+        """
+        Obtém os textos das alternativas de uma pergunta de multipla escolha.
+
+        Parâmetros:
+        -----------
+        idx:int
+            Índice da pergunta de multipla escolha.
+
+        Retornos:
+        ----------
+        textos:list
+            Textos das alternativas.
+        """
+        return [self.textos[c] for c in self._alternativas[idx]]
+
+    def perguntas(self, parte: str) -> tuple:
+        """
+        Obtém as perguntas de uma parte do questionário.
+
+        Parâmetros:
+        -----------
+        parte:str
+            Código da parte do questionário (ex.: 'p1').
+
+        Retornos:
+        ----------
+        perguntas:tuple
+            Índices das perguntas da parte (vazia, caso a parte não exista).
+        """
+        return self.partes.get(parte, ())
+
+    def textos_perguntas(self, parte: str) -> tuple:
+        """
+        Obtém os textos das perguntas de uma parte do questionário.
+
+        Parâmetros:
+        -----------
+        parte:str
+            Código da parte do questionário (ex.: 'p1').
+
+        Retornos:
+        ----------
+        textos:tuple
+            Textos das perguntas da parte (vazia, caso a parte não exista).
+        """
+        return self._textos_partes.get(parte, ())
+
+    def para_dict(self) -> dict:
+        """
+        Obtém a representação (serializável em JSON) do catálogo.
+
+        Retornos:
+        ----------
+        catalogo:dict
+            Dicionário com a versão e as estruturas do catálogo.
+        """
+        return {
+            "versao": VERSAO_CATALOGO,
+            "textos_alternativo": list(self.textos),
+            "tipo_pergunta": {"unica": list(self.unicas), "multipla": list(self.multiplas)},
+            "resposta_multipla": {str(idx): list(colunas)
+                                  for idx, colunas in self._alternativas.items()},
+            "categoria_pergunta": {parte: list(perguntas)
+                                   for parte, perguntas in self.partes.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, catalogo: dict) -> "CatalogoPerguntas":
+        """
+        Constrói o catálogo a partir da sua representação em dicionário.
+
+        Parâmetros:
+        -----------
+        catalogo:dict
+            Dicionário com a versão e as estruturas do catálogo.
+
+        Retornos:
+        ----------
+        catalogo:CatalogoPerguntas
+            Catálogo das perguntas.
+        """
+        if catalogo.get("versao") != VERSAO_CATALOGO:
+            raise ValueError(f"Versão do catálogo não suportada: {catalogo.get('versao')}")
+        return cls(catalogo["textos_alternativo"], catalogo["tipo_pergunta"],
+                   {int(idx): colunas for idx, colunas in catalogo["resposta_multipla"].items()},
+                   catalogo["categoria_pergunta"])
+
+
+def ler_catalogo(caminho: str) -> CatalogoPerguntas:
+    """
+    Lê o catálogo das perguntas de um arquivo JSON.
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do arquivo JSON.
+
+    Retornos:
+    ----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas.
+    """
+    with open(caminho, encoding="utf-8") as input_file:
+        return CatalogoPerguntas.de_dict(json.load(input_file))
+
+
+def salvar_catalogo(catalogo: CatalogoPerguntas, caminho: str):
+    """
+    Grava o catálogo das perguntas em um arquivo JSON.
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas.
+    caminho:str
+        Caminho do arquivo JSON.
+    """
+    with open(caminho, "w", encoding="utf-8") as output_file:
+        json.dump(catalogo.para_dict(), output_file, ensure_ascii=False)
+
+
+def converter_pickles(pasta: str) -> CatalogoPerguntas:
+    """
+    Constrói o catálogo a partir dos arquivos .pickle do notebook de preparação.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas.
+    """
+    artefatos = {}
+    for nome in ("textos_alternativo", "tipo_pergunta", "resposta_multipla",
+                 "categoria_pergunta"):
+        with open(os.path.join(pasta, f"{nome}.pickle"), "rb") as input_file:
+            artefatos[nome] = pickle.load(input_file)
+    return CatalogoPerguntas(**artefatos)
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Converte os arquivos .pickle para o catálogo de perguntas (JSON).")
+    parser.add_argument("--pasta", default="./data",
+                        help="Pasta com os arquivos de dados.")
+    args = parser.parse_args()
+
+    caminho = os.path.join(args.pasta, ARQUIVO_CATALOGO)
+    salvar_catalogo(converter_pickles(args.pasta), caminho)
+    print(f"Catálogo gravado em {caminho}")
@@ -0,0 +1,412 @@
+# Imports gerais
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from particoes import ler_colunas
+
+
+def obter_indicadores(df: pd.DataFrame, colunas: list) -> tuple:
+    """
+    Obtém a matriz de indicadores (0/1) das alternativas de uma pergunta de
+    multipla escolha.
+
+    Parâmetros:
+    -----------
+    df:pd.DataFrame
+        Dataframe com as respostas do questionário.
+    colunas:list
+        Índices das colunas das alternativas da pergunta.
+
+    Retornos:
+    ----------
+    indicadores:np.ndarray
+        Matriz (respondentes x alternativas) do tipo uint8.
+    validos:np.ndarray
+        Vetor booleano indicando os respondentes que responderam a pergunta.
+    """
+    n = df.shape[0]
+    indicadores = np.zeros((n, len(colunas)), dtype=np.uint8)
+    validos = np.ones(n, dtype=bool)
+
+    # Apenas as colunas necessárias são lidas (uma a uma)
+    for j, c in enumerate(colunas):
+        valores = df.iloc[:, c].to_numpy(dtype=np.float64, na_value=np.nan)
+        indicadores[:, j] = valores == 1
+        validos &= ~np.isnan(valores)
+
+    return indicadores, validos
+
+
+class RespostasCompactas:
+    """
+    Representação compacta (em memória) das respostas do questionário.
+
+    - Perguntas de unica escolha são armazenadas como códigos inteiros
+      (pd.Categorical), com as alternativas em ordem crescente (fixa);
+    - As alternativas de cada pergunta de multipla escolha são armazenadas
+      como um bitset (np.packbits, 1 bit por alternativa e respondente),
+      juntamente com o bitset dos respondentes que responderam a pergunta
+      (na ordem de bits do Arrow).
+
+    As funções de agregação acessam as respostas exclusivamente pelos métodos
+    codigos() e indicadores(). A representação pode ser publicada em um
+    arquivo Arrow (publicar) e anexada, sem cópia, por vários processos
+    (anexar).
+    """
+
+    def __init__(self, df: pd.DataFrame, catalogo: CatalogoPerguntas):
+        """
+        Converte o dataframe de respostas para a representação compacta.
+
+        Parâmetros:
+        -----------
+        df:pd.DataFrame
+            Dataframe com as respostas do questionário.
+        catalogo:CatalogoPerguntas
+            Catálogo (indexado) das perguntas do questionário.
+        """
+        self.n_respondentes = df.shape[0]
+        # Identificador da carga (utilizado nas chaves dos caches compartilhados)
+        self.identificador = uuid.uuid4().hex
+        self._unicas = {}
+        self._multiplas = {}
+
+        for idx in catalogo.unicas:
+            self._converter_unica(idx, df.iloc[:, idx])
+
+        for idx in catalogo.multiplas:
+            self._converter_multipla(idx, df, catalogo.alternativas(idx))
+
+    def _converter_unica(self, idx_pergunta: int, serie: pd.Series):
+        """
+        Converte as respostas de uma pergunta de unica escolha para os códigos
+        inteiros (com as alternativas em ordem crescente).
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta de unica escolha.
+        serie:pd.Series
+            Respostas da pergunta.
+        """
+        categorias = np.sort(serie.dropna().unique())
+        categorico = pd.Categorical(serie, categories=categorias)
+        self._unicas[idx_pergunta] = (categorico.codes, categorico.categories)
+
+    def _converter_multipla(self, idx_pergunta: int, df: pd.DataFrame, colunas: list):
+        """
+        Converte as alternativas de uma pergunta de multipla escolha para o bitset.
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta de multipla escolha.
+        df:pd.DataFrame
+            Dataframe com as respostas do questionário.
+        colunas:list
+            Índices (posição no dataframe) das colunas das alternativas.
+        """
+        indicadores, validos = obter_indicadores(df, colunas)
+        self._multiplas[idx_pergunta] = (np.packbits(indicadores, axis=1),
+                                         np.packbits(validos, bitorder="little"),
+                                         indicadores.shape[1])
+
+    def codigos(self, idx_pergunta: int, mascara: np.ndarray = None) -> tuple:
+        """
+        Obtém os códigos inteiros das respostas de uma pergunta de unica escolha.
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta de unica escolha.
+        mascara:np.ndarray
+            Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+
+        Retornos:
+        ----------
+        codigos:np.ndarray
+            Código de cada resposta (-1 para respostas ausentes).
+        categorias:pd.Index
+            Alternativas correspondentes a cada código.
+        """
+        codigos, categorias = self._unicas[idx_pergunta]
+        if mascara is None:
+            return codigos, categorias
+        return codigos[mascara], categorias
+
+    def indicadores(self, idx_pergunta: int, mascara: np.ndarray = None) -> tuple:
+        """
+        Obtém a matriz de indicadores (0/1) de uma pergunta de multipla escolha.
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta de multipla escolha.
+        mascara:np.ndarray
+            Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+
+        Retornos:
+        ----------
+        indicadores:np.ndarray
+            Matriz (respondentes x alternativas) do tipo uint8.
+        validos:np.ndarray
+            Vetor booleano indicando os respondentes que responderam a pergunta.
+        """
+        bits, bits_validos, k = self._multiplas[idx_pergunta]
+        validos = np.unpackbits(bits_validos, count=self.n_respondentes,
+                                bitorder="little").view(bool)
+        if mascara is not None:
+            # As linhas são selecionadas antes da expansão dos bits
+            bits = bits[mascara]
+            validos = validos[mascara]
+        indicadores = np.unpackbits(bits, axis=1, count=k)
+        return indicadores, validos
+
+    def hash_pergunta(self, idx_pergunta: int) -> str:
+        """
+        Obtém o hash das respostas de uma pergunta (permite identificar as
+        perguntas cujas respostas foram alteradas).
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta.
+
+        Retornos:
+        ----------
+        hash:str
+            Hash sha1 das respostas (códigos e alternativas, ou bitsets).
+        """
+        h = hashlib.sha1()
+        if idx_pergunta in self._unicas:
+            codigos, categorias = self._unicas[idx_pergunta]
+            h.update(np.ascontiguousarray(codigos).tobytes())
+            h.update("\x1f".join(map(str, categorias)).encode())
+        else:
+            bits, bits_validos, k = self._multiplas[idx_pergunta]
+            h.update(bits.tobytes())
+            h.update(bits_validos.tobytes())
+            h.update(str(k).encode())
+        return h.hexdigest()
+
+    def memoria(self) -> int:
+        """
+        Obtém a memória (em bytes) ocupada pela representação compacta.
+
+        Retornos:
+        ----------
+        memoria:int
+            Memória ocupada (códigos, categorias e bitsets).
+        """
+        memoria = 0
+        for codigos, categorias in self._unicas.values():
+            memoria += codigos.nbytes
+            memoria += int(categorias.memory_usage(deep=True))
+        for bits, bits_validos, _ in self._multiplas.values():
+            memoria += bits.nbytes + bits_validos.nbytes
+        return memoria
+
+    def publicar(self, caminho: str, metadados: dict = None):
+        """
+        Grava a representação compacta em um arquivo Arrow (IPC, sem
+        compressão), que pode ser mapeado em memória por vários processos.
+
+        Cada pergunta de unica escolha é uma coluna de códigos (com as
+        alternativas nos metadados do campo) e cada pergunta de multipla
+        escolha é uma coluna de bitsets (lista de bytes de tamanho fixo) e
+        uma coluna booleana dos respondentes que responderam a pergunta. A
+        troca do arquivo é atômica (processos anexados ao arquivo anterior
+        continuam utilizando-o).
+
+        Parâmetros:
+        -----------
+        caminho:str
+            Caminho do arquivo Arrow.
+        metadados:dict
+            Metadados gravados no arquivo (serializáveis em JSON; opcional).
+        """
+        nomes, colunas, campos = [], [], []
+        for idx, (codigos, categorias) in self._unicas.items():
+            coluna = pa.array(codigos)
+            nomes.append(f"u{idx}")
+            colunas.append(coluna)
+            campos.append(pa.field(f"u{idx}", coluna.type, nullable=False, metadata={
+                "categorias": json.dumps(categorias.tolist()),
+                "tipo": str(categorias.dtype)}))
+
+        for idx, (bits, bits_validos, k) in self._multiplas.items():
+            coluna = pa.FixedSizeListArray.from_arrays(pa.array(bits.ravel()), bits.shape[1])
+            validos = pa.Array.from_buffers(pa.bool_(), self.n_respondentes,
+                                            [None, pa.py_buffer(bits_validos)])
+            campos.append(pa.field(f"m{idx}", coluna.type, nullable=False,
+                                   metadata={"alternativas": str(k)}))
+            campos.append(pa.field(f"v{idx}", pa.bool_(), nullable=False))
+            colunas.extend([coluna, validos])
+
+        esquema = pa.schema(campos, metadata={
+            "respondentes": str(self.n_respondentes),
+            "metadados": json.dumps(metadados or {})})
+        tabela = pa.Table.from_arrays(colunas, schema=esquema)
+
+        temporario = f"{caminho}.tmp"
+        with pa.OSFile(temporario, "wb") as output_file:
+            with pa.ipc.new_file(output_file, esquema) as escritor:
+                escritor.write_table(tabela)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def anexar(cls, caminho: str) -> tuple:
+        """
+        Anexa a representação compacta publicada em um arquivo Arrow.
+
+        O arquivo é mapeado em memória e os códigos e bitsets são visões
+        (somente leitura) dos buffers do arquivo: as páginas são
+        compartilhadas (cache de páginas do sistema operacional) entre todos
+        os processos anexados.
+
+        Parâmetros:
+        -----------
+        caminho:str
+            Caminho do arquivo Arrow (ver publicar).
+
+        Retornos:
+        ----------
+        respostas:RespostasCompactas
+            Respostas do questionário (representação compacta).
+        metadados:dict
+            Metadados gravados no arquivo.
+        """
+        tabela = pa.ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+        metadados = tabela.schema.metadata
+
+        respostas = cls.__new__(cls)
+        respostas.n_respondentes = int(metadados[b"respondentes"])
+        respostas.identificador = uuid.uuid4().hex
+        respostas._unicas = {}
+        respostas._multiplas = {}
+        for campo, coluna in zip(tabela.schema, tabela.columns):
+            # Arquivo gravado em um único lote: uma parte (chunk) por coluna (nenhuma, caso
+            # não existam respondentes)
+            arranjo = coluna.chunk(0) if coluna.num_chunks else pa.array([], type=campo.type)
+            idx = int(campo.name[1:])
+            if campo.name.startswith("u"):
+                categorias = pd.Index(json.loads(campo.metadata[b"categorias"]),
+                                      dtype=campo.metadata[b"tipo"].decode())
+                respostas._unicas[idx] = (arranjo.to_numpy(zero_copy_only=True), categorias)
+            elif campo.name.startswith("m"):
+                bits = arranjo.flatten().to_numpy(zero_copy_only=True)
+                validos = tabela.column(f"v{idx}")
+                if validos.num_chunks:
+                    bits_validos = np.frombuffer(validos.chunk(0).buffers()[1], dtype=np.uint8,
+                                                 count=(respostas.n_respondentes + 7) // 8)
+                else:
+                    bits_validos = np.zeros(0, dtype=np.uint8)
+                respostas._multiplas[idx] = (bits.reshape(respostas.n_respondentes,
+                                                          arranjo.type.list_size),
+                                             bits_validos,
+                                             int(campo.metadata[b"alternativas"]))
+        return respostas, json.loads(metadados[b"metadados"])
+
+
+class RespostasParticionadas(RespostasCompactas):
+    """
+    Representação compacta das respostas de uma edição particionada (ver
+    particoes.py), carregada sob demanda.
+
+    Nenhuma coluna é lida na criação: na primeira utilização de cada
+    pergunta, apenas as suas colunas são lidas das partições (leitura
+    projetada) e convertidas para a representação compacta. Dessa forma, a
+    memória ocupada por uma edição é a das perguntas efetivamente
+    apresentadas.
+    """
+
+    def __init__(self, pasta: str, catalogo: CatalogoPerguntas, partes: dict,
+                 n_respondentes: int):
+        """
+        Cria a representação (vazia) de uma edição particionada.
+
+        Parâmetros:
+        -----------
+        pasta:str
+            Pasta da edição particionada.
+        catalogo:CatalogoPerguntas
+            Catálogo (indexado) das perguntas da edição.
+        partes:dict
+            Índice das partições (ver particoes.ler_indice_particoes).
+        n_respondentes:int
+            Quantidade de respondentes da edição.
+        """
+        self.n_respondentes = n_respondentes
+        self.identificador = uuid.uuid4().hex
+        self._unicas = {}
+        self._multiplas = {}
+        self._pasta = pasta
+        self._catalogo = catalogo
+        self._partes = partes
+        self._trava = threading.Lock()
+
+    def _carregar_pergunta(self, idx_pergunta: int):
+        """
+        Lê (leitura projetada) e converte as colunas de uma pergunta, caso
+        ela ainda não tenha sido carregada.
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta.
+        """
+        if idx_pergunta in self._unicas or idx_pergunta in self._multiplas:
+            return
+        with self._trava:
+            if idx_pergunta in self._unicas or idx_pergunta in self._multiplas:
+                return
+            if self._catalogo.eh_multipla(idx_pergunta):
+                alternativas = list(self._catalogo.alternativas(idx_pergunta))
+                df = ler_colunas(self._pasta, alternativas, self._partes)
+                self._converter_multipla(idx_pergunta, df, range(len(alternativas)))
+            else:
+                df = ler_colunas(self._pasta, [idx_pergunta], self._partes)
+                self._converter_unica(idx_pergunta, df.iloc[:, 0])
+
+    def carregar_todas(self):
+        """
+        Carrega todas as perguntas da edição (ex.: antes da publicação).
+        """
+        for idx in self._catalogo.unicas + self._catalogo.multiplas:
+            self._carregar_pergunta(idx)
+
+    def carregadas(self) -> int:
+        """
+        Obtém a quantidade de perguntas já carregadas.
+
+        Retornos:
+        ----------
+        quantidade:int
+            Quantidade de perguntas carregadas.
+        """
+        return len(self._unicas) + len(self._multiplas)
+
+    def codigos(self, idx_pergunta: int, mascara: np.ndarray = None) -> tuple:
+        self._carregar_pergunta(idx_pergunta)
+        return super().codigos(idx_pergunta, mascara)
+
+    def indicadores(self, idx_pergunta: int, mascara: np.ndarray = None) -> tuple:
+        self._carregar_pergunta(idx_pergunta)
+        return super().indicadores(idx_pergunta, mascara)
+
+    def hash_pergunta(self, idx_pergunta: int) -> str:
+        self._carregar_pergunta(idx_pergunta)
+        return super().hash_pergunta(idx_pergunta)
+
+    def publicar(self, caminho: str, metadados: dict = None):
+        self.carregar_todas()
+        super().publicar(caminho, metadados)
@@ -0,0 +1,157 @@
+# Imports gerais
+import argparse
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+
+# Imports específicos
+from dados import ARQUIVO_COMPARTILHADO, PASTA_DADOS, carregar_dados
+from compacto import RespostasParticionadas
+from edicoes import listar_edicoes, obter_pasta_edicao
+
+
+# constantes
+ARQUIVO_INICIAR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iniciar.py")
+PORTA_INICIAL = 8501
+INTERVALO_VERIFICACAO = 1.0
+TEMPO_ENCERRAMENTO = 10.0
+
+logger = logging.getLogger("compartilhado")
+
+
+def publicar_dados(pasta: str = PASTA_DADOS, forcar: bool = False) -> dict:
+    """
+    Publica as respostas (representação compacta) de uma pasta de dados no
+    arquivo compartilhado (Arrow, mapeado em memória), ao qual os processos
+    do dashboard são anexados (ver carregar_dados).
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    forcar:bool
+        Publica o arquivo mesmo que ele esteja atualizado.
+
+    Retornos:
+    ----------
+    resumo:dict
+        Dicionário com o caminho e o tamanho do arquivo e a indicação se ele
+        foi (re)publicado.
+    """
+    caminho = os.path.join(pasta, ARQUIVO_COMPARTILHADO)
+    dados = carregar_dados(pasta)
+    publicado = forcar or not dados.compartilhado
+    if publicado:
+        memoria = dados.memoria
+        if isinstance(dados.respostas, RespostasParticionadas):
+            # As perguntas de uma edição particionada são carregadas para a publicação
+            dados.respostas.carregar_todas()
+            memoria += dados.respostas.memoria()
+        dados.respostas.publicar(caminho, {
+            "assinatura": [list(a) for a in dados.assinatura],
+            "hashes": dados.hashes,
+            "memoria": memoria,
+            "memoria_original": dados.memoria_original,
+        })
+    return {"caminho": caminho, "tamanho": os.path.getsize(caminho), "publicado": publicado}
+
+
+def iniciar_processo(porta: int, indice: int, argumentos: list) -> subprocess.Popen:
+    """
+    Inicia um processo do dashboard (com aquecimento, ver iniciar.py).
+
+    Parâmetros:
+    -----------
+    porta:int
+        Porta do servidor do Streamlit.
+    indice:int
+        Índice do processo (utilizado na porta de métricas, quando configurada).
+    argumentos:list
+        Argumentos repassados ao 'streamlit run'.
+
+    Retornos:
+    ----------
+    processo:subprocess.Popen
+        Processo iniciado.
+    """
+    ambiente = dict(os.environ)
+    if ambiente.get("PORTA_METRICAS"):
+        ambiente["PORTA_METRICAS"] = str(int(ambiente["PORTA_METRICAS"]) + indice)
+    return subprocess.Popen([sys.executable, ARQUIVO_INICIAR, "--server.port", str(porta)]
+                            + argumentos, env=ambiente)
+
+
+def supervisionar(quantidade: int, porta_inicial: int = PORTA_INICIAL, argumentos: list = None):
+    """
+    Inicia os processos do dashboard (portas porta_inicial, porta_inicial + 1,
+    ...) e os reinicia caso sejam encerrados, até o recebimento de SIGINT ou
+    SIGTERM (repassado aos processos).
+
+    Parâmetros:
+    -----------
+    quantidade:int
+        Quantidade de processos.
+    porta_inicial:int
+        Porta do primeiro processo.
+    argumentos:list
+        Argumentos repassados ao 'streamlit run'.
+    """
+    argumentos = argumentos or []
+    processos = [iniciar_processo(porta_inicial + i, i, argumentos) for i in range(quantidade)]
+    logger.info("%d processos iniciados (portas %d-%d)", quantidade, porta_inicial,
+                porta_inicial + quantidade - 1)
+
+    encerrar = []
+    signal.signal(signal.SIGTERM, lambda *_: encerrar.append(True))
+    signal.signal(signal.SIGINT, lambda *_: encerrar.append(True))
+    try:
+        while not encerrar:
+            time.sleep(INTERVALO_VERIFICACAO)
+            for i, processo in enumerate(processos):
+                if processo.poll() is not None and not encerrar:
+                    logger.warning("Processo da porta %d encerrado (código %d); reiniciando",
+                                   porta_inicial + i, processo.returncode)
+                    processos[i] = iniciar_processo(porta_inicial + i, i, argumentos)
+    finally:
+        for processo in processos:
+            processo.terminate()
+        for processo in processos:
+            try:
+                processo.wait(TEMPO_ENCERRAMENTO)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Publica as respostas no arquivo compartilhado (mapeado em memória) e "
+                    "inicia os processos do dashboard anexados a ele. Os demais argumentos são "
+                    "repassados ao 'streamlit run' (ex.: --server.headless true).")
+    parser.add_argument("--pasta", nargs="*", default=None,
+                        help="Pastas com os arquivos de dados (padrão: todas as edições ou "
+                             "./data).")
+    parser.add_argument("--processos", type=int, default=0,
+                        help="Quantidade de processos do dashboard (0: apenas publica).")
+    parser.add_argument("--porta-inicial", type=int, default=PORTA_INICIAL,
+                        help="Porta do primeiro processo (os demais utilizam as seguintes).")
+    parser.add_argument("--forcar", action="store_true",
+                        help="Publica o arquivo compartilhado mesmo que esteja atualizado.")
+    args, argumentos_streamlit = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    pastas = args.pasta
+    if pastas is None:
+        pastas = [obter_pasta_edicao(e) for e in listar_edicoes()] or [PASTA_DADOS]
+    for pasta in pastas:
+        resumo = publicar_dados(pasta, args.forcar)
+        print(f"{resumo['caminho']} ({resumo['tamanho'] / 2**20:.1f} MB): "
+              f"{'publicado' if resumo['publicado'] else 'atualizado'}", flush=True)
+
+    if args.processos > 0:
+        supervisionar(args.processos, args.porta_inicial, argumentos_streamlit)
@@ -0,0 +1,371 @@
+# Imports gerais
+import argparse
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from tabulacao import calcular_tabela_estendida
+
+
+# constantes
+PASTA_CUBO = "cubo"
+ARQUIVO_INDICE = "indice.json"
+VERSAO_CUBO = 2
+TIPO_TABELAS = np.int32
+
+# Cache do processo para o cubo de tabelas
+_cache = {}
+_trava = threading.Lock()
+
+# Dados carregados em cada processo de construção do cubo
+_dados_processo = None
+
+
+def obter_perguntas(catalogo: CatalogoPerguntas) -> list:
+    """
+    Obtém as perguntas (de unica ou multipla escolha) de todas as partes do
+    questionário, em ordem crescente de índice.
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+
+    Retornos:
+    ----------
+    perguntas:list
+        Índices das perguntas.
+    """
+    tipadas = set(catalogo.unicas) | set(catalogo.multiplas)
+    return sorted({p for perguntas in catalogo.partes.values()
+                   for p in perguntas if p in tipadas})
+
+
+def obter_pasta_cubo(pasta: str = PASTA_DADOS) -> str:
+    """
+    Obtém a pasta do cubo de tabelas.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    pasta_cubo:str
+        Pasta do cubo de tabelas.
+    """
+    return os.path.join(pasta, PASTA_CUBO)
+
+
+def _inicializar_processo(pasta: str):
+    """
+    Carrega os dados em um processo de construção do cubo.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    """
+    global _dados_processo
+    _dados_processo = carregar_dados(pasta)
+
+
+def _calcular_pares(idx_pergunta1: int, perguntas2: list) -> list:
+    """
+    Calcula (em um processo de construção) as tabelas de uma pergunta com
+    uma lista de perguntas.
+
+    Parâmetros:
+    -----------
+    idx_pergunta1:int
+        Índice da primeira pergunta.
+    perguntas2:list
+        Índices das segundas perguntas.
+
+    Retornos:
+    ----------
+    tabelas:list
+        Lista de tuplas (índice da segunda pergunta, tabela estendida).
+    """
+    tabelas = []
+    for idx_pergunta2 in perguntas2:
+        tabela = calcular_tabela_estendida(_dados_processo.respostas, _dados_processo.catalogo,
+                                           idx_pergunta1, idx_pergunta2)
+        tabelas.append((idx_pergunta2, tabela.astype(TIPO_TABELAS)))
+    return tabelas
+
+
+def _ler_indice(pasta_cubo: str) -> dict:
+    """
+    Lê o índice do cubo de tabelas.
+
+    Parâmetros:
+    -----------
+    pasta_cubo:str
+        Pasta do cubo de tabelas.
+
+    Retornos:
+    ----------
+    indice:dict
+        Índice do cubo, ou None caso não exista ou seja de outra versão.
+    """
+    caminho = os.path.join(pasta_cubo, ARQUIVO_INDICE)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as input_file:
+        indice = json.load(input_file)
+    if indice.get("versao") != VERSAO_CUBO:
+        return None
+    return indice
+
+
+def _mapear_tabelas(pasta_cubo: str, indice: dict) -> np.ndarray:
+    """
+    Mapeia em memória (somente leitura) o arquivo de tabelas do cubo.
+
+    Parâmetros:
+    -----------
+    pasta_cubo:str
+        Pasta do cubo de tabelas.
+    indice:dict
+        Índice do cubo de tabelas.
+
+    Retornos:
+    ----------
+    tabelas:np.ndarray
+        Vetor (memmap) com todas as tabelas concatenadas.
+    """
+    if indice["tamanho"] == 0:
+        return np.zeros(0, dtype=TIPO_TABELAS)
+    return np.memmap(os.path.join(pasta_cubo, indice["arquivo"]), dtype=TIPO_TABELAS,
+                     mode="r", shape=(indice["tamanho"],))
+
+
+def construir_cubo(pasta: str = PASTA_DADOS, processos: int = None) -> dict:
+    """
+    Calcula e grava em disco as tabelas cruzadas de todos os pares de perguntas.
+
+    As tabelas são gravadas (concatenadas) em um único arquivo binário, que é
+    mapeado em memória pelo dashboard; o índice (JSON) contém a posição e as
+    dimensões de cada tabela (acrescida dos totais de linha e de coluna) e o
+    hash das respostas de cada pergunta. A construção é incremental: apenas
+    os pares com alguma pergunta alterada (ou nova) são recalculados, os
+    demais são copiados do cubo anterior.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    processos:int
+        Quantidade de processos utilizados no cálculo (None: quantidade de CPUs).
+
+    Retornos:
+    ----------
+    resumo:dict
+        Dicionário com a quantidade de pares calculados e reaproveitados.
+    """
+    dados = carregar_dados(pasta)
+    perguntas = obter_perguntas(dados.catalogo)
+    hashes = {p: dados.respostas.hash_pergunta(p) for p in perguntas}
+
+    pasta_cubo = obter_pasta_cubo(pasta)
+    os.makedirs(pasta_cubo, exist_ok=True)
+    anterior = _ler_indice(pasta_cubo)
+    tabelas_anteriores = _mapear_tabelas(pasta_cubo, anterior) if anterior else None
+
+    # Pares que podem ser copiados do cubo anterior (ambas as perguntas inalteradas)
+    inalteradas = set()
+    if anterior:
+        inalteradas = {p for p in perguntas if anterior["perguntas"].get(str(p)) == hashes[p]}
+
+    pendentes = {}
+    for a, i in enumerate(perguntas):
+        for j in perguntas[a + 1:]:
+            if not (i in inalteradas and j in inalteradas and f"{i},{j}" in anterior["pares"]):
+                pendentes.setdefault(i, []).append(j)
+
+    # Cálculo dos pares pendentes (uma tarefa por primeira pergunta)
+    calculadas = {}
+    if processos == 1:
+        _inicializar_processo(pasta)
+        for i, js in pendentes.items():
+            for j, tabela in _calcular_pares(i, js):
+                calculadas[(i, j)] = tabela
+    elif pendentes:
+        with ProcessPoolExecutor(processos, initializer=_inicializar_processo,
+                                 initargs=(pasta,)) as executor:
+            resultados = executor.map(_calcular_pares, pendentes.keys(), pendentes.values())
+            for i, tabelas in zip(pendentes.keys(), resultados):
+                for j, tabela in tabelas:
+                    calculadas[(i, j)] = tabela
+
+    # Gravação do novo arquivo de tabelas
+    arquivo = f"tabelas_{uuid.uuid4().hex}.bin"
+    pares = {}
+    posicao = 0
+    with open(os.path.join(pasta_cubo, arquivo), "wb") as output_file:
+        for a, i in enumerate(perguntas):
+            for j in perguntas[a + 1:]:
+                chave = f"{i},{j}"
+                if (i, j) in calculadas:
+                    tabela = calculadas[(i, j)]
+                else:
+                    inicio, linhas, colunas = anterior["pares"][chave]
+                    tabela = tabelas_anteriores[inicio:inicio + linhas * colunas]
+                    tabela = tabela.reshape(linhas, colunas)
+                output_file.write(np.ascontiguousarray(tabela, dtype=TIPO_TABELAS).tobytes())
+                pares[chave] = [posicao, tabela.shape[0], tabela.shape[1]]
+                posicao += tabela.size
+
+    indice = {
+        "versao": VERSAO_CUBO,
+        "arquivo": arquivo,
+        "tamanho": posicao,
+        "origem": dados.hashes,
+        "perguntas": {str(p): h for p, h in hashes.items()},
+        "pares": pares,
+    }
+
+    # A troca do índice (atômica) publica o novo cubo
+    temporario = os.path.join(pasta_cubo, f"{ARQUIVO_INDICE}.tmp")
+    with open(temporario, "w", encoding="utf-8") as output_file:
+        json.dump(indice, output_file)
+    os.replace(temporario, os.path.join(pasta_cubo, ARQUIVO_INDICE))
+
+    # Remoção dos arquivos de tabelas anteriores
+    del tabelas_anteriores
+    for nome in os.listdir(pasta_cubo):
+        if nome.startswith("tabelas_") and nome != arquivo:
+            os.remove(os.path.join(pasta_cubo, nome))
+
+    return {"calculados": len(calculadas), "reaproveitados": len(pares) - len(calculadas)}
+
+
+class CuboTabelas:
+    """
+    Cubo (pré-calculado) das tabelas cruzadas de todos os pares de perguntas.
+
+    As tabelas são obtidas como visões do arquivo mapeado em memória (sem
+    cópia e sem cálculo). Pares com alguma pergunta alterada desde a
+    construção do cubo não são retornados.
+    """
+
+    def __init__(self, pasta_cubo: str, indice: dict, dados: ConjuntoDados):
+        """
+        Mapeia o cubo de tabelas em memória.
+
+        Parâmetros:
+        -----------
+        pasta_cubo:str
+            Pasta do cubo de tabelas.
+        indice:dict
+            Índice do cubo de tabelas.
+        dados:ConjuntoDados
+            Artefatos de dados do dashboard (usados na verificação de atualização).
+        """
+        self._tabelas = _mapear_tabelas(pasta_cubo, indice)
+
+        # Caso os arquivos de dados tenham sido alterados, apenas os pares com
+        # ambas as perguntas inalteradas são utilizados
+        validas = None
+        if indice["origem"] != dados.hashes:
+            atuais = set(obter_perguntas(dados.catalogo))
+            validas = {int(p) for p, h in indice["perguntas"].items()
+                       if int(p) in atuais and dados.respostas.hash_pergunta(int(p)) == h}
+
+        self._pares = {}
+        for chave, entrada in indice["pares"].items():
+            i, j = map(int, chave.split(","))
+            if validas is None or (i in validas and j in validas):
+                self._pares[(i, j)] = tuple(entrada)
+
+    def __len__(self) -> int:
+        return len(self._pares)
+
+    def tabela(self, idx_pergunta1: int, idx_pergunta2: int, estendida: bool = False) -> np.ndarray:
+        """
+        Obtém a tabela cruzada de um par de perguntas.
+
+        Parâmetros:
+        -----------
+        idx_pergunta1:int
+            Índice da primeira pergunta (linhas da tabela).
+        idx_pergunta2:int
+            Índice da segunda pergunta (colunas da tabela).
+        estendida:bool
+            True para obter a tabela acrescida dos totais de linha e de coluna.
+
+        Retornos:
+        ----------
+        tabela:np.ndarray
+            Visão (somente leitura) da tabela, ou None caso o par não esteja no cubo.
+        """
+        chave = (min(idx_pergunta1, idx_pergunta2), max(idx_pergunta1, idx_pergunta2))
+        if chave not in self._pares:
+            return None
+
+        inicio, linhas, colunas = self._pares[chave]
+        tabela = self._tabelas[inicio:inicio + linhas * colunas].reshape(linhas, colunas)
+        if not estendida:
+            tabela = tabela[:-1, :-1]
+        return tabela if idx_pergunta1 < idx_pergunta2 else tabela.T
+
+
+def obter_cubo(dados: ConjuntoDados, pasta: str = PASTA_DADOS) -> CuboTabelas:
+    """
+    Obtém o cubo de tabelas pré-calculadas.
+
+    O cubo é mapeado uma única vez por processo (enquanto não for alterado).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    cubo:CuboTabelas
+        Cubo de tabelas, ou None caso não exista (e as tabelas devem ser
+        calculadas a partir das respostas).
+    """
+    pasta_cubo = obter_pasta_cubo(pasta)
+    caminho = os.path.join(pasta_cubo, ARQUIVO_INDICE)
+    if not os.path.exists(caminho):
+        return None
+
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size, dados.assinatura)
+    if _cache.get(pasta, (None, None))[0] == chave:
+        return _cache[pasta][1]
+
+    with _trava:
+        if _cache.get(pasta, (None, None))[0] != chave:
+            indice = _ler_indice(pasta_cubo)
+            _cache[pasta] = (chave, CuboTabelas(pasta_cubo, indice, dados) if indice else None)
+    return _cache[pasta][1]
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Pré-calcula as tabelas cruzadas de todos os pares de perguntas.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados.")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Quantidade de processos (padrão: quantidade de CPUs).")
+    args = parser.parse_args()
+
+    resumo = construir_cubo(args.pasta, args.processos)
+    print(f"Cubo gravado em {obter_pasta_cubo(args.pasta)}: {resumo['calculados']} pares "
+          f"calculados e {resumo['reaproveitados']} reaproveitados")
@@ -0,0 +1,358 @@
+# Imports gerais
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass, replace
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Imports específicos
+from catalogo import ARQUIVO_CATALOGO, CatalogoPerguntas
+from compacto import RespostasCompactas, RespostasParticionadas
+from particoes import ARQUIVO_PARTICOES, ler_indice_particoes
+from cache import CacheLRU
+
+
+# constantes
+PASTA_DADOS = "./data"
+ARQUIVO_PRINCIPAL = "df.parquet"
+ARQUIVOS_AUXILIARES = (
+    "tipo_pergunta",
+    "resposta_multipla",
+    "categoria_pergunta",
+    "textos_alternativo",
+    "idx_perguntas",
+)
+# Representação compacta publicada para os processos do dashboard (ver compartilhado.py)
+ARQUIVO_COMPARTILHADO = "respostas.arrow"
+# Quantidade de conjuntos de dados (ex.: edições) mantidos em cada processo
+CAPACIDADE_CONJUNTOS = 2
+TAMANHO_BLOCO_HASH = 2**20
+
+logger = logging.getLogger("dados")
+
+# Cache do processo (compartilhado entre todas as sessões do Streamlit), por pasta
+_conjuntos = CacheLRU(CAPACIDADE_CONJUNTOS)
+_trava = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ConjuntoDados:
+    """
+    Artefatos de dados do dashboard, carregados uma única vez por processo.
+
+    Os objetos são compartilhados (somente leitura) entre todas as sessões,
+    portanto não devem ser modificados pelas funções de análise.
+
+    Atributos:
+    ----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo (indexado) das perguntas do questionário.
+    assinatura:tuple
+        Assinatura (nome, mtime, tamanho) dos arquivos carregados.
+    hashes:dict
+        Hash sha256 do conteúdo de cada arquivo carregado.
+    tempo_carga:float
+        Tempo (em segundos) gasto na carga dos arquivos.
+    memoria:int
+        Memória (em bytes) ocupada pelos dados carregados (nas edições
+        particionadas, apenas o catálogo; ver RespostasParticionadas).
+    memoria_original:int
+        Memória (em bytes) que seria ocupada pelo dataframe original.
+    compartilhado:bool
+        Indica se as respostas foram anexadas ao arquivo compartilhado (mapeado
+        em memória) em vez de carregadas no processo.
+    """
+    respostas: RespostasCompactas
+    catalogo: CatalogoPerguntas
+    assinatura: tuple
+    hashes: dict
+    tempo_carga: float
+    memoria: int
+    memoria_original: int
+    compartilhado: bool = False
+
+
+def obter_caminhos(pasta: str = PASTA_DADOS) -> dict:
+    """
+    Obtém os caminhos dos arquivos de dados do dashboard.
+
+    Caso o catálogo de perguntas (JSON) exista, ele é utilizado no lugar dos
+    arquivos .pickle gerados pelo notebook de preparação dos dados. Em uma
+    edição particionada (ver particoes.py), os arquivos de dados são o índice
+    das partições e um arquivo Parquet por parte do questionário.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    caminhos:dict
+        Dicionário com o nome do artefato e o caminho do arquivo.
+    """
+    if os.path.exists(os.path.join(pasta, ARQUIVO_PARTICOES)):
+        caminhos = {"particoes": os.path.join(pasta, ARQUIVO_PARTICOES),
+                    "catalogo": os.path.join(pasta, ARQUIVO_CATALOGO)}
+        for parte in ler_indice_particoes(pasta):
+            caminhos[f"parte_{parte}"] = os.path.join(pasta, f"{parte}.parquet")
+        return caminhos
+
+    caminhos = {"df": os.path.join(pasta, ARQUIVO_PRINCIPAL)}
+    if os.path.exists(os.path.join(pasta, ARQUIVO_CATALOGO)):
+        caminhos["catalogo"] = os.path.join(pasta, ARQUIVO_CATALOGO)
+        return caminhos
+    for nome in ARQUIVOS_AUXILIARES:
+        caminhos[nome] = os.path.join(pasta, f"{nome}.pickle")
+    return caminhos
+
+
+def obter_assinatura(caminhos: dict) -> tuple:
+    """
+    Obtém a assinatura (mtime e tamanho) de um conjunto de arquivos.
+
+    Parâmetros:
+    -----------
+    caminhos:dict
+        Dicionário com o nome do artefato e o caminho do arquivo.
+
+    Retornos:
+    ----------
+    assinatura:tuple
+        Tupla com (nome, mtime, tamanho) de cada arquivo.
+    """
+    assinatura = []
+    for nome, caminho in sorted(caminhos.items()):
+        info = os.stat(caminho)
+        assinatura.append((nome, info.st_mtime_ns, info.st_size))
+    return tuple(assinatura)
+
+
+def _ler_arquivo(caminho: str) -> tuple:
+    """
+    Lê o conteúdo de um arquivo e calcula o seu hash.
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do arquivo.
+
+    Retornos:
+    ----------
+    conteudo:bytes
+        Conteúdo do arquivo.
+    hash:str
+        Hash sha256 do conteúdo.
+    """
+    with open(caminho, "rb") as input_file:
+        conteudo = input_file.read()
+    return conteudo, hashlib.sha256(conteudo).hexdigest()
+
+
+def _calcular_hash(caminho: str) -> str:
+    """
+    Calcula o hash de um arquivo, lido em blocos (sem manter o conteúdo em memória).
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do arquivo.
+
+    Retornos:
+    ----------
+    hash:str
+        Hash sha256 do conteúdo.
+    """
+    h = hashlib.sha256()
+    with open(caminho, "rb") as input_file:
+        for bloco in iter(lambda: input_file.read(TAMANHO_BLOCO_HASH), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _carregar_catalogo(caminhos: dict) -> tuple:
+    """
+    Carrega o catálogo das perguntas (JSON ou, na sua ausência, os arquivos
+    .pickle gerados pelo notebook de preparação dos dados).
+
+    Parâmetros:
+    -----------
+    caminhos:dict
+        Dicionário com o nome do artefato e o caminho do arquivo.
+
+    Retornos:
+    ----------
+    catalogo:CatalogoPerguntas
+        Catálogo (indexado) das perguntas do questionário.
+    hashes:dict
+        Hash sha256 do conteúdo de cada arquivo carregado.
+    memoria:int
+        Memória (em bytes) ocupada pelos arquivos carregados.
+    """
+    hashes = {}
+    memoria = 0
+    if "catalogo" in caminhos:
+        conteudo, hashes["catalogo"] = _ler_arquivo(caminhos["catalogo"])
+        return CatalogoPerguntas.de_dict(json.loads(conteudo)), hashes, len(conteudo)
+
+    artefatos = {}
+    for nome in ARQUIVOS_AUXILIARES:
+        conteudo, hashes[nome] = _ler_arquivo(caminhos[nome])
+        artefatos[nome] = pickle.loads(conteudo)
+        # Aproximação: o tamanho serializado do objeto
+        memoria += len(conteudo)
+    catalogo = CatalogoPerguntas(artefatos["textos_alternativo"],
+                                 artefatos["tipo_pergunta"],
+                                 artefatos["resposta_multipla"],
+                                 artefatos["categoria_pergunta"])
+    return catalogo, hashes, memoria
+
+
+def _anexar(caminhos: dict, assinatura: tuple, compartilhado: str) -> ConjuntoDados:
+    """
+    Anexa as respostas publicadas no arquivo compartilhado (ver
+    compartilhado.py), caso ele tenha sido gerado a partir dos arquivos de
+    dados atuais. Apenas o catálogo de perguntas é carregado no processo.
+
+    Parâmetros:
+    -----------
+    caminhos:dict
+        Dicionário com o nome do artefato e o caminho do arquivo.
+    assinatura:tuple
+        Assinatura dos arquivos no momento da carga.
+    compartilhado:str
+        Caminho do arquivo compartilhado.
+
+    Retornos:
+    ----------
+    dados:ConjuntoDados
+        Artefatos de dados (None, caso o arquivo não exista ou esteja desatualizado).
+    """
+    if not os.path.exists(compartilhado):
+        return None
+    inicio = time.perf_counter()
+    respostas, metadados = RespostasCompactas.anexar(compartilhado)
+
+    # Se o mtime mudou mas o conteúdo é o mesmo, o arquivo compartilhado é válido
+    hashes = metadados.get("hashes")
+    if [list(a) for a in assinatura] != metadados.get("assinatura"):
+        if hashes != {nome: _calcular_hash(caminho) for nome, caminho in caminhos.items()}:
+            logger.warning("O arquivo %s está desatualizado (os dados serão carregados no "
+                           "processo).", compartilhado)
+            return None
+
+    catalogo, _, _ = _carregar_catalogo(caminhos)
+    return ConjuntoDados(respostas=respostas, catalogo=catalogo, assinatura=assinatura,
+                         hashes=hashes, tempo_carga=time.perf_counter() - inicio,
+                         memoria=metadados["memoria"],
+                         memoria_original=metadados["memoria_original"],
+                         compartilhado=True)
+
+
+def _carregar(caminhos: dict, assinatura: tuple) -> ConjuntoDados:
+    """
+    Realiza a carga (efetiva) dos arquivos de dados.
+
+    O arquivo de dados principal é convertido para a representação compacta.
+    Nas edições particionadas, apenas o catálogo e o índice das partições são
+    lidos: as colunas de cada pergunta são lidas das partições (leitura
+    projetada) na sua primeira utilização (ver RespostasParticionadas).
+
+    Parâmetros:
+    -----------
+    caminhos:dict
+        Dicionário com o nome do artefato e o caminho do arquivo.
+    assinatura:tuple
+        Assinatura dos arquivos no momento da carga.
+
+    Retornos:
+    ----------
+    dados:ConjuntoDados
+        Artefatos de dados carregados.
+    """
+    inicio = time.perf_counter()
+
+    # 1. Catálogo das perguntas (JSON ou, na sua ausência, os arquivos .pickle)
+    catalogo, hashes, memoria = _carregar_catalogo(caminhos)
+
+    # 2. Arquivo de dados principal ou partições (convertido para a representação compacta)
+    for nome, caminho in caminhos.items():
+        if nome not in hashes:
+            hashes[nome] = _calcular_hash(caminho)
+    if "df" in caminhos:
+        df = pd.read_parquet(caminhos["df"])
+        memoria_original = memoria + int(df.memory_usage(index=True, deep=True).sum())
+        respostas = RespostasCompactas(df, catalogo)
+        del df
+    else:
+        partes = ler_indice_particoes(os.path.dirname(caminhos["particoes"]))
+        metadados = [pq.read_metadata(caminho) for nome, caminho in caminhos.items()
+                     if nome.startswith("parte_")]
+        # Aproximação: o tamanho (sem compressão) das partições
+        memoria_original = memoria + sum(m.row_group(i).total_byte_size
+                                         for m in metadados for i in range(m.num_row_groups))
+        respostas = RespostasParticionadas(os.path.dirname(caminhos["particoes"]), catalogo,
+                                           partes, metadados[0].num_rows if metadados else 0)
+    memoria += respostas.memoria()
+
+    return ConjuntoDados(respostas=respostas, catalogo=catalogo, assinatura=assinatura,
+                         hashes=hashes, tempo_carga=time.perf_counter() - inicio,
+                         memoria=memoria, memoria_original=memoria_original)
+
+
+def carregar_dados(pasta: str = PASTA_DADOS) -> ConjuntoDados:
+    """
+    Obtém os artefatos de dados do dashboard.
+
+    A carga é realizada uma única vez por processo (são mantidos os últimos
+    CAPACIDADE_CONJUNTOS conjuntos utilizados, ex.: ao alternar entre as
+    edições). Nas chamadas seguintes
+    apenas o mtime/tamanho dos arquivos é verificado; caso algum arquivo
+    tenha sido alterado (e o seu hash seja diferente) os dados são recarregados.
+    Caso as respostas tenham sido publicadas no arquivo compartilhado (e ele
+    esteja atualizado), o processo é anexado a ele, sem carregar os dados.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    dados:ConjuntoDados
+        Artefatos de dados carregados.
+    """
+    caminhos = obter_caminhos(pasta)
+    assinatura = obter_assinatura(caminhos)
+
+    dados = _conjuntos.obter(pasta)
+    if dados is not None and dados.assinatura == assinatura:
+        return dados
+
+    with _trava:
+        # Outra sessão pode ter realizado a carga enquanto aguardávamos
+        dados = _conjuntos.obter(pasta)
+        if dados is not None and dados.assinatura == assinatura:
+            return dados
+
+        # Se o mtime mudou mas o conteúdo é o mesmo, não há necessidade de recarga
+        if dados is not None:
+            hashes = {nome: _calcular_hash(caminho) for nome, caminho in caminhos.items()}
+            if hashes == dados.hashes:
+                dados = replace(dados, assinatura=assinatura)
+                _conjuntos.armazenar(pasta, dados)
+                return dados
+
+        dados = _anexar(caminhos, assinatura, os.path.join(pasta, ARQUIVO_COMPARTILHADO))
+        if dados is None:
+            dados = _carregar(caminhos, assinatura)
+        _conjuntos.armazenar(pasta, dados)
+    return dados
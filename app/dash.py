@@ -1,54 +1,231 @@
 # Imports gerais
+import os
 import streamlit as st
 import pandas as pd
-import pickle
 
 # Imports específicos (pacotes próprios)
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from compacto import RespostasParticionadas
+from edicoes import listar_edicoes, obter_pasta_edicao
+from segmentos import Segmento, obter_segmento
+from ponderacao import aplicar_ponderacao, ler_margens, obter_ponderacao
+from agregados import obter_agregados_univariados
+from cubo import obter_cubo
+from figuras import estatisticas_figuras
+from instrumentacao import (finalizar_execucao, iniciar_execucao, iniciar_servidor_metricas,
+                            medir, obter_metricas, obter_prontidao, registrar_prontidao)
 from univariada import apresentar_analise_univariada
 from multivariada import apresentar_analise_multivariada
+from exploracao import apresentar_analise_associacoes
+
+
+def selecionar_segmento(dados: ConjuntoDados, edicao: str = None) -> Segmento:
+    """
+    Apresenta os filtros de respondentes (perguntas de unica escolha) na
+    barra lateral e obtém o segmento selecionado.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    edicao:str
+        Nome da edição selecionada (os filtros são mantidos por edição).
+
+    Retornos:
+    ----------
+    segmento:Segmento
+        Segmento de respondentes, ou None caso nenhum filtro seja aplicado.
+    """
+    catalogo = dados.catalogo
+    unicas = set(catalogo.unicas)
+    perguntas = list(dict.fromkeys(p for ps in catalogo.partes.values() for p in ps if p in unicas))
+
+    # Os índices das perguntas são próprios de cada edição
+    sufixo = f"_{edicao}" if edicao is not None else ""
+
+    filtros = {}
+    with st.sidebar.expander("Filtros (segmento de respondentes)"):
+        selecionadas = st.multiselect("Filtrar pelas perguntas:", perguntas,
+                                      format_func=catalogo.texto,
+                                      key=f"filtros_perguntas{sufixo}")
+        for p in selecionadas:
+            _, categorias = dados.respostas.codigos(p)
+            filtros[p] = st.multiselect(catalogo.texto(p), list(categorias),
+                                        key=f"filtro_{p}{sufixo}")
+
+    segmento = obter_segmento(dados, filtros)
+    if segmento is not None:
+        st.sidebar.caption(f"Segmento: {segmento.n_respondentes} de "
+                           f"{dados.respostas.n_respondentes} respondentes")
+    return segmento
+
+
+def selecionar_ponderacao(
+        dados: ConjuntoDados,
+        pasta: str,
+        segmento: Segmento,
+        edicao: str = None) -> Segmento:
+    """
+    Apresenta a seleção do conjunto de margens da ponderação (caso a pasta
+    de dados possua o arquivo de margens) e aplica os pesos ao segmento.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados (e as margens).
+    segmento:Segmento
+        Segmento de respondentes (ou None).
+    edicao:str
+        Nome da edição selecionada (a seleção é mantida por edição).
+
+    Retornos:
+    ----------
+    segmento:Segmento
+        Segmento ponderado (ou o próprio segmento, sem ponderação).
+    """
+    try:
+        conjuntos = ler_margens(pasta)
+    except (KeyError, ValueError) as erro:
+        # Inclui o JSON inválido (json.JSONDecodeError) e a versão não suportada
+        st.sidebar.error(f"Arquivo de margens inválido: {erro}")
+        return segmento
+    if not conjuntos:
+        return segmento
+
+    sufixo = f"_{edicao}" if edicao is not None else ""
+    nome = st.sidebar.selectbox("Ponderação:", ["Nenhuma"] + list(conjuntos),
+                                key=f"ponderacao{sufixo}")
+    if nome == "Nenhuma":
+        return segmento
+
+    try:
+        ponderacao = obter_ponderacao(dados, conjuntos[nome])
+    except (KeyError, ValueError) as erro:
+        st.sidebar.error(f"Margens inválidas ({nome}): {erro}")
+        return segmento
+    st.sidebar.caption(f"Raking: {ponderacao.iteracoes} iterações, erro máximo "
+                       f"{ponderacao.erro:.1e}"
+                       + ("" if ponderacao.convergiu else " (não convergiu)")
+                       + f"; tamanho efetivo: {ponderacao.tamanho_efetivo:.0f} de "
+                       f"{ponderacao.n_respondentes} respondentes")
+    return aplicar_ponderacao(segmento, ponderacao, dados)
+
+
+def apresentar_instrumentacao(execucao: dict):
+    """
+    Apresenta o painel de depuração com as etapas da execução (rerun) e as
+    métricas acumuladas do processo.
+
+    Parâmetros:
+    -----------
+    execucao:dict
+        Execução registrada (ver instrumentacao.finalizar_execucao).
+    """
+    with st.expander("Instrumentação (depuração)", expanded=True):
+        st.write(f"Duração da execução: {execucao['duracao_s'] * 1000:.1f} ms | "
+                 f"Memória residente: {execucao['memoria_rss_bytes'] / 2**20:.1f} MB "
+                 f"({execucao['memoria_delta_bytes'] / 2**20:+.1f} MB)")
+        prontidao = obter_prontidao()
+        if prontidao:
+            etapas = ", ".join(f"{nome}: {segundos:.2f} s"
+                               for nome, segundos in prontidao["etapas"].items())
+            st.write(f"Inicialização do processo (cold start): "
+                     f"{prontidao['inicializacao_s']:.2f} s" + (f" ({etapas})" if etapas else ""))
+
+        if execucao["spans"]:
+            spans = pd.DataFrame(execucao["spans"])
+            st.table(pd.DataFrame({
+                "Etapa": [". " * nivel + etapa
+                          for nivel, etapa in zip(spans["nivel"], spans["etapa"])],
+                "Início (ms)": (spans["inicio_s"] * 1000).round(1),
+                "Duração (ms)": (spans["duracao_s"] * 1000).round(1),
+                "Memória (MB)": (spans["memoria_delta_bytes"] / 2**20).round(2),
+            }))
+
+        st.write("**Métricas acumuladas do processo:**")
+        metricas = pd.DataFrame.from_dict(obter_metricas(), orient="index")
+        if not metricas.empty:
+            st.table(pd.DataFrame({
+                "Chamadas": metricas["chamadas"],
+                "Tempo médio (ms)": (metricas["segundos_total"] * 1000
+                                     / metricas["chamadas"]).round(1),
+                "Tempo máximo (ms)": (metricas["segundos_max"] * 1000).round(1),
+                "Memória total (MB)": (metricas["memoria_bytes_total"] / 2**20).round(2),
+            }))
 
 
 # Função principal
 def main():
 
-    # Título do dashboard
-    st.title("Dashboard - State of Data Brazil 2021")
-
-    # Carga dos arquivos de dados
-    # 1. Arquivo de dados principal
-    df = pd.read_parquet('./data/df.parquet')
+    # Registro das etapas desta execução (rerun) do script
+    iniciar_execucao()
 
-    # 2. Dicionário com o tipo de pergunta
-    with open("./data/tipo_pergunta.pickle", "rb") as input_file:
-        tipo_pergunta = pickle.load(input_file)
+    # Endpoint de métricas (formato Prometheus), caso a porta seja configurada
+    if os.environ.get("PORTA_METRICAS"):
+        iniciar_servidor_metricas(int(os.environ["PORTA_METRICAS"]))
 
-    # 3. Dicionário para perguntas de multipla escolha
-    with open("./data/resposta_multipla.pickle", "rb") as input_file:
-        resposta_multipla = pickle.load(input_file)
+    # Seleção da edição (caso existam edições particionadas em ./data/edicoes)
+    edicoes = listar_edicoes()
+    edicao = None
+    pasta = PASTA_DADOS
+    if edicoes:
+        edicao = st.sidebar.selectbox("Selecione a edição:", edicoes[::-1], key="edicao")
+        pasta = obter_pasta_edicao(edicao)
 
-    # 4. Dicionário para a categoria da pergunta
-    with open("./data/categoria_pergunta.pickle", "rb") as input_file:
-        categoria_pergunta = pickle.load(input_file)
+    # Título do dashboard
+    st.title(f"Dashboard - State of Data Brazil {edicao or 2021}")
 
-    # 5. Dicionario para os testes alternativos para perguntas e respostas
-    with open("./data/textos_alternativo.pickle", "rb") as input_file:
-       textos_alternativo = pickle.load(input_file)
+    # Carga dos arquivos de dados (realizada uma única vez por processo e edição)
+    with medir("carga"):
+        dados = carregar_dados(pasta)
 
-    # 6. Dicionario para o índice das perguntas
-    with open("./data/idx_perguntas.pickle", "rb") as input_file:
-       idx_perguntas = pickle.load(input_file)
+    # Informações sobre a carga dos dados
+    with st.sidebar.expander("Informações da carga dos dados"):
+        st.write(f"Tempo de carga: {dados.tempo_carga:.2f} s")
+        st.write(f"Memória ocupada: {dados.memoria / 2**20:.1f} MB "
+                 f"(original: {dados.memoria_original / 2**20:.1f} MB)"
+                 + (", compartilhada entre os processos" if dados.compartilhado else ""))
+        if isinstance(dados.respostas, RespostasParticionadas):
+            st.write(f"Perguntas carregadas (sob demanda): {dados.respostas.carregadas()} de "
+                     f"{len(dados.catalogo.unicas) + len(dados.catalogo.multiplas)} "
+                     f"({dados.respostas.memoria() / 2**20:.1f} MB)")
+        cache = estatisticas_figuras()
+        st.write(f"Cache de figuras: {cache['itens']} itens, {cache['acertos']} acertos "
+                 f"e {cache['faltas']} faltas")
+        exibir_instrumentacao = st.checkbox("Exibir instrumentação", key="instrumentacao")
 
     # Seleção para o tipo de análise desejada (univariada ou multivariada)
     opcao_tipo_analise = st.sidebar.selectbox("Selecione o tipo de análise:", ["", 
-        "Univariada", "Multivariada"])
+        "Univariada", "Multivariada", "Associações"], key="tipo_analise")
     
-    # Direciona para a análise univariada ou multivariada (conforme o caso)
+    # Filtros de respondentes (aplicados a ambas as análises)
+    with medir("segmento"):
+        segmento = selecionar_segmento(dados, edicao)
+        segmento = selecionar_ponderacao(dados, pasta, segmento, edicao)
+
+    # Direciona para a análise univariada, multivariada ou de associações (conforme o caso)
     if opcao_tipo_analise == "Univariada":
-        apresentar_analise_univariada(df, tipo_pergunta, resposta_multipla,
-                    categoria_pergunta, textos_alternativo)
+        with medir("carga.agregados"):
+            agregados = obter_agregados_univariados(dados, pasta)
+        apresentar_analise_univariada(dados.respostas, dados.catalogo, agregados, segmento,
+                                      edicao)
     elif opcao_tipo_analise == "Multivariada":
-        apresentar_analise_multivariada(df, tipo_pergunta, resposta_multipla,
-                    categoria_pergunta, textos_alternativo)
+        with medir("carga.cubo"):
+            cubo = obter_cubo(dados, pasta)
+        apresentar_analise_multivariada(dados.respostas, dados.catalogo, cubo, segmento)
+    elif opcao_tipo_analise == "Associações":
+        apresentar_analise_associacoes(dados, pasta)
+
+    # Finaliza o registro da execução (log JSON) e apresenta o painel de depuração
+    execucao = finalizar_execucao()
+
+    # Sem o aquecimento (iniciar.py), o processo fica pronto ao final da primeira execução
+    if obter_prontidao() is None:
+        registrar_prontidao({"primeira_execucao": execucao["duracao_s"]})
+    if exibir_instrumentacao:
+        apresentar_instrumentacao(execucao)
 
 ######################################################################################
 if __name__ == '__main__':
@@ -0,0 +1,320 @@
+# Imports gerais
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+
+# Imports específicos
+from catalogo import ARQUIVO_CATALOGO, CatalogoPerguntas, ler_catalogo
+from compacto import RespostasCompactas
+from dados import PASTA_DADOS, obter_assinatura, obter_caminhos
+from particoes import ARQUIVO_PARTICOES, ler_colunas, ler_indice_particoes
+from agregacao import contar_resposta_unica, contar_respostas_multiplas, formatar_contagem
+from cache import CacheLRU
+
+
+# constantes
+PASTA_EDICOES = os.path.join(PASTA_DADOS, "edicoes")
+ARQUIVO_MAPEAMENTO = "mapeamento.json"
+VERSAO_MAPEAMENTO = 1
+CAPACIDADE_CONTAGENS = 4096
+
+logger = logging.getLogger("edicoes")
+
+# Cache do processo: catálogo/partições de cada edição, mapeamento e contagens
+_cache = {}
+_trava = threading.Lock()
+_contagens = CacheLRU(CAPACIDADE_CONTAGENS)
+
+
+def listar_edicoes(pasta_edicoes: str = PASTA_EDICOES) -> list:
+    """
+    Obtém as edições (particionadas) disponíveis.
+
+    Parâmetros:
+    -----------
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    edicoes:list
+        Nomes das edições, em ordem crescente (ex.: ['2019', '2021', '2022']).
+    """
+    if not os.path.isdir(pasta_edicoes):
+        return []
+    return sorted(nome for nome in os.listdir(pasta_edicoes)
+                  if os.path.exists(os.path.join(pasta_edicoes, nome, ARQUIVO_PARTICOES)))
+
+
+def obter_pasta_edicao(edicao: str, pasta_edicoes: str = PASTA_EDICOES) -> str:
+    """
+    Obtém a pasta de uma edição.
+
+    Parâmetros:
+    -----------
+    edicao:str
+        Nome da edição.
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    pasta:str
+        Pasta da edição.
+    """
+    return os.path.join(pasta_edicoes, edicao)
+
+
+def _obter_edicao(pasta: str) -> tuple:
+    """
+    Obtém o catálogo e o índice das partições de uma edição (sem carregar
+    as respostas), lidos uma única vez por processo.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta da edição.
+
+    Retornos:
+    ----------
+    assinatura:tuple
+        Assinatura dos arquivos da edição.
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas da edição.
+    partes:dict
+        Índice das partições da edição.
+    """
+    assinatura = obter_assinatura(obter_caminhos(pasta))
+    entrada = _cache.get(pasta)
+    if entrada is None or entrada[0] != assinatura:
+        with _trava:
+            entrada = _cache.get(pasta)
+            if entrada is None or entrada[0] != assinatura:
+                entrada = (assinatura, ler_catalogo(os.path.join(pasta, ARQUIVO_CATALOGO)),
+                           ler_indice_particoes(pasta))
+                _cache[pasta] = entrada
+    return entrada
+
+
+def ler_mapeamento(pasta_edicoes: str = PASTA_EDICOES) -> list:
+    """
+    Lê o mapeamento das perguntas entre as edições.
+
+    O arquivo (mapeamento.json) contém uma lista de grupos de perguntas
+    correspondentes; cada grupo associa o nome da edição ao índice (no
+    catálogo da edição) ou ao texto da pergunta:
+
+    {"versao": 1, "perguntas": [{"2019": "Idade", "2021": 12, "2022": 12}]}
+
+    Parâmetros:
+    -----------
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    grupos:list
+        Grupos de perguntas correspondentes (vazia, caso o arquivo não exista).
+    """
+    caminho = os.path.join(pasta_edicoes, ARQUIVO_MAPEAMENTO)
+    if not os.path.exists(caminho):
+        return []
+
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size)
+    entrada = _cache.get(caminho)
+    if entrada is None or entrada[0] != chave:
+        with open(caminho, encoding="utf-8") as input_file:
+            mapeamento = json.load(input_file)
+        if mapeamento.get("versao") != VERSAO_MAPEAMENTO:
+            raise ValueError(f"Versão do mapeamento não suportada: {mapeamento.get('versao')}")
+        entrada = (chave, mapeamento["perguntas"])
+        _cache[caminho] = entrada
+    return entrada[1]
+
+
+def _resolver_pergunta(catalogo: CatalogoPerguntas, valor) -> int:
+    """
+    Obtém o índice de uma pergunta (de unica ou multipla escolha) a partir
+    do seu índice ou texto.
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas da edição.
+    valor:int|str
+        Índice ou texto da pergunta.
+
+    Retornos:
+    ----------
+    idx:int
+        Índice da pergunta, ou None caso não exista na edição.
+    """
+    if isinstance(valor, str):
+        try:
+            valor = catalogo.indice(valor)
+        except KeyError:
+            return None
+    if valor in catalogo.unicas or valor in catalogo.multiplas:
+        return valor
+    return None
+
+
+def obter_correspondencias(
+        edicao: str,
+        idx_pergunta: int,
+        pasta_edicoes: str = PASTA_EDICOES) -> dict:
+    """
+    Obtém a pergunta correspondente em cada edição.
+
+    São utilizados os grupos do mapeamento; caso a pergunta não esteja
+    mapeada (ou o mapeamento seja inválido), são consideradas
+    correspondentes as perguntas de mesmo texto e de mesmo tipo.
+
+    Parâmetros:
+    -----------
+    edicao:str
+        Nome da edição da pergunta.
+    idx_pergunta:int
+        Índice da pergunta (no catálogo da edição).
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    correspondencias:dict
+        Dicionário com o nome da edição e o índice da pergunta correspondente
+        (apenas as edições em que a pergunta existe, incluindo a própria edição).
+    """
+    catalogos = {e: _obter_edicao(obter_pasta_edicao(e, pasta_edicoes))[1]
+                 for e in listar_edicoes(pasta_edicoes)}
+
+    try:
+        grupos = ler_mapeamento(pasta_edicoes)
+    except (KeyError, ValueError) as erro:
+        # Inclui o JSON inválido (json.JSONDecodeError) e a versão não suportada
+        logger.warning("Mapeamento das edições ignorado: %s", erro)
+        grupos = []
+
+    for grupo in grupos:
+        resolvido = {e: _resolver_pergunta(catalogos[e], valor)
+                     for e, valor in grupo.items() if e in catalogos}
+        if resolvido.get(edicao) == idx_pergunta:
+            return {e: p for e, p in resolvido.items() if p is not None}
+
+    texto = catalogos[edicao].texto(idx_pergunta)
+    tipo = catalogos[edicao].tipo(idx_pergunta)
+    correspondencias = {}
+    for e, catalogo in catalogos.items():
+        p = _resolver_pergunta(catalogo, texto)
+        if p is not None and catalogo.tipo(p) == tipo:
+            correspondencias[e] = p
+    return correspondencias
+
+
+def obter_assinatura_edicoes(pasta_edicoes: str = PASTA_EDICOES) -> tuple:
+    """
+    Obtém a assinatura (mtime e tamanho) dos arquivos de todas as edições e
+    do mapeamento (utilizada na indexação dos caches).
+
+    Parâmetros:
+    -----------
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    assinatura:tuple
+        Tupla com o nome e a assinatura de cada edição e do mapeamento.
+    """
+    assinatura = [(e, _obter_edicao(obter_pasta_edicao(e, pasta_edicoes))[0])
+                  for e in listar_edicoes(pasta_edicoes)]
+    caminho = os.path.join(pasta_edicoes, ARQUIVO_MAPEAMENTO)
+    if os.path.exists(caminho):
+        assinatura.append(obter_assinatura({"mapeamento": caminho}))
+    return tuple(assinatura)
+
+
+def contar_pergunta(pasta: str, idx_pergunta: int) -> tuple:
+    """
+    Realiza a contagem das respostas de uma pergunta de uma edição, lendo
+    apenas as colunas da pergunta (leitura projetada da partição).
+
+    As contagens são armazenadas em cache (indexadas pela assinatura dos
+    arquivos da edição).
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta da edição.
+    idx_pergunta:int
+        Índice da pergunta (no catálogo da edição).
+
+    Retornos:
+    ----------
+    contagem:pd.Series
+        Quantidade de respostas de cada alternativa.
+    denominador:int
+        Base para o cálculo do percentual.
+    """
+    assinatura, catalogo, partes = _obter_edicao(pasta)
+    chave = (pasta, assinatura, idx_pergunta)
+    resultado = _contagens.obter(chave)
+    if resultado is not None:
+        return resultado
+
+    # Catálogo reduzido, com os índices das colunas lidas
+    if catalogo.eh_multipla(idx_pergunta):
+        alternativas = list(catalogo.alternativas(idx_pergunta))
+        k = len(alternativas)
+        df = ler_colunas(pasta, alternativas, partes)
+        reduzido = CatalogoPerguntas(
+            [catalogo.texto(c) for c in alternativas] + [catalogo.texto(idx_pergunta)],
+            {"unica": [], "multipla": [k]}, {k: list(range(k))}, {})
+        resultado = contar_respostas_multiplas(RespostasCompactas(df, reduzido), reduzido, k)
+    else:
+        df = ler_colunas(pasta, [idx_pergunta], partes)
+        reduzido = CatalogoPerguntas([catalogo.texto(idx_pergunta)],
+                                     {"unica": [0], "multipla": []}, {}, {})
+        resultado = contar_resposta_unica(RespostasCompactas(df, reduzido), 0)
+
+    _contagens.armazenar(chave, resultado)
+    return resultado
+
+
+def obter_comparacao(
+        edicao: str,
+        idx_pergunta: int,
+        qtde_perc: str,
+        pasta_edicoes: str = PASTA_EDICOES) -> pd.DataFrame:
+    """
+    Obtém as respostas de uma pergunta em todas as edições em que ela existe.
+
+    Parâmetros:
+    -----------
+    edicao:str
+        Nome da edição da pergunta.
+    idx_pergunta:int
+        Índice da pergunta (no catálogo da edição).
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe (formato longo) com as alternativas, a edição e a
+        quantidade/percentual de respostas.
+    """
+    texto = _obter_edicao(obter_pasta_edicao(edicao, pasta_edicoes))[1].texto(idx_pergunta)
+    frames = []
+    for e, p in obter_correspondencias(edicao, idx_pergunta, pasta_edicoes).items():
+        contagem, denominador = contar_pergunta(obter_pasta_edicao(e, pasta_edicoes), p)
+        sub = formatar_contagem(contagem, denominador, texto, qtde_perc)
+        sub.insert(1, "Edição", e)
+        frames.append(sub)
+    return pd.concat(frames, ignore_index=True)
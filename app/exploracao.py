@@ -0,0 +1,186 @@
+# Imports gerais
+import streamlit as st
+import pandas as pd
+# st_aggrid é importado nas funções que apresentam as tabelas (inicialização mais rápida)
+
+# Imports específicos
+from reuse import dict_partes_questionario
+from catalogo import CatalogoPerguntas
+from dados import PASTA_DADOS, ConjuntoDados
+from associacao import SUPORTE_MINIMO_LIFT, obter_associacoes
+from figuras import obter_grafico_associacoes
+from instrumentacao import instrumentar, medir
+
+
+# constantes
+METRICAS_ASSOCIACAO = {
+    "V de Cramér": "v_cramer",
+    "Lift máximo": "lift",
+    "Qui-quadrado": "qui_quadrado",
+}
+QTDE_PARES_PADRAO = 50
+
+
+def obter_rotulo_parte(catalogo: CatalogoPerguntas, idx_pergunta: int) -> str:
+    """
+    Obtém o rótulo (apresentado na análise multivariada) da parte do
+    questionário de uma pergunta.
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta.
+
+    Retornos:
+    ----------
+    rotulo:str
+        Rótulo da parte, ou None caso a pergunta não pertença a nenhuma parte
+        apresentada pelo dashboard.
+    """
+    rotulos = {codigo: rotulo for rotulo, codigo in dict_partes_questionario.items()}
+    parte = next((p for p, perguntas in catalogo.partes.items()
+                  if idx_pergunta in perguntas and p in rotulos), None)
+    return rotulos.get(parte)
+
+
+def abrir_par_multivariado(
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int):
+    """
+    Seleciona um par de perguntas na análise multivariada (callback: o
+    estado dos widgets é alterado antes da próxima execução do script).
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta.
+    idx_pergunta2:int
+        Índice da segunda pergunta.
+    """
+    partes = [obter_rotulo_parte(catalogo, idx) for idx in (idx_pergunta1, idx_pergunta2)]
+    if None in partes:
+        return
+    for idx, variavel, parte in ((idx_pergunta1, "var1", partes[0]),
+                                 (idx_pergunta2, "var2", partes[1])):
+        st.session_state[f"parte_{variavel}"] = parte
+        st.session_state[f"perg_{variavel}"] = catalogo.texto(idx)
+    st.session_state["tipo_analise"] = "Multivariada"
+
+
+def obter_ranking(
+        associacoes: pd.DataFrame,
+        catalogo: CatalogoPerguntas,
+        coluna: str,
+        qtde: int) -> pd.DataFrame:
+    """
+    Obtém os pares de perguntas de maior associação.
+
+    Parâmetros:
+    -----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas (ver associacao.py).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    coluna:str
+        Estatística utilizada na ordenação.
+    qtde:int
+        Quantidade de pares.
+
+    Retornos:
+    ----------
+    ranking:pd.DataFrame
+        Dataframe com os pares (e os índices das perguntas), em ordem decrescente.
+    """
+    melhores = associacoes.nlargest(qtde, coluna)
+    return pd.DataFrame({
+        "Pergunta 1": [catalogo.texto(p) for p in melhores["pergunta1"]],
+        "Pergunta 2": [catalogo.texto(p) for p in melhores["pergunta2"]],
+        "V de Cramér": melhores["v_cramer"].round(4).to_numpy(),
+        "Qui-quadrado": melhores["qui_quadrado"].round(2).to_numpy(),
+        "GL": melhores["graus_liberdade"].to_numpy(),
+        "Respondentes": melhores["n"].to_numpy(),
+        "Lift máximo": melhores["lift"].round(3).to_numpy(),
+        "Combinação (lift)": (melhores["alternativa1_lift"] + " / "
+                              + melhores["alternativa2_lift"]).to_numpy(),
+        "pergunta1": melhores["pergunta1"].to_numpy(),
+        "pergunta2": melhores["pergunta2"].to_numpy(),
+    })
+
+
+@instrumentar()
+def apresentar_analise_associacoes(dados: ConjuntoDados, pasta: str = PASTA_DADOS):
+    """
+    Apresenta a exploração das associações entre todos os pares de perguntas
+    (ranking e mapa de calor).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados (associações pré-calculadas).
+    """
+    from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
+
+    st.subheader("Associações entre as perguntas")
+    catalogo = dados.catalogo
+
+    # O cálculo (em vários processos) é realizado fora do servidor: pela linha de comando
+    # (associacao.py) ou no aquecimento (iniciar.py --associacoes)
+    associacoes = obter_associacoes(dados, pasta)
+    if associacoes is None:
+        st.info("As associações ainda não foram calculadas para os dados atuais. Execute "
+                f"`python ./app/associacao.py --pasta {pasta}` e recarregue a página.")
+        return
+
+    if associacoes.empty:
+        st.error("Não há pares de perguntas para o cálculo das associações.")
+        return
+
+    metrica = st.sidebar.selectbox("Ordenar por:", list(METRICAS_ASSOCIACAO),
+                                   key="metrica_associacao")
+    qtde = int(st.sidebar.number_input("Quantidade de pares:", min_value=1,
+                                       max_value=len(associacoes),
+                                       value=min(QTDE_PARES_PADRAO, len(associacoes))))
+    coluna = METRICAS_ASSOCIACAO[metrica]
+
+    # Ranking (ordenável) dos pares; a seleção de uma linha permite abrir o par
+    ranking = obter_ranking(associacoes, catalogo, coluna, qtde)
+    construtor = GridOptionsBuilder.from_dataframe(ranking)
+    construtor.configure_selection("single")
+    construtor.configure_column("pergunta1", hide=True)
+    construtor.configure_column("pergunta2", hide=True)
+    with medir("render.grid"):
+        resposta = AgGrid(ranking,
+                          gridOptions=construtor.build(),
+                          update_mode=GridUpdateMode.SELECTION_CHANGED,
+                          theme='material')
+
+    selecionadas = resposta["selected_rows"]
+    if selecionadas:
+        par = selecionadas[0]
+        idx_pergunta1, idx_pergunta2 = int(par["pergunta1"]), int(par["pergunta2"])
+        if (obter_rotulo_parte(catalogo, idx_pergunta1) is None
+                or obter_rotulo_parte(catalogo, idx_pergunta2) is None):
+            st.caption("O par selecionado não pode ser aberto na análise multivariada (pergunta "
+                       "fora das partes do questionário apresentadas).")
+        else:
+            st.button(f"Abrir na análise multivariada: {par['Pergunta 1']} x "
+                      f"{par['Pergunta 2']}",
+                      on_click=abrir_par_multivariado,
+                      args=(catalogo, idx_pergunta1, idx_pergunta2))
+    else:
+        st.caption("Selecione um par no ranking para abri-lo na análise multivariada.")
+
+    # Mapa de calor de todos os pares
+    with medir("figura.associacoes"):
+        fig = obter_grafico_associacoes(associacoes, catalogo, coluna, metrica)
+    with medir("render.grafico"):
+        st.plotly_chart(fig, use_container_width=True)
+    st.markdown(
+        f"<small>**Observação:** Para perguntas de multiplas escolhas o qui-quadrado e o V de Cramér são aproximações (as alternativas marcadas por um mesmo respondente não são independentes). O lift considera as combinações com ao menos {SUPORTE_MINIMO_LIFT} respondentes.</small>", unsafe_allow_html=True)
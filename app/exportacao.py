@@ -0,0 +1,323 @@
+# Imports gerais
+import argparse
+import html
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+# Imports específicos
+from reuse import dict_partes_questionario
+from dados import PASTA_DADOS, carregar_dados
+from agregados import obter_agregados_univariados
+from cubo import obter_cubo
+from agregacao import MODOS_BIVARIADOS
+from figuras import (obter_conteudo_bivariado, obter_conteudo_combinacoes,
+                     obter_conteudo_univariado)
+
+
+# constantes
+ARQUIVO_RELATORIO = "relatorio.html"
+MODOS_PLOTLYJS = ("inline", "cdn")
+TAREFAS_POR_LOTE = 8
+
+# Dados (agregados e cubo) carregados em cada processo de exportação
+_dados_processo = None
+
+
+def _inicializar_processo(pasta: str):
+    """
+    Carrega os dados (e os agregados pré-calculados) em um processo de exportação.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+    """
+    global _dados_processo
+    dados = carregar_dados(pasta)
+    _dados_processo = (dados, obter_agregados_univariados(dados, pasta), obter_cubo(dados, pasta))
+
+
+def _html_figura(figura: str, identificador: str) -> str:
+    """
+    Obtém o HTML de uma figura, com o JSON da figura embutido.
+
+    Parâmetros:
+    -----------
+    figura:str
+        Figura serializada (JSON).
+    identificador:str
+        Identificador (único no relatório) do elemento da figura.
+
+    Retornos:
+    ----------
+    html:str
+        Elemento e script de construção da figura.
+    """
+    figura = figura.replace("</", "<\\/")
+    return (f'<div id="{identificador}" class="grafico"></div>\n'
+            f'<script>(function() {{ var fig = {figura}; '
+            f'Plotly.newPlot("{identificador}", fig.data, fig.layout, {{responsive: true}}); }})();'
+            f'</script>')
+
+
+def _html_tabela(tabela: pd.DataFrame, indice: bool = False) -> str:
+    """
+    Obtém o HTML de uma tabela.
+
+    Parâmetros:
+    -----------
+    tabela:pd.DataFrame
+        Tabela a ser exportada.
+    indice:bool
+        Indica se o índice da tabela deve ser exportado.
+
+    Retornos:
+    ----------
+    html:str
+        Tabela HTML.
+    """
+    return tabela.to_html(index=indice, classes="tabela", border=0, float_format="{:.2f}".format)
+
+
+def _exportar_univariada(numero: int, idx_pergunta: int, qtde_perc: str) -> str:
+    """
+    Exporta (em um processo de exportação) a tabela e o gráfico de uma pergunta.
+
+    Parâmetros:
+    -----------
+    numero:int
+        Posição da pergunta no relatório.
+    idx_pergunta:int
+        Índice da pergunta.
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+
+    Retornos:
+    ----------
+    html:str
+        Seção do relatório.
+    """
+    dados, agregados, _ = _dados_processo
+    catalogo = dados.catalogo
+    sub, figura = obter_conteudo_univariado(dados.respostas, catalogo, idx_pergunta, qtde_perc,
+                                            agregados)
+
+    partes = [f"<section>\n<h3>{html.escape(catalogo.texto(idx_pergunta))}</h3>",
+              _html_tabela(sub), _html_figura(figura, f"univariada-{numero}")]
+    if catalogo.eh_multipla(idx_pergunta):
+        partes.append("<p><small><b>Observação:</b> Para perguntas de multiplas escolhas a soma "
+                      "das quantidades das respostas pode ultrapassar a quantidade de "
+                      "respondentes</small></p>")
+    partes.append("</section>")
+    return "\n".join(partes)
+
+
+def _exportar_bivariada(numero: int, idx_pergunta1: int, idx_pergunta2: int, modo: str) -> str:
+    """
+    Exporta (em um processo de exportação) a tabela cruzada e os gráficos de
+    um par de perguntas, da mesma forma que a análise multivariada.
+
+    Parâmetros:
+    -----------
+    numero:int
+        Posição do par no relatório.
+    idx_pergunta1:int
+        Índice da primeira pergunta.
+    idx_pergunta2:int
+        Índice da segunda pergunta.
+    modo:str
+        Modo da tabela dos pares com pergunta de multipla escolha (ver
+        MODOS_BIVARIADOS; os pares de unica escolha apresentam as combinações).
+
+    Retornos:
+    ----------
+    html:str
+        Seção do relatório.
+    """
+    dados, _, cubo = _dados_processo
+    respostas, catalogo = dados.respostas, dados.catalogo
+
+    partes = [f"<section>\n<h3>{html.escape(catalogo.texto(idx_pergunta1))} x "
+              f"{html.escape(catalogo.texto(idx_pergunta2))}</h3>"]
+    tipos = (catalogo.tipo(idx_pergunta1), catalogo.tipo(idx_pergunta2))
+    if tipos == ("unica", "unica"):
+        sub_agg, figura, figura_percentual = obter_conteudo_combinacoes(
+            respostas, catalogo, idx_pergunta1, idx_pergunta2, cubo)
+        partes += [_html_tabela(sub_agg), _html_figura(figura, f"bivariada-{numero}"),
+                   _html_figura(figura_percentual, f"bivariada-{numero}-percentual")]
+    else:
+        tabela, figura = obter_conteudo_bivariado(respostas, catalogo, idx_pergunta1,
+                                                  idx_pergunta2, modo, cubo)
+        partes += [_html_tabela(tabela, indice=True), _html_figura(figura, f"bivariada-{numero}")]
+        if modo != "Quantidade":
+            partes.append("<p><small><b>Observação:</b> O percentual por linha (coluna) é "
+                          "calculado em relação aos respondentes de ambas as perguntas que "
+                          "marcaram a alternativa da linha (coluna)</small></p>")
+    partes.append("</section>")
+    return "\n".join(partes)
+
+
+def _exportar_lote(tarefas: list) -> list:
+    """
+    Exporta (em um processo de exportação) um lote de seções do relatório.
+
+    Parâmetros:
+    -----------
+    tarefas:list
+        Tarefas do lote: ("univariada", numero, idx, qtde_perc) ou
+        ("bivariada", numero, idx1, idx2, modo).
+
+    Retornos:
+    ----------
+    secoes:list
+        HTML de cada seção, na ordem das tarefas.
+    """
+    exportar = {"univariada": _exportar_univariada, "bivariada": _exportar_bivariada}
+    return [exportar[tipo](*argumentos) for tipo, *argumentos in tarefas]
+
+
+def _html_plotlyjs(plotlyjs: str) -> str:
+    """
+    Obtém o script de carga da biblioteca plotly.js.
+
+    Parâmetros:
+    -----------
+    plotlyjs:str
+        "inline" (biblioteca embutida, relatório utilizável sem internet) ou
+        "cdn" (biblioteca carregada da CDN, relatório menor).
+
+    Retornos:
+    ----------
+    html:str
+        Elemento script.
+    """
+    if plotlyjs == "cdn":
+        return (f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js">'
+                f'</script>')
+    return f'<script type="text/javascript">{get_plotlyjs()}</script>'
+
+
+def exportar_relatorio(
+        caminho: str = ARQUIVO_RELATORIO,
+        partes: list = None,
+        pares: list = (),
+        qtde_perc: str = "Quantidade",
+        modo: str = "Quantidade",
+        plotlyjs: str = "inline",
+        pasta: str = PASTA_DADOS,
+        processos: int = None) -> int:
+    """
+    Exporta as perguntas de partes do questionário (e, opcionalmente, pares
+    de perguntas) para um relatório HTML estático e autocontido.
+
+    As tabelas e figuras são obtidas pelas mesmas funções utilizadas nas
+    análises univariada e multivariada; as seções são distribuídas em lotes
+    entre os processos e reunidas na ordem do questionário.
+
+    Parâmetros:
+    -----------
+    caminho:str
+        Caminho do relatório.
+    partes:list
+        Códigos das partes exportadas (ex.: ['p2', 'p4']; None: todas).
+    pares:list
+        Pares (índices) de perguntas da análise multivariada.
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado na análise univariada.
+    modo:str
+        Modo das tabelas dos pares com pergunta de multipla escolha (ver
+        MODOS_BIVARIADOS).
+    plotlyjs:str
+        Forma de inclusão da biblioteca plotly.js ("inline" ou "cdn").
+    pasta:str
+        Pasta com os arquivos de dados.
+    processos:int
+        Quantidade de processos utilizados na exportação (None: quantidade de CPUs).
+
+    Retornos:
+    ----------
+    secoes:int
+        Quantidade de seções exportadas.
+    """
+    catalogo = carregar_dados(pasta).catalogo
+    rotulos = {codigo: rotulo for rotulo, codigo in dict_partes_questionario.items()}
+    if partes is None:
+        partes = [p for p in dict_partes_questionario.values() if catalogo.perguntas(p)]
+
+    # Tarefas, na ordem do relatório (e títulos das partes)
+    tarefas, titulos = [], {}
+    for parte in partes:
+        titulos[len(tarefas)] = rotulos.get(parte, parte)
+        for idx in catalogo.perguntas(parte):
+            tarefas.append(("univariada", len(tarefas), idx, qtde_perc))
+    if pares:
+        titulos[len(tarefas)] = "Análise multivariada"
+    for idx1, idx2 in pares:
+        for idx in (idx1, idx2):
+            if idx not in catalogo.unicas and idx not in catalogo.multiplas:
+                raise ValueError(f"O índice {idx} não corresponde a uma pergunta.")
+        if idx1 == idx2:
+            raise ValueError(f"O par {idx1}:{idx2} possui perguntas iguais.")
+        tarefas.append(("bivariada", len(tarefas), idx1, idx2, modo))
+
+    lotes = [tarefas[i:i + TAREFAS_POR_LOTE] for i in range(0, len(tarefas), TAREFAS_POR_LOTE)]
+    if processos == 1:
+        _inicializar_processo(pasta)
+        resultados = [_exportar_lote(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(processos, initializer=_inicializar_processo,
+                                 initargs=(pasta,)) as executor:
+            resultados = list(executor.map(_exportar_lote, lotes))
+    secoes = [secao for resultado in resultados for secao in resultado]
+
+    with open(caminho, "w", encoding="utf-8") as output_file:
+        output_file.write(
+            "<!DOCTYPE html>\n<html lang=\"pt-BR\">\n<head>\n<meta charset=\"utf-8\">\n"
+            "<title>Dashboard - State of Data Brazil 2021</title>\n"
+            "<style>body{font-family:sans-serif;margin:2em auto;max-width:1100px}"
+            ".tabela{border-collapse:collapse;margin:1em 0}"
+            ".tabela td,.tabela th{border-bottom:1px solid #ddd;padding:4px 8px}"
+            "section{margin-bottom:3em}</style>\n")
+        output_file.write(_html_plotlyjs(plotlyjs))
+        output_file.write("\n</head>\n<body>\n<h1>Dashboard - State of Data Brazil 2021</h1>\n")
+        for numero, secao in enumerate(secoes):
+            if numero in titulos:
+                output_file.write(f"<h2>{html.escape(titulos[numero])}</h2>\n")
+            output_file.write(secao)
+            output_file.write("\n")
+        output_file.write("</body>\n</html>\n")
+    return len(secoes)
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Exporta as análises do dashboard para um relatório HTML estático.")
+    parser.add_argument("--saida", default=ARQUIVO_RELATORIO, help="Caminho do relatório.")
+    parser.add_argument("--partes", nargs="*", default=None,
+                        choices=list(dict_partes_questionario.values()),
+                        help="Partes do questionário exportadas (padrão: todas).")
+    parser.add_argument("--pares", nargs="*", default=[],
+                        help="Pares de perguntas da análise multivariada (índices, ex.: 12:45).")
+    parser.add_argument("--percentual", action="store_true",
+                        help="Apresenta o percentual (no lugar da quantidade) na análise univariada.")
+    parser.add_argument("--modo", default="Quantidade", choices=MODOS_BIVARIADOS,
+                        help="Modo das tabelas dos pares com pergunta de multipla escolha.")
+    parser.add_argument("--plotlyjs", default="inline", choices=MODOS_PLOTLYJS,
+                        help="Inclusão da biblioteca plotly.js (embutida ou pela CDN).")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados.")
+    parser.add_argument("--processos", type=int, default=None,
+                        help="Quantidade de processos (padrão: quantidade de CPUs).")
+    args = parser.parse_args()
+
+    pares = [tuple(int(i) for i in par.split(":")) for par in args.pares]
+    inicio = time.perf_counter()
+    n = exportar_relatorio(args.saida, args.partes, pares,
+                           "Percentual" if args.percentual else "Quantidade", args.modo,
+                           args.plotlyjs, args.pasta, args.processos)
+    print(f"{n} seções exportadas para {args.saida} em {time.perf_counter() - inicio:.1f}s")
@@ -0,0 +1,624 @@
+# Imports gerais
+import json
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+# plotly.express é importado nas funções que constroem as figuras (inicialização mais rápida)
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas
+from segmentos import Segmento
+from cache import CacheLRU
+from instrumentacao import medir
+from intervalos import formatar_intervalos
+from edicoes import PASTA_EDICOES, obter_assinatura_edicoes, obter_comparacao
+from agregacao import (formatar_contagem, formatar_tabelas, obter_contagem,
+                       obter_dataframe_combinacoes, obter_intervalos_bivariados,
+                       obter_tabela_cruzada, obter_tabela_rotulada, obter_tabelas_estratificadas)
+
+
+# constantes
+CAPACIDADE_FIGURAS = 512
+TAMANHO_TEXTO_CURTO = 60
+COLUNAS_FACETAS = 3
+ALTURA_FACETA = 400
+
+# Cache do processo (compartilhado entre as sessões) das tabelas e figuras serializadas
+_cache = CacheLRU(CAPACIDADE_FIGURAS)
+
+
+def encurtar_textos(textos: pd.Series, tamanho: int = TAMANHO_TEXTO_CURTO) -> pd.Series:
+    """
+    Encurta os textos longos (acrescentando reticências).
+
+    Parâmetros:
+    -----------
+    textos:pd.Series
+        Textos a serem encurtados.
+    tamanho:int
+        Quantidade máxima de caracteres mantidos.
+
+    Retornos:
+    ----------
+    textos_curtos:pd.Series
+        Textos encurtados.
+    """
+    textos = textos.astype(str)
+    return textos.where(textos.str.len() < tamanho, textos.str.slice(0, tamanho) + "...")
+
+
+def obter_grafico_resposta_unica(
+        sub: pd.DataFrame,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int) -> "px.bar":
+    """
+    Obtém um gráfico de barras com as respostas de uma pergunta de unica escolha.
+
+    Parâmetros:
+    -----------
+    sub:pd.DataFrame
+        Dataframe com as respostas de uma pergunta de unica escolha.
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta de unica escolha.
+
+    Retornos:
+    ----------
+    fig:px.bar
+        Gráfico de barras com as respostas de uma pergunta de unica escolha.
+    """
+    import plotly.express as px
+
+    grafico = pd.DataFrame({"texto_curto": encurtar_textos(sub[sub.columns[0]]),
+                            sub.columns[1]: sub[sub.columns[1]]})
+    fig = px.bar(grafico, x='texto_curto', y=sub.columns[1],
+                 labels={"texto_curto": catalogo.texto(idx_pergunta)},)
+    return fig
+
+
+def obter_grafico_resposta_multiplas(sub: pd.DataFrame) -> "px.bar":
+    """
+    Obtém um gráfico de barras com as respostas de uma pergunta de multipla escolha.
+
+    Parâmetros:
+    -----------
+    sub:pd.DataFrame
+        Dataframe com as respostas de uma pergunta de multipla escolha.
+
+    Retornos:
+    ----------
+    fig:px.bar
+        Gráfico de barras com as respostas de uma pergunta de multipla escolha.
+    """
+    import plotly.express as px
+
+    fig = px.bar(sub, x=sub.columns[0], y=sub.columns[1])
+    return fig
+
+
+def reescalar_figura(
+        figura: str,
+        eixo: str,
+        valores: np.ndarray,
+        rotulo_anterior: str,
+        rotulo: str) -> str:
+    """
+    Substitui os valores (e o rótulo) de uma figura serializada, sem
+    reconstruí-la (ex.: conversão de quantidade para percentual).
+
+    Parâmetros:
+    -----------
+    figura:str
+        Figura serializada (JSON) com um único traço.
+    eixo:str
+        Atributo dos valores do traço ('y' para barras, 'z' para mapas de calor).
+    valores:np.ndarray
+        Novos valores.
+    rotulo_anterior:str
+        Rótulo dos valores na figura original.
+    rotulo:str
+        Rótulo dos novos valores.
+
+    Retornos:
+    ----------
+    figura:str
+        Figura serializada (JSON) com os novos valores.
+    """
+    conteudo = json.loads(figura)
+    traco = conteudo["data"][0]
+    traco[eixo] = np.asarray(valores).tolist()
+    if "hovertemplate" in traco:
+        # Apenas o rótulo do valor é substituído (o texto da pergunta é mantido)
+        for separador in ("=", ": "):
+            traco["hovertemplate"] = traco["hovertemplate"].replace(
+                f"{rotulo_anterior}{separador}%{{{eixo}}}", f"{rotulo}{separador}%{{{eixo}}}")
+
+    layout = conteudo["layout"]
+    if eixo == "y":
+        layout.setdefault("yaxis", {}).setdefault("title", {})["text"] = rotulo
+    else:
+        layout.setdefault("coloraxis", {}).setdefault("colorbar", {}).setdefault(
+            "title", {})["text"] = rotulo
+    return json.dumps(conteudo)
+
+
+def adicionar_barras_erro(
+        figura: str,
+        valores: np.ndarray,
+        inferior: np.ndarray,
+        superior: np.ndarray) -> str:
+    """
+    Acrescenta as barras de erro (intervalo de confiança) ao gráfico de barras
+    de uma figura serializada.
+
+    Parâmetros:
+    -----------
+    figura:str
+        Figura serializada (JSON) com um único traço.
+    valores:np.ndarray
+        Valores das barras.
+    inferior:np.ndarray
+        Limite inferior de cada barra.
+    superior:np.ndarray
+        Limite superior de cada barra.
+
+    Retornos:
+    ----------
+    figura:str
+        Figura serializada (JSON) com as barras de erro.
+    """
+    conteudo = json.loads(figura)
+    conteudo["data"][0]["error_y"] = {
+        "type": "data",
+        "symmetric": False,
+        "array": np.nan_to_num(np.maximum(superior - valores, 0)).tolist(),
+        "arrayminus": np.nan_to_num(np.maximum(valores - inferior, 0)).tolist(),
+    }
+    return json.dumps(conteudo)
+
+
+def _chave(respostas: RespostasCompactas, segmento: Segmento) -> tuple:
+    """
+    Obtém a parte da chave do cache que identifica os dados e o segmento.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    segmento:Segmento
+        Segmento de respondentes (ou None).
+
+    Retornos:
+    ----------
+    chave:tuple
+        Identificador da carga e chave do segmento.
+    """
+    return (respostas.identificador, segmento.chave if segmento is not None else None)
+
+
+def obter_conteudo_univariado(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int,
+        qtde_perc: str,
+        agregados: dict = None,
+        segmento: Segmento = None,
+        intervalo: str = "Nenhum") -> tuple:
+    """
+    Obtém a tabela e a figura (serializada) de uma pergunta do questionário.
+
+    As contagens e a figura de quantidade são armazenadas em cache
+    independentemente do modo de exibição: a alternância entre quantidade
+    e percentual apenas reescala as contagens armazenadas (e acrescenta as
+    barras de erro do intervalo de confiança).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta.
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    agregados:dict
+        Dicionário com as contagens pré-calculadas de cada pergunta (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe com as alternativas e a quantidade/percentual de respostas.
+    figura:str
+        Figura serializada (JSON).
+    """
+    base = ("univariada", idx_pergunta) + _chave(respostas, segmento)
+    conteudo = _cache.obter(base + (qtde_perc, intervalo))
+    if conteudo is not None:
+        return conteudo
+
+    texto = catalogo.texto(idx_pergunta)
+    entrada = _cache.obter(base)
+    if entrada is None:
+        with medir("agregacao.univariada"):
+            contagem, denominador = obter_contagem(respostas, catalogo, idx_pergunta,
+                                                   agregados, segmento)
+            sub = formatar_contagem(contagem, denominador, texto, "Quantidade")
+        with medir("figura.univariada"):
+            if catalogo.eh_multipla(idx_pergunta):
+                fig = obter_grafico_resposta_multiplas(sub)
+            else:
+                fig = obter_grafico_resposta_unica(sub, catalogo, idx_pergunta)
+            entrada = (contagem, denominador, pio.to_json(fig))
+        _cache.armazenar(base, entrada)
+
+    contagem, denominador, figura = entrada
+    sub = formatar_contagem(contagem, denominador, texto, qtde_perc, intervalo,
+                            exclusivas=not catalogo.eh_multipla(idx_pergunta),
+                            fator_efetivo=segmento.fator_efetivo if segmento else 1.0)
+    if sub.columns[1] != "Quantidade":
+        figura = reescalar_figura(figura, "y", sub[sub.columns[1]].to_numpy(),
+                                  "Quantidade", sub.columns[1])
+    if "Inferior (%)" in sub.columns:
+        figura = adicionar_barras_erro(figura, sub[sub.columns[1]].to_numpy(),
+                                       sub["Inferior (%)"].to_numpy(),
+                                       sub["Superior (%)"].to_numpy())
+
+    conteudo = (sub, figura)
+    _cache.armazenar(base + (qtde_perc, intervalo), conteudo)
+    return conteudo
+
+
+def obter_conteudo_bivariado(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        modo: str = "Quantidade",
+        cubo=None,
+        segmento: Segmento = None,
+        intervalo: str = "Nenhum",
+        limites: tuple = None) -> tuple:
+    """
+    Obtém a tabela cruzada e o mapa de calor (serializado) de duas perguntas.
+
+    A tabela e a figura de quantidade são armazenadas em cache
+    independentemente do modo de exibição: os percentuais apenas substituem
+    os valores da figura armazenada. Com o intervalo de confiança, as
+    células da tabela apresentam os limites do intervalo (também exibidos
+    ao passar o mouse no mapa de calor). Com os limites, as alternativas
+    excedentes de cada pergunta são agrupadas em "Outros" (o tamanho da
+    tabela e da figura não depende da quantidade de alternativas).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    modo:str
+        "Quantidade", "Percentual (linha)" ou "Percentual (coluna)".
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    intervalo:str
+        Método do intervalo de confiança dos percentuais (ver METODOS_INTERVALO).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (opcional).
+
+    Retornos:
+    ----------
+    tabela:pd.DataFrame
+        Tabela cruzada no modo selecionado.
+    figura:str
+        Mapa de calor serializado (JSON).
+    """
+    if modo == "Quantidade":
+        intervalo = "Nenhum"
+    base = (("bivariada", idx_pergunta1, idx_pergunta2) + _chave(respostas, segmento)
+            + (limites,))
+    conteudo = _cache.obter(base + (modo, intervalo))
+    if conteudo is not None:
+        return conteudo
+
+    entrada = _cache.obter(base)
+    if entrada is None:
+        with medir("agregacao.bivariada"):
+            # A tabela estendida é mantida para os intervalos de confiança
+            rotulada = obter_tabela_rotulada(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                             cubo, segmento, limites)
+            tabelas = formatar_tabelas(*rotulada)
+        with medir("figura.bivariada"):
+            import plotly.express as px
+            fig = px.imshow(tabelas["Quantidade"], text_auto=True,
+                            labels=dict(color="Quantidade"))
+            entrada = (tabelas, pio.to_json(fig), rotulada)
+        _cache.armazenar(base, entrada)
+
+    tabelas, figura, rotulada = entrada
+    tabela = tabelas[modo]
+    if modo != "Quantidade":
+        figura = reescalar_figura(figura, "z", tabela.to_numpy(), "Quantidade", "Percentual (%)")
+    if intervalo != "Nenhum":
+        inferior, superior = obter_intervalos_bivariados(respostas, catalogo, idx_pergunta1,
+                                                         idx_pergunta2, rotulada, modo,
+                                                         intervalo, segmento)
+        conteudo = json.loads(figura)
+        traco = conteudo["data"][0]
+        traco["customdata"] = np.round(np.dstack([inferior, superior]), 2).tolist()
+        traco["hovertemplate"] = (traco.get("hovertemplate", "").replace("<extra></extra>", "")
+                                  + "<br>IC: [%{customdata[0]}; %{customdata[1]}]<extra></extra>")
+        figura = json.dumps(conteudo)
+        tabela = formatar_intervalos(tabela, inferior, superior)
+
+    conteudo = (tabela, figura)
+    _cache.armazenar(base + (modo, intervalo), conteudo)
+    return conteudo
+
+
+def obter_conteudo_estratificado(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        idx_controle: int,
+        modo: str = "Quantidade",
+        segmento: Segmento = None,
+        limites: tuple = None,
+        limite_estratos: int = None) -> tuple:
+    """
+    Obtém as tabelas cruzadas de duas perguntas em cada estrato de uma
+    pergunta de controle e os mapas de calor (serializados) em facetas, um
+    por estrato, com a mesma escala de cores.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas das tabelas).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas das tabelas).
+    idx_controle:int
+        Índice da pergunta de controle (unica escolha).
+    modo:str
+        "Quantidade", "Percentual (linha)" ou "Percentual (coluna)".
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas das linhas e das colunas (opcional).
+    limite_estratos:int
+        Quantidade máxima de estratos (opcional).
+
+    Retornos:
+    ----------
+    tabelas:dict
+        Dicionário com o estrato e a tabela cruzada no modo selecionado
+        (vazio, caso nenhum estrato possua respondentes).
+    figura:str
+        Mapas de calor em facetas serializados (JSON; None, sem estratos).
+    """
+    base = (("estratificada", idx_pergunta1, idx_pergunta2, idx_controle)
+            + _chave(respostas, segmento) + (limites, limite_estratos))
+    conteudo = _cache.obter(base + (modo,))
+    if conteudo is not None:
+        return conteudo
+
+    estratos = _cache.obter(base)
+    if estratos is None:
+        with medir("agregacao.estratificada"):
+            estratos = obter_tabelas_estratificadas(respostas, catalogo, idx_pergunta1,
+                                                    idx_pergunta2, idx_controle, segmento,
+                                                    limites, limite_estratos)
+        _cache.armazenar(base, estratos)
+
+    tabelas = {estrato: modos[modo] for estrato, modos in estratos.items()}
+    if not tabelas:
+        # Nenhum respondente (do segmento) respondeu a pergunta de controle
+        conteudo = (tabelas, None)
+        _cache.armazenar(base + (modo,), conteudo)
+        return conteudo
+
+    with medir("figura.estratificada"):
+        import plotly.express as px
+        tabela = next(iter(tabelas.values()))
+        rotulo = "Quantidade" if modo == "Quantidade" else "Percentual (%)"
+        fig = px.imshow(np.stack([t.to_numpy() for t in tabelas.values()]),
+                        x=tabela.columns.astype(str), y=tabela.index.astype(str),
+                        facet_col=0, facet_col_wrap=min(COLUNAS_FACETAS, len(tabelas)),
+                        text_auto=True, labels=dict(color=rotulo, x=tabela.columns.name,
+                                                    y=tabela.index.name))
+        # Título de cada faceta: o estrato (em vez do índice da faceta)
+        nomes = [str(e) for e in tabelas]
+        fig.for_each_annotation(lambda a: a.update(text=nomes[int(a.text.split("=")[-1])]))
+        fig.update_layout(height=ALTURA_FACETA * -(-len(tabelas) // COLUNAS_FACETAS))
+        conteudo = (tabelas, pio.to_json(fig))
+    _cache.armazenar(base + (modo,), conteudo)
+    return conteudo
+
+
+def obter_conteudo_combinacoes(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None,
+        segmento: Segmento = None,
+        limites: tuple = None) -> tuple:
+    """
+    Obtém as combinações observadas de duas perguntas de unica escolha e os
+    gráficos (serializados) de quantidade e de percentual.
+
+    Os gráficos são construídos a partir da tabela com as alternativas
+    excedentes agrupadas em "Outros" (limites); as combinações contêm todas
+    as alternativas (apresentadas em páginas).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta de unica escolha.
+    idx_pergunta2:int
+        Índice da segunda pergunta de unica escolha.
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites:tuple
+        Quantidade máxima de alternativas de cada pergunta nos gráficos (opcional).
+
+    Retornos:
+    ----------
+    sub_agg:pd.DataFrame
+        Combinações observadas (formato longo), em ordem decrescente.
+    figura_quantidade:str
+        Gráfico de barras (quantidade) serializado.
+    figura_percentual:str
+        Gráfico de barras (percentual) serializado.
+    """
+    chave = (("combinacoes", idx_pergunta1, idx_pergunta2) + _chave(respostas, segmento)
+             + (limites,))
+    conteudo = _cache.obter(chave)
+    if conteudo is not None:
+        return conteudo
+
+    with medir("agregacao.combinacoes"):
+        sub_agg = obter_dataframe_combinacoes(
+            obter_tabela_cruzada(respostas, catalogo, idx_pergunta1, idx_pergunta2, cubo,
+                                 segmento))
+        sub_grafico = sub_agg
+        if limites is not None:
+            sub_grafico = obter_dataframe_combinacoes(
+                obter_tabela_cruzada(respostas, catalogo, idx_pergunta1, idx_pergunta2, cubo,
+                                     segmento, limites))
+
+    with medir("figura.combinacoes"):
+        import plotly.express as px
+        fig = px.bar(
+            sub_grafico, x=sub_grafico.columns[0], y="Quantidade", color=sub_grafico.columns[1])
+        fig_percentual = px.histogram(sub_grafico, x=sub_grafico.columns[0], y="Quantidade",
+                                      color=sub_grafico.columns[1], barnorm="percent")
+        fig_percentual.update_layout(
+            yaxis_title="Percentual(%)",
+        )
+        conteudo = (sub_agg, pio.to_json(fig), pio.to_json(fig_percentual))
+    _cache.armazenar(chave, conteudo)
+    return conteudo
+
+
+def obter_conteudo_comparacao(
+        edicao: str,
+        idx_pergunta: int,
+        qtde_perc: str,
+        pasta_edicoes: str = PASTA_EDICOES) -> tuple:
+    """
+    Obtém a comparação de uma pergunta entre as edições e o gráfico de
+    barras agrupadas (serializado).
+
+    Parâmetros:
+    -----------
+    edicao:str
+        Nome da edição da pergunta.
+    idx_pergunta:int
+        Índice da pergunta (no catálogo da edição).
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    pasta_edicoes:str
+        Pasta com uma subpasta (particionada) por edição.
+
+    Retornos:
+    ----------
+    sub:pd.DataFrame
+        Dataframe (formato longo) com as alternativas, a edição e a
+        quantidade/percentual de respostas.
+    figura:str
+        Figura serializada (JSON).
+    """
+    chave = ("comparacao", pasta_edicoes, edicao, idx_pergunta, qtde_perc,
+             obter_assinatura_edicoes(pasta_edicoes))
+    conteudo = _cache.obter(chave)
+    if conteudo is not None:
+        return conteudo
+
+    with medir("agregacao.comparacao"):
+        sub = obter_comparacao(edicao, idx_pergunta, qtde_perc, pasta_edicoes)
+    with medir("figura.comparacao"):
+        import plotly.express as px
+        grafico = pd.DataFrame({"texto_curto": encurtar_textos(sub[sub.columns[0]]),
+                                "Edição": sub["Edição"],
+                                sub.columns[2]: sub[sub.columns[2]]})
+        fig = px.bar(grafico, x="texto_curto", y=sub.columns[2], color="Edição",
+                     barmode="group", labels={"texto_curto": sub.columns[0]})
+        conteudo = (sub, pio.to_json(fig))
+
+    _cache.armazenar(chave, conteudo)
+    return conteudo
+
+
+def obter_grafico_associacoes(
+        associacoes: pd.DataFrame,
+        catalogo: CatalogoPerguntas,
+        coluna: str = "v_cramer",
+        rotulo: str = "V de Cramér") -> "px.imshow":
+    """
+    Obtém o mapa de calor (matriz simétrica) de uma estatística de associação
+    de todos os pares de perguntas.
+
+    Parâmetros:
+    -----------
+    associacoes:pd.DataFrame
+        Dataframe com uma linha por par de perguntas (ver associacao.py).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    coluna:str
+        Estatística apresentada (ex.: 'v_cramer').
+    rotulo:str
+        Rótulo da estatística (escala de cores).
+
+    Retornos:
+    ----------
+    fig:px.imshow
+        Mapa de calor da estatística.
+    """
+    import plotly.express as px
+
+    perguntas = np.union1d(associacoes["pergunta1"], associacoes["pergunta2"])
+    posicoes = np.searchsorted(perguntas, associacoes["pergunta1"])
+    posicoes2 = np.searchsorted(perguntas, associacoes["pergunta2"])
+    matriz = np.full((len(perguntas), len(perguntas)), np.nan)
+    matriz[posicoes, posicoes2] = associacoes[coluna].to_numpy()
+    matriz[posicoes2, posicoes] = associacoes[coluna].to_numpy()
+
+    rotulos = encurtar_textos(pd.Series([catalogo.texto(p) for p in perguntas]), 40)
+    rotulos = [f"{r} [{p}]" for r, p in zip(rotulos, perguntas)]
+    return px.imshow(pd.DataFrame(matriz, index=rotulos, columns=rotulos),
+                     labels=dict(color=rotulo), aspect="auto")
+
+
+def estatisticas_figuras() -> dict:
+    """
+    Obtém as estatísticas de utilização do cache de tabelas e figuras.
+
+    Retornos:
+    ----------
+    estatisticas:dict
+        Dicionário com a capacidade, a quantidade de itens, de acertos e de faltas.
+    """
+    return _cache.estatisticas()
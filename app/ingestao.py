@@ -0,0 +1,330 @@
+# Imports gerais
+import argparse
+import ast
+import os
+import pickle
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Imports específicos
+from catalogo import ARQUIVO_CATALOGO, CatalogoPerguntas, salvar_catalogo
+from dados import ARQUIVO_PRINCIPAL, PASTA_DADOS
+
+
+# constantes
+TAMANHO_GRUPO = 50_000
+
+# Tipos observados das colunas do CSV (do mais restrito ao mais geral)
+TIPOS_COLUNA = ("vazia", "binaria", "numerica", "texto")
+
+# Código das colunas do questionário: P<parte>_<pergunta>[_<alternativa>]
+PADRAO_CODIGO = re.compile(r"^P(\d+)_([a-z]+)(?:_(\d+))?$")
+
+
+def interpretar_cabecalho(coluna: str) -> tuple:
+    """
+    Obtém o código e o texto de uma coluna do arquivo da pesquisa, cujo
+    cabeçalho é a representação de uma tupla (ex.: "('P1_a ', 'Idade')").
+
+    Parâmetros:
+    -----------
+    coluna:str
+        Cabeçalho da coluna.
+
+    Retornos:
+    ----------
+    codigo:str
+        Código da coluna (ex.: 'P1_a'), ou o próprio cabeçalho.
+    texto:str
+        Texto da pergunta ou alternativa, ou o próprio cabeçalho.
+    """
+    try:
+        valor = ast.literal_eval(coluna)
+    except (ValueError, SyntaxError):
+        valor = None
+    if isinstance(valor, tuple) and len(valor) == 2:
+        return str(valor[0]).strip(), str(valor[1]).strip()
+    return coluna.strip(), coluna.strip()
+
+
+def obter_colunas_saida(colunas: list) -> list:
+    """
+    Obtém as colunas do arquivo de respostas: as colunas do CSV e, para as
+    alternativas cuja pergunta não possui coluna própria, uma coluna (vazia)
+    da pergunta, inserida antes da primeira alternativa.
+
+    Parâmetros:
+    -----------
+    colunas:list
+        Cabeçalhos das colunas do CSV.
+
+    Retornos:
+    ----------
+    colunas:list
+        Cabeçalhos das colunas do arquivo de respostas.
+    """
+    codigos = {interpretar_cabecalho(c)[0] for c in colunas}
+    saida = []
+    for coluna in colunas:
+        correspondencia = PADRAO_CODIGO.match(interpretar_cabecalho(coluna)[0])
+        if correspondencia and correspondencia.group(3):
+            pai = f"P{correspondencia.group(1)}_{correspondencia.group(2)}"
+            if pai not in codigos:
+                saida.append(repr((f"{pai} ", pai)))
+                codigos.add(pai)
+        saida.append(coluna)
+    return saida
+
+
+def atualizar_tipos(bloco: pd.DataFrame, tipos: dict):
+    """
+    Atualiza o tipo observado de cada coluna com os valores de um bloco do
+    CSV. Os tipos são cumulativos (ver TIPOS_COLUNA): uma coluna é binária
+    enquanto todos os valores lidos forem 0 ou 1, numérica enquanto todos
+    forem números e texto a partir do primeiro valor não numérico.
+
+    Parâmetros:
+    -----------
+    bloco:pd.DataFrame
+        Bloco do CSV (valores como texto).
+    tipos:dict
+        Dicionário com o cabeçalho e o tipo observado de cada coluna
+        (atualizado no próprio dicionário).
+    """
+    for coluna in bloco.columns:
+        atual = tipos.get(coluna, "vazia")
+        if atual == "texto":
+            continue
+        valores = bloco[coluna].dropna()
+        if len(valores) == 0:
+            continue
+        numeros = pd.to_numeric(valores, errors="coerce")
+        if numeros.isna().any():
+            tipo = "texto"
+        elif numeros.isin((0, 1)).all():
+            tipo = "binaria"
+        else:
+            tipo = "numerica"
+        tipos[coluna] = max(atual, tipo, key=TIPOS_COLUNA.index)
+
+
+def obter_esquema(colunas: list, tipos: dict) -> pa.Schema:
+    """
+    Obtém o esquema do arquivo de respostas a partir dos tipos observados em
+    todos os blocos do CSV: colunas binárias e numéricas são float64, as
+    demais (inclusive as colunas sem valores) são texto.
+
+    Parâmetros:
+    -----------
+    colunas:list
+        Cabeçalhos das colunas do arquivo de respostas.
+    tipos:dict
+        Dicionário com o cabeçalho e o tipo observado de cada coluna.
+
+    Retornos:
+    ----------
+    esquema:pa.Schema
+        Esquema do arquivo de respostas.
+    """
+    return pa.schema([(coluna, pa.float64() if tipos.get(coluna) in ("binaria", "numerica")
+                       else pa.string()) for coluna in colunas])
+
+
+def converter_bloco(bloco: pd.DataFrame, esquema: pa.Schema) -> pa.Table:
+    """
+    Converte um bloco do CSV para o esquema do arquivo de respostas.
+
+    Parâmetros:
+    -----------
+    bloco:pd.DataFrame
+        Bloco do CSV (valores como texto).
+    esquema:pa.Schema
+        Esquema do arquivo de respostas.
+
+    Retornos:
+    ----------
+    tabela:pa.Table
+        Bloco convertido.
+    """
+    arranjos = []
+    for campo in esquema:
+        if campo.name not in bloco.columns:
+            arranjos.append(pa.nulls(len(bloco), type=campo.type))
+        elif campo.type == pa.float64():
+            valores = pd.to_numeric(bloco[campo.name])
+            arranjos.append(pa.array(valores.to_numpy(dtype=np.float64), type=pa.float64(),
+                                     from_pandas=True))
+        else:
+            arranjos.append(pa.array(bloco[campo.name], type=pa.string(), from_pandas=True))
+    return pa.Table.from_arrays(arranjos, schema=esquema)
+
+
+def derivar_estrutura(colunas: list, binarias: set) -> dict:
+    """
+    Obtém os artefatos auxiliares do questionário a partir das colunas.
+
+    - Colunas P<parte>_<pergunta>_<n> com valores 0/1 são alternativas da
+      pergunta P<parte>_<pergunta> (de multipla escolha);
+    - As demais colunas com código são perguntas de unica escolha (inclusive
+      as colunas derivadas com sufixo numérico, ex.: faixas);
+    - Colunas sem código (ex.: identificador) não pertencem a nenhuma parte.
+
+    Parâmetros:
+    -----------
+    colunas:list
+        Cabeçalhos das colunas do arquivo de respostas.
+    binarias:set
+        Colunas numéricas cujos valores (não ausentes) são apenas 0 ou 1.
+
+    Retornos:
+    ----------
+    estrutura:dict
+        Dicionário com tipo_pergunta, resposta_multipla, categoria_pergunta,
+        textos_alternativo e idx_perguntas.
+    """
+    cabecalhos = [interpretar_cabecalho(c) for c in colunas]
+    posicoes = {codigo: idx for idx, (codigo, _) in enumerate(cabecalhos)}
+
+    resposta_multipla = {}
+    categoria_pergunta = {}
+    idx_perguntas = {}
+    for idx, (codigo, _) in enumerate(cabecalhos):
+        correspondencia = PADRAO_CODIGO.match(codigo)
+        if not correspondencia:
+            continue
+        parte = f"p{correspondencia.group(1)}"
+        pai = f"P{correspondencia.group(1)}_{correspondencia.group(2)}"
+        if correspondencia.group(3) and colunas[idx] in binarias and pai in posicoes:
+            resposta_multipla.setdefault(posicoes[pai], []).append(idx)
+            continue
+        categoria_pergunta.setdefault(parte, []).append(idx)
+        idx_perguntas[codigo] = idx
+
+    perguntas = [p for ps in categoria_pergunta.values() for p in ps]
+    return {
+        "tipo_pergunta": {"unica": [p for p in perguntas if p not in resposta_multipla],
+                          "multipla": [p for p in perguntas if p in resposta_multipla]},
+        "resposta_multipla": resposta_multipla,
+        "categoria_pergunta": categoria_pergunta,
+        "textos_alternativo": [texto for _, texto in cabecalhos],
+        "idx_perguntas": idx_perguntas,
+    }
+
+
+def ingerir_csv(
+        arquivo: str,
+        pasta: str = PASTA_DADOS,
+        tamanho_grupo: int = TAMANHO_GRUPO,
+        separador: str = ",",
+        codificacao: str = "utf-8") -> dict:
+    """
+    Converte o CSV da pesquisa nos arquivos de dados do dashboard (df.parquet,
+    arquivos .pickle auxiliares e catálogo de perguntas), em uma única
+    leitura do CSV.
+
+    O CSV é lido em blocos de tamanho_grupo linhas e cada bloco é gravado
+    (como texto) em um row group de um arquivo Parquet temporário, de forma
+    que a memória utilizada não depende da quantidade de respondentes. Os
+    tipos das colunas e as alternativas (colunas 0/1) são inferidos a partir
+    dos valores de todos os blocos; em seguida, cada row group é convertido
+    para o esquema final. Os artefatos auxiliares são derivados dos
+    cabeçalhos e dos tipos observados durante a leitura.
+
+    Parâmetros:
+    -----------
+    arquivo:str
+        Caminho do CSV da pesquisa.
+    pasta:str
+        Pasta onde os arquivos serão gravados.
+    tamanho_grupo:int
+        Quantidade de linhas de cada bloco (row group).
+    separador:str
+        Separador de campos do CSV.
+    codificacao:str
+        Codificação do CSV.
+
+    Retornos:
+    ----------
+    resumo:dict
+        Dicionário com a quantidade de respondentes, de colunas e de perguntas
+        de unica e de multipla escolha.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    caminho = os.path.join(pasta, ARQUIVO_PRINCIPAL)
+    temporario = f"{caminho}.tmp"
+    textos = f"{caminho}.textos.tmp"
+
+    escritor_textos = None
+    escritor = None
+    tipos = {}
+    n_respondentes = 0
+    leitor = pd.read_csv(arquivo, sep=separador, encoding=codificacao, dtype=str,
+                         chunksize=tamanho_grupo)
+    try:
+        # Leitura do CSV: blocos gravados como texto e tipos observados em todos os blocos
+        for bloco in leitor:
+            if escritor_textos is None:
+                colunas = obter_colunas_saida(list(bloco.columns))
+                esquema_textos = pa.schema([(coluna, pa.string()) for coluna in colunas])
+                escritor_textos = pq.ParquetWriter(textos, esquema_textos)
+
+            atualizar_tipos(bloco, tipos)
+            tabela = converter_bloco(bloco, esquema_textos)
+            escritor_textos.write_table(tabela, row_group_size=tamanho_grupo)
+            n_respondentes += tabela.num_rows
+
+        if escritor_textos is None:
+            raise ValueError(f"O arquivo {arquivo} não possui respostas.")
+        escritor_textos.close()
+
+        # Conversão de cada row group para o esquema inferido
+        esquema = obter_esquema(colunas, tipos)
+        arquivo_textos = pq.ParquetFile(textos)
+        escritor = pq.ParquetWriter(temporario, esquema, compression="zstd")
+        for i in range(arquivo_textos.num_row_groups):
+            bloco = arquivo_textos.read_row_group(i).to_pandas()
+            escritor.write_table(converter_bloco(bloco, esquema), row_group_size=tamanho_grupo)
+    finally:
+        for aberto in (escritor_textos, escritor):
+            if aberto is not None:
+                aberto.close()
+        if os.path.exists(textos):
+            os.remove(textos)
+
+    binarias = {coluna for coluna, tipo in tipos.items() if tipo == "binaria"}
+    estrutura = derivar_estrutura(colunas, binarias)
+    os.replace(temporario, caminho)
+    for nome, artefato in estrutura.items():
+        with open(os.path.join(pasta, f"{nome}.pickle"), "wb") as output_file:
+            pickle.dump(artefato, output_file)
+    catalogo = CatalogoPerguntas(estrutura["textos_alternativo"], estrutura["tipo_pergunta"],
+                                 estrutura["resposta_multipla"], estrutura["categoria_pergunta"])
+    salvar_catalogo(catalogo, os.path.join(pasta, ARQUIVO_CATALOGO))
+
+    return {"respondentes": n_respondentes, "colunas": len(colunas),
+            "unicas": len(catalogo.unicas), "multiplas": len(catalogo.multiplas)}
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Converte o CSV da pesquisa (Kaggle) nos arquivos de dados do dashboard.")
+    parser.add_argument("arquivo", help="Caminho do CSV da pesquisa.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta onde os arquivos serão gravados.")
+    parser.add_argument("--tamanho-grupo", type=int, default=TAMANHO_GRUPO,
+                        help="Quantidade de linhas de cada bloco (row group).")
+    parser.add_argument("--separador", default=",", help="Separador de campos do CSV.")
+    parser.add_argument("--codificacao", default="utf-8", help="Codificação do CSV.")
+    args = parser.parse_args()
+
+    resumo = ingerir_csv(args.arquivo, args.pasta, args.tamanho_grupo, args.separador,
+                         args.codificacao)
+    print(f"{resumo['respondentes']} respondentes e {resumo['colunas']} colunas gravados em "
+          f"{args.pasta} ({resumo['unicas']} perguntas de unica escolha e "
+          f"{resumo['multiplas']} de multipla escolha)")
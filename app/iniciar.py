@@ -0,0 +1,135 @@
+# Imports gerais
+import argparse
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+# Imports específicos
+from instrumentacao import iniciar_servidor_metricas, medir, registrar_prontidao
+from reuse import dict_partes_questionario, qtde_perguntas_pagina
+from dados import PASTA_DADOS, carregar_dados
+from edicoes import listar_edicoes, obter_pasta_edicao
+from agregados import obter_agregados_univariados
+from cubo import obter_cubo
+from associacao import construir_associacoes, obter_associacoes
+from figuras import obter_conteudo_univariado
+
+
+# constantes
+ARQUIVO_DASH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dash.py")
+
+# Módulos importados pelas visões apenas quando necessários (ver figuras.py e univariada.py)
+MODULOS_VISOES = ("plotly.express", "st_aggrid", "univariada", "multivariada", "exploracao")
+
+
+@contextmanager
+def _medir_etapa(etapas: dict, nome: str):
+    """
+    Mede uma etapa do aquecimento (registrada também na instrumentação).
+
+    Parâmetros:
+    -----------
+    etapas:dict
+        Dicionário onde a duração (segundos) da etapa é registrada.
+    nome:str
+        Nome da etapa.
+    """
+    inicio = time.perf_counter()
+    with medir(f"aquecimento.{nome}"):
+        yield
+    etapas[nome] = time.perf_counter() - inicio
+
+
+def aquecer(pasta: str = None, partes: list = None, associacoes: bool = False) -> dict:
+    """
+    Aquece o processo antes da abertura da porta do dashboard: importa os
+    módulos das visões, carrega os dados (e os agregados pré-calculados) e
+    constrói as figuras das visões mais acessadas (primeira página de cada
+    parte da análise univariada), mantidas nos caches do processo.
+    Opcionalmente, calcula as associações (caso não existam ou estejam
+    desatualizadas), que não são calculadas pelo dashboard.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados (padrão: a edição apresentada
+        inicialmente pelo dashboard).
+    partes:list
+        Códigos das partes aquecidas (padrão: todas).
+    associacoes:bool
+        Calcula as associações de todos os pares de perguntas, se necessário.
+
+    Retornos:
+    ----------
+    etapas:dict
+        Duração (segundos) de cada etapa do aquecimento.
+    """
+    if pasta is None:
+        edicoes = listar_edicoes()
+        pasta = obter_pasta_edicao(edicoes[-1]) if edicoes else PASTA_DADOS
+    if partes is None:
+        partes = list(dict_partes_questionario.values())
+
+    etapas = {}
+    with _medir_etapa(etapas, "importacoes"):
+        for modulo in MODULOS_VISOES:
+            importlib.import_module(modulo)
+
+    with _medir_etapa(etapas, "carga"):
+        dados = carregar_dados(pasta)
+
+    with _medir_etapa(etapas, "agregados"):
+        agregados = obter_agregados_univariados(dados, pasta)
+        obter_cubo(dados, pasta)
+
+    if associacoes and obter_associacoes(dados, pasta) is None:
+        with _medir_etapa(etapas, "associacoes"):
+            construir_associacoes(pasta)
+
+    with _medir_etapa(etapas, "figuras"):
+        for parte in partes:
+            for p in dados.catalogo.perguntas(parte)[:qtde_perguntas_pagina]:
+                obter_conteudo_univariado(dados.respostas, dados.catalogo, p, "Quantidade",
+                                          agregados)
+    return etapas
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Aquece o processo (dados, agregados e figuras) e inicia o dashboard. "
+                    "Os demais argumentos são repassados ao 'streamlit run' "
+                    "(ex.: --server.port 8501).")
+    parser.add_argument("--pasta", default=None,
+                        help="Pasta com os arquivos de dados (padrão: a edição apresentada "
+                             "inicialmente pelo dashboard).")
+    parser.add_argument("--partes", nargs="*", default=None,
+                        choices=list(dict_partes_questionario.values()),
+                        help="Partes do questionário aquecidas (padrão: todas).")
+    parser.add_argument("--associacoes", action="store_true",
+                        help="Calcula as associações (caso não existam ou estejam "
+                             "desatualizadas) antes de iniciar o dashboard.")
+    args, argumentos_streamlit = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    # Prontidão disponível em /pronto durante o aquecimento (503) e após (200)
+    if os.environ.get("PORTA_METRICAS"):
+        iniciar_servidor_metricas(int(os.environ["PORTA_METRICAS"]))
+
+    etapas = aquecer(args.pasta, args.partes, args.associacoes)
+    prontidao = registrar_prontidao(etapas)
+    print(f"Pronto em {prontidao['inicializacao_s']:.2f}s ("
+          + ", ".join(f"{nome}: {segundos:.2f}s" for nome, segundos in etapas.items()) + ")",
+          flush=True)
+
+    # Inicia o servidor do Streamlit no mesmo processo (os caches aquecidos são reutilizados)
+    try:
+        from streamlit import cli as stcli
+    except ImportError:
+        # Versões mais recentes do Streamlit (>= 1.12)
+        from streamlit.web import cli as stcli
+    stcli.main(["run", ARQUIVO_DASH] + argumentos_streamlit, prog_name="streamlit")
@@ -0,0 +1,370 @@
+# Imports gerais
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# constantes
+QTDE_EXECUCOES = 100
+TIPO_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+FORMATO_LOG = "%(asctime)s %(name)s %(message)s"
+
+# O log das execuções não depende da configuração do logging pelo processo (ex.: 'streamlit
+# run ./app/dash.py' não configura o logger raiz): o logger possui o próprio handler
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter(FORMATO_LOG))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Estado do processo: métricas acumuladas por etapa e as últimas execuções
+_metricas = {}
+_execucoes = deque(maxlen=QTDE_EXECUCOES)
+_trava = threading.Lock()
+_servidor = {}
+
+# Prontidão do processo (registrada ao final do aquecimento ou da primeira execução)
+_prontidao = {}
+_inicio_importacao = time.monotonic()
+
+# Estado de cada thread: execução corrente (spans registrados e etapas abertas)
+_local = threading.local()
+
+
+def obter_memoria_rss() -> int:
+    """
+    Obtém a memória residente (RSS) do processo.
+
+    Retornos:
+    ----------
+    memoria:int
+        Memória residente em bytes (0 caso não esteja disponível, ex.: fora do Linux).
+    """
+    try:
+        with open("/proc/self/statm") as input_file:
+            return int(input_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def obter_tempo_processo() -> float:
+    """
+    Obtém o tempo decorrido desde o início do processo.
+
+    Retornos:
+    ----------
+    segundos:float
+        Tempo desde o início do processo (ou, fora do Linux, desde a
+        importação deste módulo).
+    """
+    try:
+        with open("/proc/self/stat") as input_file:
+            # O nome do processo (entre parênteses) pode conter espaços
+            campos = input_file.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as input_file:
+            atividade = float(input_file.read().split()[0])
+        return atividade - int(campos[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _inicio_importacao
+
+
+def _registrar(etapa: str, inicio: float, duracao: float, memoria: int, nivel: int):
+    """
+    Registra a medição de uma etapa (métricas do processo e execução corrente).
+
+    Parâmetros:
+    -----------
+    etapa:str
+        Nome da etapa.
+    inicio:float
+        Instante de início da etapa (time.perf_counter).
+    duracao:float
+        Duração em segundos.
+    memoria:int
+        Variação da memória residente em bytes.
+    nivel:int
+        Profundidade da etapa (etapas dentro de outras etapas).
+    """
+    with _trava:
+        quantidade, total, maximo, memoria_total = _metricas.get(etapa, (0, 0.0, 0.0, 0))
+        _metricas[etapa] = (quantidade + 1, total + duracao, max(maximo, duracao),
+                            memoria_total + memoria)
+
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        spans.append({"etapa": etapa, "nivel": nivel, "inicio_s": inicio - _local.referencia,
+                      "duracao_s": duracao, "memoria_delta_bytes": memoria})
+
+
+@contextmanager
+def medir(etapa: str):
+    """
+    Mede o tempo e a variação de memória residente de um trecho de código.
+
+    Parâmetros:
+    -----------
+    etapa:str
+        Nome da etapa (ex.: 'carga', 'render.grafico').
+    """
+    nivel = getattr(_local, "nivel", 0)
+    _local.nivel = nivel + 1
+    memoria = obter_memoria_rss()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        _local.nivel = nivel
+        _registrar(etapa, inicio, duracao, obter_memoria_rss() - memoria, nivel)
+
+
+def instrumentar(etapa: str = None):
+    """
+    Decorador que mede cada chamada de uma função.
+
+    Parâmetros:
+    -----------
+    etapa:str
+        Nome da etapa (padrão: '<módulo>.<função>').
+    """
+    def decorador(funcao):
+        nome = etapa or f"{funcao.__module__}.{funcao.__name__}"
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            with medir(nome):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+def iniciar_execucao():
+    """
+    Inicia o registro das etapas de uma execução (ex.: um rerun do dashboard)
+    na thread corrente.
+    """
+    _local.spans = []
+    _local.nivel = 0
+    _local.inicio = time.time()
+    _local.referencia = time.perf_counter()
+    _local.memoria = obter_memoria_rss()
+
+
+def finalizar_execucao() -> dict:
+    """
+    Finaliza o registro da execução corrente, armazenando-a (últimas
+    execuções) e gravando-a no log (JSON).
+
+    Retornos:
+    ----------
+    execucao:dict
+        Dicionário com o identificador, o horário, a duração, a memória
+        residente e as etapas da execução (ou None caso não tenha sido iniciada).
+    """
+    spans = getattr(_local, "spans", None)
+    if spans is None:
+        return None
+
+    memoria = obter_memoria_rss()
+    execucao = {
+        "id": uuid.uuid4().hex,
+        "inicio": _local.inicio,
+        "duracao_s": time.perf_counter() - _local.referencia,
+        "memoria_rss_bytes": memoria,
+        "memoria_delta_bytes": memoria - _local.memoria,
+        "spans": sorted(spans, key=lambda span: span["inicio_s"]),
+    }
+    _local.spans = None
+    with _trava:
+        _execucoes.append(execucao)
+    logger.info(json.dumps(execucao))
+    return execucao
+
+
+def obter_execucoes() -> list:
+    """
+    Obtém as últimas execuções registradas no processo.
+
+    Retornos:
+    ----------
+    execucoes:list
+        Lista de execuções (da mais antiga para a mais recente).
+    """
+    with _trava:
+        return list(_execucoes)
+
+
+def registrar_prontidao(etapas: dict = None) -> dict:
+    """
+    Registra (uma única vez por processo) que o processo está pronto para
+    atender as requisições, com o tempo de inicialização (cold start).
+
+    Parâmetros:
+    -----------
+    etapas:dict
+        Duração (segundos) de cada etapa da inicialização (ex.: aquecimento).
+
+    Retornos:
+    ----------
+    prontidao:dict
+        Dicionário com o tempo de inicialização, as etapas e a memória residente.
+    """
+    with _trava:
+        if not _prontidao:
+            _prontidao.update({
+                "pronto": True,
+                "inicializacao_s": obter_tempo_processo(),
+                "etapas": dict(etapas or {}),
+                "memoria_rss_bytes": obter_memoria_rss(),
+            })
+            logger.info(json.dumps({"prontidao": _prontidao}))
+        return dict(_prontidao)
+
+
+def obter_prontidao() -> dict:
+    """
+    Obtém a prontidão do processo.
+
+    Retornos:
+    ----------
+    prontidao:dict
+        Dicionário da prontidão (ver registrar_prontidao), ou None caso o
+        processo ainda não esteja pronto.
+    """
+    with _trava:
+        return dict(_prontidao) if _prontidao else None
+
+
+def obter_metricas() -> dict:
+    """
+    Obtém as métricas acumuladas (desde o início do processo) de cada etapa.
+
+    Retornos:
+    ----------
+    metricas:dict
+        Dicionário com o nome da etapa e a quantidade de chamadas, o tempo
+        total, o maior tempo (segundos) e a variação total de memória (bytes).
+    """
+    with _trava:
+        return {etapa: {"chamadas": valores[0], "segundos_total": valores[1],
+                        "segundos_max": valores[2], "memoria_bytes_total": valores[3]}
+                for etapa, valores in sorted(_metricas.items())}
+
+
+def formatar_prometheus(prefixo: str = "dashboard") -> str:
+    """
+    Obtém as métricas acumuladas do processo no formato texto do Prometheus.
+
+    Parâmetros:
+    -----------
+    prefixo:str
+        Prefixo dos nomes das métricas.
+
+    Retornos:
+    ----------
+    texto:str
+        Métricas no formato de exposição (texto) do Prometheus.
+    """
+    metricas = obter_metricas()
+    with _trava:
+        qtde_execucoes = len(_execucoes)
+
+    linhas = []
+    series = (
+        ("chamadas", "counter", "Quantidade de execuções da etapa."),
+        ("segundos_total", "counter", "Tempo total da etapa (segundos)."),
+        ("segundos_max", "gauge", "Maior tempo da etapa (segundos)."),
+        ("memoria_bytes_total", "counter", "Variação total da memória residente na etapa."),
+    )
+    for serie, tipo, descricao in series:
+        nome = f"{prefixo}_etapa_{serie}" + ("_total" if serie == "chamadas" else "")
+        linhas.append(f"# HELP {nome} {descricao}")
+        linhas.append(f"# TYPE {nome} {tipo}")
+        for etapa, valores in metricas.items():
+            linhas.append(f'{nome}{{etapa="{etapa}"}} {valores[serie]}')
+
+    linhas.append(f"# HELP {prefixo}_memoria_rss_bytes Memória residente do processo.")
+    linhas.append(f"# TYPE {prefixo}_memoria_rss_bytes gauge")
+    linhas.append(f"{prefixo}_memoria_rss_bytes {obter_memoria_rss()}")
+    linhas.append(f"# HELP {prefixo}_execucoes_registradas Execuções armazenadas no processo.")
+    linhas.append(f"# TYPE {prefixo}_execucoes_registradas gauge")
+    linhas.append(f"{prefixo}_execucoes_registradas {qtde_execucoes}")
+
+    prontidao = obter_prontidao()
+    linhas.append(f"# HELP {prefixo}_pronto Indica se o processo está pronto (aquecido).")
+    linhas.append(f"# TYPE {prefixo}_pronto gauge")
+    linhas.append(f"{prefixo}_pronto {1 if prontidao else 0}")
+    if prontidao:
+        linhas.append(f"# HELP {prefixo}_inicializacao_segundos Tempo de inicialização do processo.")
+        linhas.append(f"# TYPE {prefixo}_inicializacao_segundos gauge")
+        linhas.append(f"{prefixo}_inicializacao_segundos {prontidao['inicializacao_s']}")
+    return "\n".join(linhas) + "\n"
+
+
+class _TratadorMetricas(BaseHTTPRequestHandler):
+    """
+    Tratador HTTP das rotas /metricas (Prometheus), /execucoes (JSON) e
+    /pronto (prontidão: 200 quando pronto, 503 caso contrário).
+    """
+
+    def do_GET(self):
+        situacao = 200
+        if self.path.rstrip("/") == "/metricas":
+            tipo, corpo = TIPO_PROMETHEUS, formatar_prometheus().encode("utf-8")
+        elif self.path.rstrip("/") == "/execucoes":
+            tipo, corpo = "application/json", json.dumps(obter_execucoes()).encode("utf-8")
+        elif self.path.rstrip("/") == "/pronto":
+            prontidao = obter_prontidao()
+            situacao = 200 if prontidao else 503
+            tipo = "application/json"
+            corpo = json.dumps(prontidao or {"pronto": False}).encode("utf-8")
+        else:
+            self.send_error(404)
+            return
+        self.send_response(situacao)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_servidor_metricas(porta: int, host: str = "0.0.0.0"):
+    """
+    Inicia (uma única vez por processo) o servidor HTTP das métricas, em uma
+    thread separada.
+
+    A falha na abertura da porta (ex.: porta utilizada por outro processo) é
+    registrada no log uma única vez e não interrompe o dashboard (a
+    tentativa não é repetida nas execuções seguintes).
+
+    Parâmetros:
+    -----------
+    porta:int
+        Porta do servidor.
+    host:str
+        Endereço do servidor.
+    """
+    with _trava:
+        if _servidor:
+            return
+        try:
+            servidor = ThreadingHTTPServer((host, porta), _TratadorMetricas)
+        except OSError as erro:
+            _servidor["erro"] = erro
+            logger.warning("Servidor de métricas não iniciado (porta %d): %s", porta, erro)
+            return
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        _servidor["servidor"] = servidor
@@ -0,0 +1,181 @@
+# Imports gerais
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+# constantes
+METODOS_INTERVALO = ("Nenhum", "Wilson", "Bootstrap")
+NIVEL_CONFIANCA = 0.95
+QTDE_REPLICAS = 2000
+SEMENTE = 0
+
+
+def calcular_wilson(
+        contagens: np.ndarray,
+        totais: np.ndarray,
+        nivel: float = NIVEL_CONFIANCA) -> tuple:
+    """
+    Calcula o intervalo de Wilson das proporções (vetorizado).
+
+    Parâmetros:
+    -----------
+    contagens:np.ndarray
+        Quantidade de respostas (m x k).
+    totais:np.ndarray
+        Base de cada linha (m).
+    nivel:float
+        Nível de confiança.
+
+    Retornos:
+    ----------
+    inferior:np.ndarray
+        Limite inferior das proporções (m x k; NaN quando a base é zero).
+    superior:np.ndarray
+        Limite superior das proporções (m x k; NaN quando a base é zero).
+    """
+    z = NormalDist().inv_cdf(0.5 + nivel / 2)
+    n = np.broadcast_to(totais[:, None], contagens.shape).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = contagens / n
+        denominador = 1 + z ** 2 / n
+        centro = (p + z ** 2 / (2 * n)) / denominador
+        margem = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominador
+    return np.clip(centro - margem, 0, 1), np.clip(centro + margem, 0, 1)
+
+
+def calcular_bootstrap(
+        contagens: np.ndarray,
+        totais: np.ndarray,
+        exclusivas: bool,
+        nivel: float = NIVEL_CONFIANCA,
+        replicas: int = QTDE_REPLICAS,
+        semente: int = SEMENTE) -> tuple:
+    """
+    Calcula o intervalo bootstrap (percentil) das proporções.
+
+    As réplicas são sorteadas diretamente das contagens, em um único lote
+    para todas as linhas: distribuição multinomial quando as alternativas
+    são exclusivas (a diferença para a base corresponde aos respondentes sem
+    resposta; sorteada como uma sequência de binomiais condicionais) e
+    binomial (de cada alternativa) caso contrário. O resultado
+    equivale à reamostragem dos respondentes, sem acessá-los.
+
+    Parâmetros:
+    -----------
+    contagens:np.ndarray
+        Quantidade de respostas (m x k).
+    totais:np.ndarray
+        Base de cada linha (m).
+    exclusivas:bool
+        Indica se cada respondente marca no máximo uma alternativa da linha.
+    nivel:float
+        Nível de confiança.
+    replicas:int
+        Quantidade de réplicas.
+    semente:int
+        Semente do gerador (os intervalos são reprodutíveis entre execuções).
+
+    Retornos:
+    ----------
+    inferior:np.ndarray
+        Limite inferior das proporções (m x k; NaN quando a base é zero).
+    superior:np.ndarray
+        Limite superior das proporções (m x k; NaN quando a base é zero).
+    """
+    gerador = np.random.default_rng(semente)
+    # Bases ponderadas (tamanho efetivo) são arredondadas para o sorteio
+    totais = np.rint(totais).astype(np.int64)
+    validos = totais > 0
+    base = np.where(validos, totais, 1)
+    proporcoes = np.where(validos[:, None], np.clip(contagens / base[:, None], 0, 1), 0.0)
+
+    if exclusivas:
+        # Multinomial por binomiais condicionais (vetorizadas nas réplicas e linhas)
+        amostras = np.empty((replicas,) + proporcoes.shape, dtype=np.int64)
+        restantes = np.broadcast_to(totais, (replicas, len(totais))).copy()
+        massa = np.ones(len(totais))
+        for j in range(proporcoes.shape[1]):
+            condicional = np.divide(proporcoes[:, j], massa, out=np.zeros(len(totais)),
+                                    where=massa > 0)
+            amostras[..., j] = gerador.binomial(restantes, np.clip(condicional, 0, 1))
+            restantes -= amostras[..., j]
+            massa = massa - proporcoes[:, j]
+    else:
+        amostras = gerador.binomial(totais[:, None], proporcoes,
+                                    size=(replicas,) + proporcoes.shape)
+
+    alfa = 1 - nivel
+    inferior, superior = np.quantile(amostras / base[:, None], [alfa / 2, 1 - alfa / 2], axis=0)
+    inferior[~validos] = np.nan
+    superior[~validos] = np.nan
+    return inferior, superior
+
+
+def calcular_intervalos(
+        contagens: np.ndarray,
+        totais,
+        metodo: str,
+        exclusivas: bool = True) -> tuple:
+    """
+    Calcula o intervalo de confiança dos percentuais.
+
+    Parâmetros:
+    -----------
+    contagens:np.ndarray
+        Quantidade de respostas (vetor com k alternativas ou matriz m x k).
+    totais:int|np.ndarray
+        Base do percentual (escalar ou vetor com m linhas).
+    metodo:str
+        "Wilson" ou "Bootstrap" (ver METODOS_INTERVALO).
+    exclusivas:bool
+        Indica se cada respondente marca no máximo uma alternativa da linha.
+
+    Retornos:
+    ----------
+    inferior:np.ndarray
+        Limite inferior dos percentuais (mesmo formato das contagens).
+    superior:np.ndarray
+        Limite superior dos percentuais (mesmo formato das contagens).
+    """
+    contagens = np.asarray(contagens)
+    matriz = np.atleast_2d(contagens)
+    totais = np.broadcast_to(np.asarray(totais), (matriz.shape[0],))
+
+    if metodo == "Wilson":
+        inferior, superior = calcular_wilson(matriz, totais)
+    elif metodo == "Bootstrap":
+        inferior, superior = calcular_bootstrap(matriz, totais, exclusivas)
+    else:
+        raise ValueError(f"Método de intervalo desconhecido: {metodo}")
+    return (inferior * 100).reshape(contagens.shape), (superior * 100).reshape(contagens.shape)
+
+
+def formatar_intervalos(
+        tabela: pd.DataFrame,
+        inferior: np.ndarray,
+        superior: np.ndarray) -> pd.DataFrame:
+    """
+    Formata as células de uma tabela de percentuais com os intervalos de
+    confiança (ex.: "12.5 [10.1; 15.2]").
+
+    Parâmetros:
+    -----------
+    tabela:pd.DataFrame
+        Tabela de percentuais.
+    inferior:np.ndarray
+        Limite inferior dos percentuais.
+    superior:np.ndarray
+        Limite superior dos percentuais.
+
+    Retornos:
+    ----------
+    tabela:pd.DataFrame
+        Tabela (de textos) com os percentuais e os intervalos.
+    """
+    valores = tabela.to_numpy()
+    textos = [[f"{v:.2f} [{i:.2f}; {s:.2f}]" if not np.isnan(i) else f"{v:.2f}"
+               for v, i, s in zip(*linha)]
+              for linha in zip(valores, inferior, superior)]
+    return pd.DataFrame(textos, index=tabela.index, columns=tabela.columns)
@@ -1,171 +1,323 @@
 # Imports gerais
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-from st_aggrid import AgGrid
+import plotly.io as pio
+# st_aggrid é importado nas funções que apresentam as tabelas (inicialização mais rápida)
 
 # Imports específicos
 from reuse import dict_partes_questionario
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas
+from cubo import CuboTabelas
+from segmentos import Segmento
+from agregacao import MODOS_BIVARIADOS, paginar
+from intervalos import METODOS_INTERVALO, NIVEL_CONFIANCA
+from figuras import (obter_conteudo_bivariado, obter_conteudo_combinacoes,
+                     obter_conteudo_estratificado)
+from instrumentacao import instrumentar, medir
+
+
+# constantes
+QTDE_ALTERNATIVAS_PADRAO = 15
+TAMANHO_PAGINA = 50
+OBSERVACAO_PERCENTUAL = ("<small>**Observação:** O percentual por linha (coluna) é calculado em "
+                         "relação aos respondentes de ambas as perguntas que marcaram a "
+                         "alternativa da linha (coluna)</small>")
+
+
+def selecionar_modo(chave:str) -> tuple:
+    """
+    Apresenta a seleção do modo de exibição da tabela cruzada (quantidade ou
+    percentual) e, nos percentuais, do método do intervalo de confiança.
+
+    Parâmetros
+    ----------
+    chave: str
+        Chave do widget de seleção do modo.
+
+    Retornos
+    --------
+    modo: str
+        "Quantidade", "Percentual (linha)" ou "Percentual (coluna)".
+    intervalo: str
+        Método do intervalo de confiança (ver METODOS_INTERVALO).
+    """
+    modo = st.sidebar.selectbox("Apresentar quantidade ou percentual?", MODOS_BIVARIADOS,
+                                key=chave)
+    # Intervalo de confiança dos percentuais (apresentado em cada célula)
+    intervalo = "Nenhum"
+    if modo != "Quantidade":
+        intervalo = st.sidebar.selectbox(f"Intervalo de confiança ({NIVEL_CONFIANCA:.0%}):",
+                                         METODOS_INTERVALO, key="intervalo")
+    return modo, intervalo
 
 
+@instrumentar()
 def apresentar_resultado_unica_multiplos(
-    df:pd.DataFrame, 
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas, 
     idx_pergunta1:int, 
     idx_pergunta2:int,
-    textos_alternativo:dict, 
-    resposta_multipla:dict):
+    cubo:CuboTabelas=None,
+    segmento:Segmento=None,
+    limites:tuple=None):
     """
     Apresenta o resultado de uma questão de uma única resposta para múltiplas respostas.
 
     Parâmetros
     ----------
-    df: pd.DataFrame
-        Dataframe com as respostas.
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
     idx_pergunta1: int
         Índice da questão de uma única resposta.
     idx_pergunta2: int
         Índice da questão de múltiplas respostas.
-    textos_alternativo: dict
-        Dicionário com os textos das alternativas.
-    resposta_multipla: dict
-        Dicionário com os índices das questões de múltiplas respostas.
+    cubo: CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites: tuple
+        Quantidade máxima de alternativas de cada pergunta (as demais são agrupadas em "Outros").
     """
 
-    # Subset da tabela com as respostas
-    df_2 = df.copy()
+    # Seleção do modo de exibição (quantidade ou percentual)
+    modo, intervalo = selecionar_modo("modo_unica_multiplos")
 
-    # Altera o nome das colunas para os textos das alternativas
-    df_2 = df_2.rename(
-        columns={df_2.columns[idx_pergunta1]: textos_alternativo[idx_pergunta1]})
-    for c in resposta_multipla[idx_pergunta2]:
-        df_2 = df_2.rename(columns={df_2.columns[c]: textos_alternativo[c]})
-
-    # Prepara o dataframe para agrupar as respostas
-    cols = [df_2.columns[idx_pergunta1]] + \
-        list(df_2.columns[resposta_multipla[idx_pergunta2]])
-    r = df_2[cols]
-    r_agg = r.groupby(r.columns[0]).sum()
-    st.table(r_agg)
+    # Tabela cruzada (alternativas da questão de única resposta nas linhas)
+    r_agg, figura = obter_conteudo_bivariado(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                             modo, cubo, segmento, intervalo, limites)
+    with medir("render.tabela"):
+        st.table(r_agg)
 
     # Exibe o gráfico
-    fig = px.imshow(r_agg, text_auto=True, labels=dict(color="Quantidade"))
-    st.plotly_chart(fig)
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
+    if modo != "Quantidade":
+        st.markdown(OBSERVACAO_PERCENTUAL, unsafe_allow_html=True)
 
 
+@instrumentar()
 def apresentar_resultado_multios_unica(
-    df:pd.DataFrame, 
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas, 
     idx_pergunta1:int, 
     idx_pergunta2:int,
-    textos_alternativo:dict, 
-    resposta_multipla:dict):
+    cubo:CuboTabelas=None,
+    segmento:Segmento=None,
+    limites:tuple=None):
     """
     Apresenta o resultado de uma questão de múltiplas respostas para uma única resposta.
 
     Parâmetros
     ----------
-    df: pd.DataFrame
-        Dataframe com as respostas.
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
     idx_pergunta1: int
         Índice da questão de múltiplas respostas.
     idx_pergunta2: int
         Índice da questão de uma única resposta.
-    textos_alternativo: dict
-        Dicionário com os textos das alternativas.
-    resposta_multipla: dict
-        Dicionário com os índices das questões de uma única resposta.
+    cubo: CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites: tuple
+        Quantidade máxima de alternativas de cada pergunta (as demais são agrupadas em "Outros").
     """
 
-    # Subset da tabela com as respostas
-    df_2 = df.copy()
-
-    # Altera o nome das colunas para os textos das alternativas
-    df_2 = df_2.rename(
-        columns={df_2.columns[idx_pergunta2]: textos_alternativo[idx_pergunta2]})
-    for c in resposta_multipla[idx_pergunta1]:
-        df_2 = df_2.rename(columns={df_2.columns[c]: textos_alternativo[c]})
+    # Seleção do modo de exibição (quantidade ou percentual)
+    modo, intervalo = selecionar_modo("modo_multiplos_unica")
 
-    # Prepara o dataframe para agrupar as respostas
-    cols = [df_2.columns[idx_pergunta2]] + \
-        list(df_2.columns[resposta_multipla[idx_pergunta1]])
-    r = df_2[cols]
-    r_agg = r.groupby(r.columns[0]).sum()
-    st.table(r_agg.T)
+    # Tabela cruzada (alternativas da questão de múltiplas respostas nas linhas)
+    r_agg, figura = obter_conteudo_bivariado(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                             modo, cubo, segmento, intervalo, limites)
+    with medir("render.tabela"):
+        st.table(r_agg)
 
     # Exibe o gráfico
-    fig = px.imshow(r_agg.T, text_auto=True, labels=dict(color="Quantidade"))
-    st.plotly_chart(fig)
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
+    if modo != "Quantidade":
+        st.markdown(OBSERVACAO_PERCENTUAL, unsafe_allow_html=True)
 
 
+@instrumentar()
 def apresentar_resultado_unica_unica(
-    df:pd.DataFrame, 
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas, 
     idx_pergunta1:int, 
     idx_pergunta2:int,
-    textos_alternativo:dict):
+    cubo:CuboTabelas=None,
+    segmento:Segmento=None,
+    limites:tuple=None):
     """
     Apresenta o resultado de uma questão de uma única resposta para uma única resposta.
 
     Parâmetros
     ----------
-    df: pd.DataFrame
-        Dataframe com as respostas.
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
     idx_pergunta1: int
         Índice da questão de uma única resposta.
     idx_pergunta2: int
         Índice da questão de uma única resposta.
-    textos_alternativo: dict
-        Dicionário com os textos das alternativas.
+    cubo: CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites: tuple
+        Quantidade máxima de alternativas de cada pergunta (as demais são agrupadas em "Outros").
+    """
+
+    from st_aggrid import AgGrid
+
+    # Tabela cruzada (apenas as combinações observadas, no formato longo)
+    sub_agg, figura, figura_percentual = obter_conteudo_combinacoes(
+        respostas, catalogo, idx_pergunta1, idx_pergunta2, cubo, segmento, limites)
+
+    # Paginação no servidor (apenas a página selecionada é enviada ao navegador)
+    qtde_paginas = -(-len(sub_agg) // TAMANHO_PAGINA)
+    pagina = 1
+    if qtde_paginas > 1:
+        pagina = st.number_input(f"Página (de {qtde_paginas}):", min_value=1,
+                                 max_value=qtde_paginas, value=1, step=1)
+    sub_pagina, _ = paginar(sub_agg, int(pagina), TAMANHO_PAGINA)
+    with medir("render.grid"):
+        AgGrid(sub_pagina,
+               theme='material',
+               fit_columns_on_grid_load=True)
+    if qtde_paginas > 1:
+        st.caption(f"{len(sub_agg)} combinações observadas ({TAMANHO_PAGINA} por página).")
+
+    # Exibe o gráfico
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
+        st.plotly_chart(pio.from_json(figura_percentual))
+
+
+@instrumentar()
+def apresentar_resultado_multiplos_multiplos(
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas, 
+    idx_pergunta1:int, 
+    idx_pergunta2:int,
+    cubo:CuboTabelas=None,
+    segmento:Segmento=None,
+    limites:tuple=None):
+    """
+    Apresenta o resultado de uma questão de múltiplas respostas para múltiplas respostas.
+
+    Parâmetros
+    ----------
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1: int
+        Índice da primeira questão de múltiplas respostas.
+    idx_pergunta2: int
+        Índice da segunda questão de múltiplas respostas.
+    cubo: CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites: tuple
+        Quantidade máxima de alternativas de cada pergunta (as demais são agrupadas em "Outros").
     """
 
-    # Subset da tabela com as respostas
-    sub = df[[df.columns[idx_pergunta1], df.columns[idx_pergunta2]]]
-    sub['c'] = 1
-    sub_agg = sub.groupby(
-        [df.columns[idx_pergunta1], df.columns[idx_pergunta2]]).agg('count')[['c']]
-    sub_agg = sub_agg.reset_index()
-    sub_agg.rename(columns={'c': 'Quantidade',
-                            sub_agg.columns[0]: textos_alternativo[idx_pergunta1],
-                            sub_agg.columns[1]: textos_alternativo[idx_pergunta2]}, inplace=True)
-    sub_agg = sub_agg.sort_values(
-        by=['Quantidade'], ascending=False, ignore_index=True)
-    AgGrid(sub_agg,
-           theme='material',
-           fit_columns_on_grid_load=True)
+    # Seleção do modo de exibição (quantidade ou percentual)
+    modo, intervalo = selecionar_modo("modo_multiplos")
+    r_agg, figura = obter_conteudo_bivariado(respostas, catalogo, idx_pergunta1, idx_pergunta2,
+                                             modo, cubo, segmento, intervalo, limites)
+    with medir("render.tabela"):
+        st.table(r_agg)
 
     # Exibe o gráfico
-    fig = px.bar(
-        sub_agg, x=sub_agg.columns[0], y="Quantidade", color=sub_agg.columns[1])
-    st.plotly_chart(fig)
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
+    if modo != "Quantidade":
+        st.markdown(OBSERVACAO_PERCENTUAL, unsafe_allow_html=True)
 
-    fig = px.histogram(sub_agg, x=sub_agg.columns[0], y="Quantidade",
-                       color=sub_agg.columns[1], barnorm="percent")
-    fig.update_layout(
-        yaxis_title="Percentual(%)",
-    )
-    st.plotly_chart(fig)
 
+@instrumentar()
+def apresentar_resultado_estratificado(
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas, 
+    idx_pergunta1:int, 
+    idx_pergunta2:int,
+    idx_controle:int,
+    segmento:Segmento=None,
+    limites:tuple=None,
+    limite_estratos:int=None):
+    """
+    Apresenta o resultado de duas questões (de qualquer tipo) em cada estrato de uma questão de controle.
 
+    Parâmetros
+    ----------
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1: int
+        Índice da primeira questão (linhas das tabelas).
+    idx_pergunta2: int
+        Índice da segunda questão (colunas das tabelas).
+    idx_controle: int
+        Índice da questão de controle (uma única resposta).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    limites: tuple
+        Quantidade máxima de alternativas de cada pergunta (as demais são agrupadas em "Outros").
+    limite_estratos: int
+        Quantidade máxima de estratos (os menores são agrupados em "Outros").
+    """
+
+    # Seleção do modo de exibição (quantidade ou percentual)
+    modo = st.sidebar.selectbox("Apresentar quantidade ou percentual?", MODOS_BIVARIADOS,
+                                key="modo_estratificado")
+    tabelas, figura = obter_conteudo_estratificado(respostas, catalogo, idx_pergunta1,
+                                                   idx_pergunta2, idx_controle, modo, segmento,
+                                                   limites, limite_estratos)
+    if not tabelas:
+        st.info("Nenhum respondente respondeu a questão de controle.")
+        return
+
+    # Uma tabela por estrato (apenas a primeira expandida)
+    with medir("render.tabela"):
+        for i, (estrato, tabela) in enumerate(tabelas.items()):
+            with st.expander(f"{catalogo.texto(idx_controle)}: {estrato}", expanded=(i == 0)):
+                st.table(tabela)
+
+    # Exibe os mapas de calor (um por estrato)
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura), use_container_width=True)
+    st.markdown(
+        "<small>**Observação:** Respondentes sem resposta na questão de controle não são considerados</small>", unsafe_allow_html=True)
+
+
+@instrumentar()
 def apresentar_analise_multivariada(
-    df:pd.DataFrame, 
-    tipo_pergunta:dict, 
-    resposta_multipla:dict,
-    categoria_pergunta:dict, 
-    textos_alternativo:dict):
+    respostas:RespostasCompactas, 
+    catalogo:CatalogoPerguntas,
+    cubo:CuboTabelas=None,
+    segmento:Segmento=None):
     """
     Apresenta o resultada da análise multivariada.
 
     Parâmetros
     ----------
-    df: pd.DataFrame
-        Dataframe com as respostas.
-    tipo_pergunta: dict
-        Dicionário com os tipos de pergunta.
-    resposta_multipla: dict
-        Dicionário com os índices das questões de múltiplas respostas.
-    categoria_pergunta: dict
-        Dicionário com os índices das questões de categoria.
-    textos_alternativo: dict
-        Dicionário com os textos das alternativas.
+    respostas: RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo: CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    cubo: CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+    segmento: Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
     """
 
     pergunta_var1 = ""
@@ -179,10 +331,8 @@ def apresentar_analise_multivariada(
     # Caso seja selecionada uma parte do questionário
     if opcao_parte1 != "":
         parte1 = dict_partes_questionario[opcao_parte1]
-        perguntas1 = categoria_pergunta[parte1]
-        textos_perguntas1 = [textos_alternativo[p] for p in perguntas1]
-        pergunta_var1 = st.sidebar.selectbox("Selecione a pergunta da primeira variável:", [
-                                             ""] + textos_perguntas1, key="perg_var1")
+        pergunta_var1 = st.sidebar.selectbox("Selecione a pergunta da primeira variável:", (
+                                             "",) + catalogo.textos_perguntas(parte1), key="perg_var1")
 
     # Seleção da primeira questão (variável)
     st.sidebar.write("**Variável 2:**")
@@ -191,44 +341,55 @@ def apresentar_analise_multivariada(
     # Caso seja selecionada uma parte do questionário
     if opcao_parte2 != "":
         parte2 = dict_partes_questionario[opcao_parte2]
-        perguntas2 = categoria_pergunta[parte2]
-        textos_perguntas2 = [textos_alternativo[p] for p in perguntas2]
-        pergunta_var2 = st.sidebar.selectbox("Selecione a pergunta da primeira variável:", [
-                                             ""] + textos_perguntas2, key="perg_var2")
+        pergunta_var2 = st.sidebar.selectbox("Selecione a pergunta da primeira variável:", (
+                                             "",) + catalogo.textos_perguntas(parte2), key="perg_var2")
+
+    # Seleção da questão de controle (opcional; apenas questões de uma única resposta)
+    pergunta_controle = ""
+    st.sidebar.write("**Variável de controle (opcional):**")
+    opcao_parte3 = st.sidebar.selectbox("Selecione a parte do questionário:", [
+                                        ""] + list(dict_partes_questionario.keys()), key="parte_controle")
+    if opcao_parte3 != "":
+        parte3 = dict_partes_questionario[opcao_parte3]
+        unicas = tuple(t for t in catalogo.textos_perguntas(parte3)
+                       if not catalogo.eh_multipla(catalogo.indice(t)))
+        pergunta_controle = st.sidebar.selectbox("Selecione a pergunta de controle:", (
+                                                 "",) + unicas, key="perg_controle")
 
     # Caso as perguntas tenham sido selecionadas
     if pergunta_var1 != "" and pergunta_var2 != "":
         # Se as perguntas forem iguais
-        if pergunta_var1 == pergunta_var2:
+        if pergunta_var1 == pergunta_var2 or pergunta_controle in (pergunta_var1, pergunta_var2):
             # Exibe mensagem de erro
             st.error("Por favor, selecione perguntas distintas.")
         # Se as perguntas forem diferentes
         else:
             # Processamento da análise multivariada
-            idx_pergunta1 = textos_alternativo.index(pergunta_var1)
-            idx_pergunta2 = textos_alternativo.index(pergunta_var2)
+            idx_pergunta1 = catalogo.indice(pergunta_var1)
+            idx_pergunta2 = catalogo.indice(pergunta_var2)
 
             st.write(f"**Variável 1: {pergunta_var1}**")
             st.write(f"**Variável 2: {pergunta_var2}**")
 
-            # Seleciona o tipo correto da analise multivariada
-            if idx_pergunta1 in tipo_pergunta['unica'] and \
-               idx_pergunta2 in tipo_pergunta['unica']:
-
-                apresentar_resultado_unica_unica(df, idx_pergunta1,
-                                                 idx_pergunta2, textos_alternativo)
-            elif idx_pergunta1 in tipo_pergunta['unica'] and \
-                    idx_pergunta2 in tipo_pergunta['multipla']:
-
-                apresentar_resultado_unica_multiplos(df, idx_pergunta1, idx_pergunta2,
-                                                     textos_alternativo, resposta_multipla)
-
-            elif idx_pergunta1 in tipo_pergunta['multipla'] and \
-                    idx_pergunta2 in tipo_pergunta['unica']:
-                apresentar_resultado_multios_unica(df, idx_pergunta1, idx_pergunta2,
-                                                   textos_alternativo, resposta_multipla)
-
+            # Alternativas excedentes (menos frequentes) agrupadas em "Outros"
+            limite = int(st.sidebar.number_input(
+                "Máximo de alternativas por pergunta:", min_value=2,
+                value=QTDE_ALTERNATIVAS_PADRAO, step=1, key="limite_alternativas"))
+
+            # Com a variável de controle, a análise é apresentada em cada estrato
+            if pergunta_controle != "":
+                st.write(f"**Variável de controle: {pergunta_controle}**")
+                apresentar_resultado_estratificado(respostas, catalogo, idx_pergunta1,
+                                                   idx_pergunta2,
+                                                   catalogo.indice(pergunta_controle), segmento,
+                                                   (limite, limite), limite)
             else:
-                # Débito técnico
-                # TODO: implementar o caso de perguntas de múltiplas respostas e categoria
-                st.info("A exibição entre respostas para perguntas de múltiplas escolhas ainda não foi implementada.")
+                # Seleciona o tipo correto da analise multivariada
+                apresentar = {
+                    ('unica', 'unica'): apresentar_resultado_unica_unica,
+                    ('unica', 'multipla'): apresentar_resultado_unica_multiplos,
+                    ('multipla', 'unica'): apresentar_resultado_multios_unica,
+                    ('multipla', 'multipla'): apresentar_resultado_multiplos_multiplos,
+                }[(catalogo.tipo(idx_pergunta1), catalogo.tipo(idx_pergunta2))]
+                apresentar(respostas, catalogo, idx_pergunta1, idx_pergunta2, cubo, segmento,
+                           (limite, limite))
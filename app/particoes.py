@@ -0,0 +1,182 @@
+# Imports gerais
+import argparse
+import json
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Imports específicos
+from catalogo import (ARQUIVO_CATALOGO, CatalogoPerguntas, converter_pickles, ler_catalogo,
+                      salvar_catalogo)
+
+
+# constantes
+ARQUIVO_PARTICOES = "particoes.json"
+VERSAO_PARTICOES = 1
+
+
+def _obter_colunas(arquivo: str) -> list:
+    """
+    Obtém os nomes das colunas do dataframe gravado em um arquivo Parquet
+    (sem as colunas de índice gravadas pelo pandas).
+
+    Parâmetros:
+    -----------
+    arquivo:str
+        Caminho do arquivo Parquet.
+
+    Retornos:
+    ----------
+    colunas:list
+        Nomes das colunas, na ordem (posição) do dataframe.
+    """
+    esquema = pq.read_schema(arquivo)
+    indices = set()
+    if esquema.pandas_metadata:
+        indices = {c for c in esquema.pandas_metadata.get("index_columns", [])
+                   if isinstance(c, str)}
+    return [nome for nome in esquema.names if nome not in indices]
+
+
+def particionar(
+        catalogo: CatalogoPerguntas,
+        arquivo_origem: str,
+        pasta_destino: str) -> CatalogoPerguntas:
+    """
+    Grava as respostas de uma edição no formato particionado: um arquivo
+    Parquet por parte do questionário, apenas com as colunas das perguntas
+    (e alternativas) da parte.
+
+    As colunas que não pertencem a nenhuma parte não são gravadas, portanto
+    os índices do catálogo são renumerados (posição da coluna na
+    concatenação das partes) e o novo catálogo é gravado junto às partes.
+
+    Parâmetros:
+    -----------
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas da edição.
+    arquivo_origem:str
+        Arquivo Parquet com todas as respostas da edição.
+    pasta_destino:str
+        Pasta da edição particionada.
+
+    Retornos:
+    ----------
+    catalogo:CatalogoPerguntas
+        Catálogo com os índices renumerados.
+    """
+    nomes = _obter_colunas(arquivo_origem)
+
+    # Colunas (perguntas e alternativas) de cada parte, sem repetição
+    partes = {}
+    posicoes = {}
+    for parte, perguntas in catalogo.partes.items():
+        partes[parte] = []
+        for p in perguntas:
+            colunas = (p,) + (catalogo.alternativas(p) if catalogo.eh_multipla(p) else ())
+            for c in colunas:
+                if c not in posicoes:
+                    posicoes[c] = len(posicoes)
+                    partes[parte].append(c)
+
+    # Leitura projetada (apenas as colunas da parte) e gravação de cada parte
+    os.makedirs(pasta_destino, exist_ok=True)
+    for parte, colunas in partes.items():
+        tabela = pq.read_table(arquivo_origem, columns=[nomes[c] for c in colunas])
+        pq.write_table(tabela, os.path.join(pasta_destino, f"{parte}.parquet"),
+                       compression="zstd")
+
+    # Catálogo com os índices renumerados
+    novo = CatalogoPerguntas(
+        [catalogo.texto(c) for c in posicoes],
+        {"unica": [posicoes[p] for p in catalogo.unicas if p in posicoes],
+         "multipla": [posicoes[p] for p in catalogo.multiplas if p in posicoes]},
+        {posicoes[p]: [posicoes[c] for c in catalogo.alternativas(p)]
+         for p in catalogo.multiplas if p in posicoes},
+        {parte: [posicoes[p] for p in perguntas] for parte, perguntas in catalogo.partes.items()})
+    salvar_catalogo(novo, os.path.join(pasta_destino, ARQUIVO_CATALOGO))
+
+    caminho = os.path.join(pasta_destino, ARQUIVO_PARTICOES)
+    with open(caminho, "w", encoding="utf-8") as output_file:
+        json.dump({"versao": VERSAO_PARTICOES,
+                   "partes": {parte: [nomes[c] for c in colunas]
+                              for parte, colunas in partes.items()}},
+                  output_file, ensure_ascii=False)
+    return novo
+
+
+def ler_indice_particoes(pasta: str) -> dict:
+    """
+    Lê o índice das partições de uma edição.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta da edição particionada.
+
+    Retornos:
+    ----------
+    partes:dict
+        Dicionário com o código da parte e os nomes das suas colunas, na
+        ordem de concatenação das partes.
+    """
+    with open(os.path.join(pasta, ARQUIVO_PARTICOES), encoding="utf-8") as input_file:
+        indice = json.load(input_file)
+    if indice.get("versao") != VERSAO_PARTICOES:
+        raise ValueError(f"Versão das partições não suportada: {indice.get('versao')}")
+    return indice["partes"]
+
+
+def ler_colunas(pasta: str, colunas: list, partes: dict = None) -> pd.DataFrame:
+    """
+    Lê (com leitura projetada) apenas algumas colunas de uma edição particionada.
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta da edição particionada.
+    colunas:list
+        Índices (posição no catálogo da edição) das colunas.
+    partes:dict
+        Índice das partições (opcional; lido da pasta, se omitido).
+
+    Retornos:
+    ----------
+    df:pd.DataFrame
+        Dataframe com as colunas, na ordem solicitada.
+    """
+    if partes is None:
+        partes = ler_indice_particoes(pasta)
+    posicoes = [(parte, nome) for parte, nomes in partes.items() for nome in nomes]
+
+    # Agrupa as colunas por parte (uma leitura por arquivo)
+    por_parte = {}
+    for c in colunas:
+        parte, nome = posicoes[c]
+        por_parte.setdefault(parte, []).append(nome)
+
+    frames = [pq.read_table(os.path.join(pasta, f"{parte}.parquet"), columns=nomes).to_pandas()
+              for parte, nomes in por_parte.items()]
+    df = pd.concat(frames, axis=1)
+    return df[[posicoes[c][1] for c in colunas]]
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Converte os dados de uma edição para o formato particionado (uma "
+                    "partição por parte do questionário).")
+    parser.add_argument("origem", help="Pasta com os arquivos de dados da edição (df.parquet).")
+    parser.add_argument("destino", help="Pasta da edição particionada (ex.: ./data/edicoes/2021).")
+    args = parser.parse_args()
+
+    caminho_catalogo = os.path.join(args.origem, ARQUIVO_CATALOGO)
+    if os.path.exists(caminho_catalogo):
+        catalogo = ler_catalogo(caminho_catalogo)
+    else:
+        catalogo = converter_pickles(args.origem)
+
+    catalogo = particionar(catalogo, os.path.join(args.origem, "df.parquet"), args.destino)
+    print(f"Edição particionada gravada em {args.destino} ({len(catalogo.partes)} partes)")
@@ -0,0 +1,309 @@
+# Imports gerais
+import argparse
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+# Imports específicos
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from segmentos import Segmento
+from cache import CacheLRU
+
+
+# constantes
+ARQUIVO_MARGENS = "margens.json"
+VERSAO_MARGENS = 1
+TOLERANCIA_RAKING = 1e-6
+MAX_ITERACOES_RAKING = 100
+CAPACIDADE_PONDERACOES = 16
+
+# Cache do processo para o arquivo de margens (um por pasta) e as ponderações calculadas
+_cache = {}
+_trava = threading.Lock()
+_ponderacoes = CacheLRU(CAPACIDADE_PONDERACOES)
+
+
+@dataclass(frozen=True, eq=False)
+class Ponderacao:
+    """
+    Pesos dos respondentes obtidos por raking (ajuste proporcional iterativo)
+    em relação a um conjunto de margens da população.
+
+    Os pesos têm média 1 (a soma dos pesos é a quantidade de respondentes).
+    O erro é a maior diferença absoluta entre as proporções ponderadas e as
+    margens ao final do ajuste; o histórico contém o erro de cada iteração.
+    """
+    chave: tuple
+    pesos: np.ndarray
+    iteracoes: int
+    convergiu: bool
+    erro: float
+    historico: tuple
+    n_respondentes: int
+    tamanho_efetivo: float
+
+
+def calcular_raking(
+        codigos: list,
+        alvos: list,
+        tolerancia: float = TOLERANCIA_RAKING,
+        max_iteracoes: int = MAX_ITERACOES_RAKING) -> tuple:
+    """
+    Calcula os pesos dos respondentes por raking (IPF): a cada iteração, os
+    pesos são multiplicados, variável por variável, pela razão entre a margem
+    desejada e a margem ponderada da alternativa de cada respondente.
+
+    O ajuste é vetorizado: as margens ponderadas são obtidas com np.bincount
+    sobre os códigos e os fatores são aplicados por indexação (fator[codigo]).
+    Os respondentes sem resposta em alguma das variáveis mantêm o peso 1.
+
+    Parâmetros:
+    -----------
+    codigos:list
+        Códigos das alternativas de cada variável (vetores de mesmo tamanho;
+        -1 para respostas ausentes).
+    alvos:list
+        Proporções desejadas das alternativas de cada variável (somam 1).
+    tolerancia:float
+        Maior diferença absoluta entre as proporções ponderadas e os alvos
+        para considerar o ajuste convergido.
+    max_iteracoes:int
+        Quantidade máxima de iterações.
+
+    Retornos:
+    ----------
+    pesos:np.ndarray
+        Peso de cada respondente (float64).
+    iteracoes:int
+        Quantidade de iterações realizadas.
+    convergiu:bool
+        Indica se a tolerância foi atingida.
+    erro:float
+        Maior diferença absoluta entre as proporções ponderadas e os alvos.
+    historico:tuple
+        Erro no início de cada iteração.
+    """
+    completos = np.logical_and.reduce([c >= 0 for c in codigos])
+    codigos = [c[completos].astype(np.intp) for c in codigos]
+    alvos = [np.asarray(a, dtype=np.float64) for a in alvos]
+    pesos_completos = np.ones(int(np.count_nonzero(completos)))
+
+    def calcular_erro() -> float:
+        total = pesos_completos.sum()
+        return max(float(np.abs(np.bincount(c, weights=pesos_completos, minlength=len(a))
+                                / total - a).max())
+                   for c, a in zip(codigos, alvos))
+
+    historico = []
+    iteracoes = 0
+    while iteracoes < max_iteracoes:
+        erro = calcular_erro()
+        historico.append(erro)
+        if erro < tolerancia:
+            break
+        iteracoes += 1
+        for c, a in zip(codigos, alvos):
+            margem = np.bincount(c, weights=pesos_completos, minlength=len(a))
+            fator = np.divide(a * pesos_completos.sum(), margem, out=np.ones(len(a)),
+                              where=margem > 0)
+            pesos_completos *= fator[c]
+
+    erro = calcular_erro()
+    pesos = np.ones(len(completos))
+    if len(pesos_completos) > 0:
+        # Mantém a média dos pesos igual a 1 (os respondentes incompletos têm peso 1)
+        pesos[completos] = pesos_completos * len(pesos_completos) / pesos_completos.sum()
+    return pesos, iteracoes, erro < tolerancia, erro, tuple(historico)
+
+
+def ler_margens(pasta: str = PASTA_DADOS) -> dict:
+    """
+    Lê os conjuntos de margens da população utilizados na ponderação.
+
+    O arquivo (margens.json) associa o nome de cada conjunto às perguntas de
+    unica escolha (índice ou texto) e às proporções de cada alternativa (as
+    proporções são normalizadas para somar 1):
+
+    {"versao": 1, "conjuntos": {"Região": {"Região onde mora": {"Sudeste": 0.5, ...}}}}
+
+    Parâmetros:
+    -----------
+    pasta:str
+        Pasta com os arquivos de dados.
+
+    Retornos:
+    ----------
+    conjuntos:dict
+        Dicionário com o nome e as margens de cada conjunto (vazio, caso o
+        arquivo não exista).
+    """
+    caminho = os.path.join(pasta, ARQUIVO_MARGENS)
+    if not os.path.exists(caminho):
+        return {}
+
+    info = os.stat(caminho)
+    chave = (info.st_mtime_ns, info.st_size)
+    entrada = _cache.get(caminho)
+    if entrada is None or entrada[0] != chave:
+        with _trava:
+            with open(caminho, encoding="utf-8") as input_file:
+                margens = json.load(input_file)
+            if margens.get("versao") != VERSAO_MARGENS:
+                raise ValueError(f"Versão das margens não suportada: {margens.get('versao')}")
+            entrada = (chave, margens["conjuntos"])
+            _cache[caminho] = entrada
+    return entrada[1]
+
+
+def _resolver_margens(dados: ConjuntoDados, margens: dict) -> tuple:
+    """
+    Converte as margens de um conjunto para os códigos das alternativas.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    margens:dict
+        Dicionário com a pergunta (índice ou texto) e as proporções de cada
+        alternativa (texto).
+
+    Retornos:
+    ----------
+    codigos:list
+        Códigos das alternativas de cada pergunta.
+    alvos:list
+        Proporções (normalizadas) de cada alternativa, na ordem dos códigos.
+    """
+    catalogo = dados.catalogo
+    codigos, alvos = [], []
+    for pergunta, proporcoes in margens.items():
+        idx = int(pergunta) if str(pergunta).isdigit() else catalogo.indice(pergunta)
+        if idx not in catalogo.unicas:
+            raise ValueError(f"A ponderação utiliza apenas perguntas de unica escolha: "
+                             f"{pergunta}")
+
+        codigos_pergunta, categorias = dados.respostas.codigos(idx)
+        posicoes = categorias.astype(str).get_indexer(list(proporcoes))
+        if (posicoes < 0).any():
+            inexistentes = [a for a, p in zip(proporcoes, posicoes) if p < 0]
+            raise ValueError(f"Alternativas inexistentes em '{catalogo.texto(idx)}': "
+                             f"{inexistentes}")
+        alvo = np.zeros(len(categorias))
+        alvo[posicoes] = list(proporcoes.values())
+
+        # Alternativas observadas sem margem receberiam peso zero
+        observadas = np.bincount(codigos_pergunta[codigos_pergunta >= 0],
+                                 minlength=len(categorias)) > 0
+        if (observadas & (alvo <= 0)).any():
+            faltantes = list(categorias[observadas & (alvo <= 0)])
+            raise ValueError(f"Alternativas sem margem em '{catalogo.texto(idx)}': {faltantes}")
+
+        codigos.append(codigos_pergunta)
+        alvos.append(alvo / alvo.sum())
+    return codigos, alvos
+
+
+def obter_ponderacao(
+        dados: ConjuntoDados,
+        margens: dict,
+        tolerancia: float = TOLERANCIA_RAKING,
+        max_iteracoes: int = MAX_ITERACOES_RAKING) -> Ponderacao:
+    """
+    Obtém os pesos dos respondentes para um conjunto de margens (calculados
+    uma única vez por conjunto de dados e de margens).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    margens:dict
+        Dicionário com a pergunta (índice ou texto) e as proporções de cada
+        alternativa (ver ler_margens).
+    tolerancia:float
+        Tolerância do raking.
+    max_iteracoes:int
+        Quantidade máxima de iterações do raking.
+
+    Retornos:
+    ----------
+    ponderacao:Ponderacao
+        Pesos dos respondentes e o resumo da convergência.
+    """
+    chave = (dados.assinatura, json.dumps(margens, sort_keys=True, ensure_ascii=False),
+             tolerancia, max_iteracoes)
+    ponderacao = _ponderacoes.obter(chave)
+    if ponderacao is None:
+        codigos, alvos = _resolver_margens(dados, margens)
+        pesos, iteracoes, convergiu, erro, historico = calcular_raking(codigos, alvos,
+                                                                       tolerancia, max_iteracoes)
+        pesos.setflags(write=False)
+        ponderacao = Ponderacao(chave, pesos, iteracoes, convergiu, erro, historico,
+                                len(pesos), float(pesos.sum() ** 2 / (pesos ** 2).sum()))
+        _ponderacoes.armazenar(chave, ponderacao)
+    return ponderacao
+
+
+def aplicar_ponderacao(
+        segmento: Segmento,
+        ponderacao: Ponderacao,
+        dados: ConjuntoDados) -> Segmento:
+    """
+    Aplica a ponderação a um segmento de respondentes (ou a todos).
+
+    O fator efetivo do segmento (soma dos pesos / soma dos quadrados dos
+    pesos) converte as somas ponderadas para o tamanho efetivo da amostra
+    de Kish, utilizado nos intervalos de confiança.
+
+    Parâmetros:
+    -----------
+    segmento:Segmento
+        Segmento de respondentes (ou None, para todos os respondentes).
+    ponderacao:Ponderacao
+        Pesos dos respondentes.
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+
+    Retornos:
+    ----------
+    segmento:Segmento
+        Segmento ponderado.
+    """
+    if segmento is None:
+        chave, mascara, n_respondentes = (dados.assinatura,), None, dados.respostas.n_respondentes
+    else:
+        chave, mascara, n_respondentes = segmento.chave, segmento.mascara, segmento.n_respondentes
+
+    pesos = ponderacao.pesos if mascara is None else ponderacao.pesos[mascara]
+    soma_quadrados = float((pesos ** 2).sum())
+    fator = float(pesos.sum()) / soma_quadrados if soma_quadrados > 0 else 1.0
+    return Segmento(chave + (("ponderacao",) + ponderacao.chave[1:],), mascara, n_respondentes,
+                    ponderacao.pesos, fator)
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Calcula os pesos dos respondentes (raking) de cada conjunto de margens "
+                    "e apresenta a convergência.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados e as margens (margens.json).")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_RAKING,
+                        help="Tolerância do raking (maior diferença entre as proporções).")
+    parser.add_argument("--max-iteracoes", type=int, default=MAX_ITERACOES_RAKING,
+                        help="Quantidade máxima de iterações do raking.")
+    args = parser.parse_args()
+
+    dados = carregar_dados(args.pasta)
+    conjuntos = ler_margens(args.pasta)
+    if not conjuntos:
+        print(f"Nenhum conjunto de margens em {os.path.join(args.pasta, ARQUIVO_MARGENS)}")
+    for nome, margens in conjuntos.items():
+        ponderacao = obter_ponderacao(dados, margens, args.tolerancia, args.max_iteracoes)
+        print(f"{nome}: {ponderacao.iteracoes} iterações, erro {ponderacao.erro:.2e} "
+              f"({'convergiu' if ponderacao.convergiu else 'não convergiu'}), "
+              f"pesos de {ponderacao.pesos.min():.3f} a {ponderacao.pesos.max():.3f}, "
+              f"tamanho efetivo {ponderacao.tamanho_efetivo:.0f} de {ponderacao.n_respondentes}")
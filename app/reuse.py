@@ -8,4 +8,7 @@ dict_partes_questionario = {
     "Parte 6 - Conhecimentos em Engenharia de Dados/DE": "p6",
     "Parte 7 - Conhecimentos em Análise de Dados/DA": "p7",
     "Parte 8 - Conhecimentos em Ciências de Dados/DS": "p8",
-}
\ No newline at end of file
+}
+
+# Quantidade de perguntas exibidas por página na análise univariada
+qtde_perguntas_pagina = 5
@@ -0,0 +1,170 @@
+# Imports gerais
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+# Imports específicos
+from dados import CAPACIDADE_CONJUNTOS, ConjuntoDados
+from cache import CacheLRU
+
+
+# constantes
+CAPACIDADE_SEGMENTOS = 64
+# Os índices referenciam as respostas: apenas os dos conjuntos mantidos em dados.py
+CAPACIDADE_INDICES = CAPACIDADE_CONJUNTOS
+
+# Cache do processo para os índices (um por conjunto de dados, ex.: cada edição) e os segmentos
+_trava = threading.Lock()
+_indices = CacheLRU(CAPACIDADE_INDICES)
+_segmentos = CacheLRU(CAPACIDADE_SEGMENTOS)
+
+
+@dataclass(frozen=True, eq=False)
+class Segmento:
+    """
+    Segmento de respondentes (resultado da aplicação dos filtros e,
+    opcionalmente, da ponderação dos respondentes).
+
+    A chave identifica o conjunto de dados, os filtros e a ponderação
+    aplicados, e é utilizada na indexação dos agregados calculados para o
+    segmento. A máscara é None quando nenhum filtro é aplicado (segmento
+    apenas ponderado); os pesos são os de todos os respondentes (ver
+    ponderacao.py) e o fator efetivo converte as somas ponderadas para o
+    tamanho efetivo da amostra (utilizado nos intervalos de confiança).
+    """
+    chave: tuple
+    mascara: np.ndarray
+    n_respondentes: int
+    pesos: np.ndarray = None
+    fator_efetivo: float = 1.0
+
+
+class IndiceSegmentos:
+    """
+    Índice de bitmaps das alternativas das perguntas de unica escolha.
+
+    Para cada alternativa é armazenado um bitmap (np.packbits) dos
+    respondentes que a escolheram, construído uma única vez (na primeira
+    utilização da pergunta). A combinação de filtros é realizada com
+    operações OR (alternativas de uma mesma pergunta) e AND (perguntas
+    distintas) sobre os bitmaps.
+    """
+
+    def __init__(self, dados: ConjuntoDados):
+        """
+        Cria o índice (vazio) de um conjunto de dados.
+
+        Parâmetros:
+        -----------
+        dados:ConjuntoDados
+            Artefatos de dados do dashboard.
+        """
+        self._respostas = dados.respostas
+        self._bitmaps = {}
+        self._trava = threading.Lock()
+
+    def bitmaps(self, idx_pergunta: int) -> np.ndarray:
+        """
+        Obtém os bitmaps das alternativas de uma pergunta de unica escolha.
+
+        Parâmetros:
+        -----------
+        idx_pergunta:int
+            Índice da pergunta de unica escolha.
+
+        Retornos:
+        ----------
+        bitmaps:np.ndarray
+            Matriz (alternativas x bytes) com o bitmap de cada alternativa.
+        """
+        if idx_pergunta not in self._bitmaps:
+            with self._trava:
+                if idx_pergunta not in self._bitmaps:
+                    codigos, categorias = self._respostas.codigos(idx_pergunta)
+                    bitmaps = np.empty((len(categorias), (len(codigos) + 7) // 8), dtype=np.uint8)
+                    for k in range(len(categorias)):
+                        bitmaps[k] = np.packbits(codigos == k)
+                    self._bitmaps[idx_pergunta] = bitmaps
+        return self._bitmaps[idx_pergunta]
+
+    def mascara(self, filtros: dict) -> np.ndarray:
+        """
+        Obtém os respondentes que atendem a todos os filtros.
+
+        Parâmetros:
+        -----------
+        filtros:dict
+            Dicionário com o índice da pergunta e os códigos das alternativas aceitas.
+
+        Retornos:
+        ----------
+        mascara:np.ndarray
+            Vetor booleano dos respondentes do segmento.
+        """
+        combinado = None
+        for idx_pergunta, codigos in filtros.items():
+            uniao = np.bitwise_or.reduce(self.bitmaps(idx_pergunta)[list(codigos)], axis=0)
+            combinado = uniao if combinado is None else combinado & uniao
+        return np.unpackbits(combinado, count=self._respostas.n_respondentes).view(bool)
+
+
+def obter_indice_segmentos(dados: ConjuntoDados) -> IndiceSegmentos:
+    """
+    Obtém o índice de bitmaps do conjunto de dados (um por conjunto de dados
+    no processo; os índices das edições são mantidos ao alternar entre elas).
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+
+    Retornos:
+    ----------
+    indice:IndiceSegmentos
+        Índice de bitmaps.
+    """
+    indice = _indices.obter(dados.assinatura)
+    if indice is None:
+        with _trava:
+            indice = _indices.obter(dados.assinatura)
+            if indice is None:
+                indice = IndiceSegmentos(dados)
+                _indices.armazenar(dados.assinatura, indice)
+    return indice
+
+
+def obter_segmento(dados: ConjuntoDados, filtros: dict) -> Segmento:
+    """
+    Obtém o segmento de respondentes correspondente aos filtros.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    filtros:dict
+        Dicionário com o índice da pergunta de unica escolha e as alternativas
+        (textos) aceitas. Perguntas sem alternativas são ignoradas.
+
+    Retornos:
+    ----------
+    segmento:Segmento
+        Segmento de respondentes, ou None caso nenhum filtro seja aplicado.
+    """
+    filtros = {idx: tuple(sorted(map(str, alternativas)))
+               for idx, alternativas in filtros.items() if len(alternativas) > 0}
+    if not filtros:
+        return None
+
+    chave = (dados.assinatura, tuple(sorted(filtros.items())))
+    segmento = _segmentos.obter(chave)
+    if segmento is None:
+        codigos = {}
+        for idx, alternativas in filtros.items():
+            _, categorias = dados.respostas.codigos(idx)
+            posicoes = categorias.astype(str).get_indexer(alternativas)
+            codigos[idx] = posicoes[posicoes >= 0]
+        mascara = obter_indice_segmentos(dados).mascara(codigos)
+        segmento = Segmento(chave, mascara, int(np.count_nonzero(mascara)))
+        _segmentos.armazenar(chave, segmento)
+    return segmento
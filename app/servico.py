@@ -0,0 +1,461 @@
+# Imports gerais
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import pyarrow as pa
+
+# Imports específicos
+from dados import PASTA_DADOS, ConjuntoDados, carregar_dados
+from agregados import obter_agregados_univariados
+from cubo import obter_cubo, obter_perguntas
+from cache import CAPACIDADE_PADRAO, CacheLRU
+from agregacao import obter_dataframe_univariado, obter_tabelas_bivariadas
+from instrumentacao import TIPO_PROMETHEUS, formatar_prometheus, instrumentar
+
+
+# constantes
+HOST_PADRAO = "127.0.0.1"
+PORTA_PADRAO = 8600
+TAMANHO_MAXIMO_CABECALHO = 16384
+
+TIPOS_CONTEUDO = {
+    "json": "application/json; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+MODOS_UNIVARIADOS = {"quantidade": "Quantidade", "percentual": "Percentual"}
+MODOS_BIVARIADOS = {"quantidade": "Quantidade", "linha": "Percentual (linha)",
+                    "coluna": "Percentual (coluna)"}
+
+
+class ErroRequisicao(Exception):
+    """
+    Erro de uma requisição (parâmetros inválidos, rota ou pergunta inexistente).
+    """
+
+    def __init__(self, status: int, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def _ler_pergunta(parametros: dict, nome: str, perguntas: set) -> int:
+    """
+    Lê (e valida) o índice de uma pergunta dos parâmetros da requisição.
+
+    Parâmetros:
+    -----------
+    parametros:dict
+        Parâmetros da requisição.
+    nome:str
+        Nome do parâmetro.
+    perguntas:set
+        Índices das perguntas disponíveis.
+
+    Retornos:
+    ----------
+    idx:int
+        Índice da pergunta.
+    """
+    try:
+        idx = int(parametros[nome])
+    except (KeyError, ValueError):
+        raise ErroRequisicao(400, f"Parâmetro '{nome}' ausente ou inválido.")
+    if idx not in perguntas:
+        raise ErroRequisicao(404, f"Pergunta {idx} inexistente.")
+    return idx
+
+
+def _ler_opcao(parametros: dict, nome: str, opcoes: dict, padrao: str):
+    """
+    Lê (e valida) um parâmetro de valores pré-definidos da requisição.
+
+    Parâmetros:
+    -----------
+    parametros:dict
+        Parâmetros da requisição.
+    nome:str
+        Nome do parâmetro.
+    opcoes:dict
+        Valores aceitos (e os valores correspondentes).
+    padrao:str
+        Valor utilizado caso o parâmetro esteja ausente.
+
+    Retornos:
+    ----------
+    opcao:object
+        Valor correspondente ao parâmetro.
+    """
+    valor = parametros.get(nome, padrao)
+    if valor not in opcoes:
+        raise ErroRequisicao(400, f"Parâmetro '{nome}' inválido (opções: {', '.join(opcoes)}).")
+    return opcoes[valor]
+
+
+def interpretar_requisicao(rota: str, parametros: dict, dados: ConjuntoDados) -> tuple:
+    """
+    Interpreta (e valida) uma requisição, obtendo a sua forma normalizada
+    (utilizada como chave do cache de respostas).
+
+    Parâmetros:
+    -----------
+    rota:str
+        Caminho da requisição (ex.: '/univariada').
+    parametros:dict
+        Parâmetros da requisição.
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+
+    Retornos:
+    ----------
+    requisicao:tuple
+        Tupla (rota, índices das perguntas, modo, formato).
+    """
+    formato = _ler_opcao(parametros, "formato", {f: f for f in TIPOS_CONTEUDO}, "json")
+    perguntas = set(obter_perguntas(dados.catalogo))
+
+    if rota == "/perguntas":
+        return (rota, (), None, "json")
+    if rota == "/univariada":
+        idx = _ler_pergunta(parametros, "pergunta", perguntas)
+        modo = _ler_opcao(parametros, "modo", MODOS_UNIVARIADOS, "quantidade")
+        return (rota, (idx,), modo, formato)
+    if rota == "/bivariada":
+        idx1 = _ler_pergunta(parametros, "pergunta1", perguntas)
+        idx2 = _ler_pergunta(parametros, "pergunta2", perguntas)
+        if idx1 == idx2:
+            raise ErroRequisicao(400, "Por favor, selecione perguntas distintas.")
+        modo = _ler_opcao(parametros, "modo", MODOS_BIVARIADOS, "quantidade")
+        return (rota, (idx1, idx2), modo, formato)
+    raise ErroRequisicao(404, f"Rota {rota} inexistente.")
+
+
+def _descrever_pergunta(dados: ConjuntoDados, idx: int) -> dict:
+    """
+    Obtém a descrição (índice, texto e tipo) de uma pergunta.
+
+    Parâmetros:
+    -----------
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    idx:int
+        Índice da pergunta.
+
+    Retornos:
+    ----------
+    descricao:dict
+        Dicionário com o índice, o texto e o tipo da pergunta.
+    """
+    return {"id": idx, "texto": dados.catalogo.texto(idx), "tipo": dados.catalogo.tipo(idx)}
+
+
+def _serializar_arrow(colunas: dict, metadados: dict) -> bytes:
+    """
+    Serializa um conjunto de colunas no formato Arrow (IPC stream).
+
+    Parâmetros:
+    -----------
+    colunas:dict
+        Dicionário com o nome e os valores de cada coluna.
+    metadados:dict
+        Metadados (JSON) gravados no esquema.
+
+    Retornos:
+    ----------
+    corpo:bytes
+        Conteúdo serializado.
+    """
+    tabela = pa.table(colunas).replace_schema_metadata(
+        {"descricao": json.dumps(metadados, ensure_ascii=False)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return sink.getvalue().to_pybytes()
+
+
+@instrumentar("servico.processar_requisicao")
+def processar_requisicao(requisicao: tuple, dados: ConjuntoDados, pasta: str) -> bytes:
+    """
+    Calcula a resposta de uma requisição (já interpretada).
+
+    Parâmetros:
+    -----------
+    requisicao:tuple
+        Tupla (rota, índices das perguntas, modo, formato).
+    dados:ConjuntoDados
+        Artefatos de dados do dashboard.
+    pasta:str
+        Pasta com os arquivos de dados (agregados e cubo pré-calculados).
+
+    Retornos:
+    ----------
+    corpo:bytes
+        Conteúdo da resposta (JSON ou Arrow).
+    """
+    rota, perguntas, modo, formato = requisicao
+
+    if rota == "/perguntas":
+        disponiveis = set(obter_perguntas(dados.catalogo))
+        corpo = [{**_descrever_pergunta(dados, p), "parte": parte}
+                 for parte, ps in dados.catalogo.partes.items() for p in ps if p in disponiveis]
+        return json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+
+    if rota == "/univariada":
+        idx = perguntas[0]
+        sub = obter_dataframe_univariado(dados.respostas, dados.catalogo, idx, modo,
+                                         obter_agregados_univariados(dados, pasta))
+        descricao = {"pergunta": _descrever_pergunta(dados, idx), "modo": modo}
+        respostas = [str(r) for r in sub.iloc[:, 0]]
+        valores = sub.iloc[:, 1].tolist()
+        if formato == "arrow":
+            return _serializar_arrow({"resposta": respostas, "valor": valores}, descricao)
+        return json.dumps({**descricao, "respostas": respostas, "valores": valores},
+                          ensure_ascii=False).encode("utf-8")
+
+    idx1, idx2 = perguntas
+    tabela = obter_tabelas_bivariadas(dados.respostas, dados.catalogo, idx1, idx2,
+                                      obter_cubo(dados, pasta))[modo]
+    descricao = {"pergunta1": _descrever_pergunta(dados, idx1),
+                 "pergunta2": _descrever_pergunta(dados, idx2), "modo": modo}
+    linhas = [str(r) for r in tabela.index]
+    colunas = [str(c) for c in tabela.columns]
+    if formato == "arrow":
+        # Formato longo (uma linha por combinação de alternativas)
+        n1, n2 = tabela.shape
+        return _serializar_arrow({"linha": [r for r in linhas for _ in range(n2)],
+                                  "coluna": colunas * n1,
+                                  "valor": tabela.to_numpy().ravel()}, descricao)
+    return json.dumps({**descricao, "linhas": linhas, "colunas": colunas,
+                       "valores": tabela.to_numpy().tolist()},
+                      ensure_ascii=False).encode("utf-8")
+
+
+def _corpo_erro(mensagem: str) -> bytes:
+    """
+    Obtém o corpo (JSON) de uma resposta de erro.
+
+    Parâmetros:
+    -----------
+    mensagem:str
+        Mensagem de erro.
+
+    Retornos:
+    ----------
+    corpo:bytes
+        Conteúdo da resposta.
+    """
+    return json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8")
+
+
+def montar_resposta(status: int, tipo: str, corpo: bytes, manter_conexao: bool) -> bytes:
+    """
+    Monta a resposta HTTP/1.1 (cabeçalho e corpo).
+
+    Parâmetros:
+    -----------
+    status:int
+        Código de status HTTP.
+    tipo:str
+        Tipo do conteúdo (Content-Type).
+    corpo:bytes
+        Conteúdo da resposta.
+    manter_conexao:bool
+        True caso a conexão deva ser mantida aberta (keep-alive).
+
+    Retornos:
+    ----------
+    resposta:bytes
+        Resposta HTTP completa.
+    """
+    cabecalho = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                 f"Content-Type: {tipo}\r\n"
+                 f"Content-Length: {len(corpo)}\r\n"
+                 f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n")
+    return cabecalho.encode("latin-1") + corpo
+
+
+class ServicoAgregados:
+    """
+    Serviço HTTP (assíncrono) das agregações do dashboard.
+
+    Rotas (GET):
+
+    - /perguntas: perguntas disponíveis (índice, texto, tipo e parte);
+    - /univariada?pergunta=<id>&modo=quantidade|percentual&formato=json|arrow;
+    - /bivariada?pergunta1=<id>&pergunta2=<id>&modo=quantidade|linha|coluna&formato=json|arrow;
+    - /saude: situação do serviço e estatísticas do cache;
+    - /metricas: tempos e memória das etapas (formato texto do Prometheus).
+
+    As respostas são armazenadas em um cache LRU, indexado pela requisição
+    normalizada e pela assinatura dos arquivos de dados. A carga (ou recarga)
+    dos dados e os cálculos são realizados fora do laço de eventos (em threads).
+    """
+
+    def __init__(self, pasta: str = PASTA_DADOS, capacidade_cache: int = CAPACIDADE_PADRAO):
+        """
+        Cria o serviço.
+
+        Parâmetros:
+        -----------
+        pasta:str
+            Pasta com os arquivos de dados.
+        capacidade_cache:int
+            Quantidade máxima de respostas armazenadas no cache.
+        """
+        self.pasta = pasta
+        self.cache = CacheLRU(capacidade_cache)
+        self.requisicoes = 0
+
+    async def responder(self, rota: str, parametros: dict) -> tuple:
+        """
+        Obtém a resposta de uma requisição (do cache, quando disponível).
+
+        Parâmetros:
+        -----------
+        rota:str
+            Caminho da requisição.
+        parametros:dict
+            Parâmetros da requisição.
+
+        Retornos:
+        ----------
+        resposta:tuple
+            Tupla (status, tipo do conteúdo, corpo).
+        """
+        self.requisicoes += 1
+        # A recarga (arquivos de dados alterados) não bloqueia o laço de eventos
+        dados = await asyncio.get_running_loop().run_in_executor(
+            None, carregar_dados, self.pasta)
+
+        if rota == "/saude":
+            corpo = {"status": "ok", "respondentes": dados.respostas.n_respondentes,
+                     "requisicoes": self.requisicoes, "cache": self.cache.estatisticas()}
+            return 200, TIPOS_CONTEUDO["json"], json.dumps(corpo).encode("utf-8")
+
+        if rota == "/metricas":
+            return 200, TIPO_PROMETHEUS, formatar_prometheus("servico").encode("utf-8")
+
+        try:
+            requisicao = interpretar_requisicao(rota, parametros, dados)
+        except ErroRequisicao as erro:
+            return erro.status, TIPOS_CONTEUDO["json"], _corpo_erro(erro.mensagem)
+
+        chave = (requisicao, dados.assinatura)
+        corpo = self.cache.obter(chave)
+        if corpo is None:
+            corpo = await asyncio.get_running_loop().run_in_executor(
+                None, processar_requisicao, requisicao, dados, self.pasta)
+            self.cache.armazenar(chave, corpo)
+        return 200, TIPOS_CONTEUDO[requisicao[3]], corpo
+
+    async def atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        """
+        Atende uma conexão (várias requisições, caso a conexão seja mantida).
+
+        Parâmetros:
+        -----------
+        leitor:asyncio.StreamReader
+            Leitor da conexão.
+        escritor:asyncio.StreamWriter
+            Escritor da conexão.
+        """
+        try:
+            while True:
+                try:
+                    cabecalho = await leitor.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                linhas = cabecalho.decode("latin-1").split("\r\n")
+                try:
+                    metodo, alvo, versao = linhas[0].split(" ", 2)
+                except ValueError:
+                    escritor.write(montar_resposta(400, TIPOS_CONTEUDO["json"],
+                                                   _corpo_erro("Requisição inválida."), False))
+                    break
+                cabecalhos = {}
+                for linha in linhas[1:]:
+                    if ":" in linha:
+                        nome, valor = linha.split(":", 1)
+                        cabecalhos[nome.strip().lower()] = valor.strip().lower()
+
+                # O corpo (caso exista) é descartado
+                try:
+                    tamanho = int(cabecalhos.get("content-length", "0") or 0)
+                    if tamanho < 0:
+                        raise ValueError(tamanho)
+                except ValueError:
+                    escritor.write(montar_resposta(400, TIPOS_CONTEUDO["json"],
+                                                   _corpo_erro("Content-Length inválido."),
+                                                   False))
+                    break
+                if tamanho:
+                    await leitor.readexactly(tamanho)
+
+                conexao = cabecalhos.get("connection", "")
+                manter = conexao == "keep-alive" if versao == "HTTP/1.0" else conexao != "close"
+
+                if metodo != "GET":
+                    status, tipo, corpo = 405, TIPOS_CONTEUDO["json"], _corpo_erro("Utilize GET.")
+                else:
+                    url = urlsplit(alvo)
+                    parametros = {nome: valores[-1]
+                                  for nome, valores in parse_qs(url.query).items()}
+                    try:
+                        status, tipo, corpo = await self.responder(url.path.rstrip("/") or "/",
+                                                                   parametros)
+                    except Exception as erro:
+                        status, tipo, corpo = 500, TIPOS_CONTEUDO["json"], _corpo_erro(str(erro))
+
+                escritor.write(montar_resposta(status, tipo, corpo, manter))
+                await escritor.drain()
+                if not manter:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def servir(self, host: str = HOST_PADRAO, porta: int = PORTA_PADRAO):
+        """
+        Carrega os dados e inicia o serviço (até ser interrompido).
+
+        Parâmetros:
+        -----------
+        host:str
+            Endereço do serviço.
+        porta:int
+            Porta do serviço.
+        """
+        dados = carregar_dados(self.pasta)
+        obter_agregados_univariados(dados, self.pasta)
+        obter_cubo(dados, self.pasta)
+
+        servidor = await asyncio.start_server(self.atender, host, porta,
+                                              limit=TAMANHO_MAXIMO_CABECALHO)
+        print(f"Serviço disponível em http://{host}:{porta}")
+        async with servidor:
+            await servidor.serve_forever()
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Serviço HTTP (JSON/Arrow) das agregações do dashboard.")
+    parser.add_argument("--pasta", default=PASTA_DADOS,
+                        help="Pasta com os arquivos de dados.")
+    parser.add_argument("--host", default=HOST_PADRAO,
+                        help="Endereço do serviço.")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO,
+                        help="Porta do serviço.")
+    parser.add_argument("--cache", type=int, default=CAPACIDADE_PADRAO,
+                        help="Quantidade máxima de respostas armazenadas no cache.")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(ServicoAgregados(args.pasta, args.cache).servir(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,284 @@
+# Imports gerais
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Imports específicos
+from catalogo import ARQUIVO_CATALOGO, CatalogoPerguntas, salvar_catalogo
+from dados import ARQUIVO_PRINCIPAL
+
+
+# constantes
+# Estrutura do questionário sintético: para cada parte, a quantidade de perguntas
+# de unica e de multipla escolha e a fração de respondentes a quem a parte é
+# apresentada (as partes 3, 6, 7 e 8 são respondidas apenas por parte do público)
+ESTRUTURA_PARTES = {
+    "p1": (10, 2, 1.00),
+    "p2": (16, 3, 1.00),
+    "p3": (6, 3, 0.15),
+    "p4": (8, 5, 0.95),
+    "p5": (2, 2, 0.90),
+    "p6": (3, 4, 0.30),
+    "p7": (3, 3, 0.30),
+    "p8": (4, 5, 0.30),
+}
+
+# Faixas da quantidade de alternativas das perguntas
+ALTERNATIVAS_UNICA = (2, 30)
+ALTERNATIVAS_MULTIPLA = (3, 25)
+
+# Fração de respostas ausentes em perguntas de unica escolha
+FRACAO_AUSENTES = 0.02
+
+TAMANHO_BLOCO = 250_000
+
+PALAVRAS = (
+    "dados", "análise", "ferramenta", "empresa", "conhecimento", "experiência",
+    "linguagem", "banco", "nuvem", "modelo", "carreira", "gestão", "time",
+    "engenharia", "ciência", "negócio", "salário", "formação", "cargo", "setor",
+    "trabalho", "remoto", "presencial", "projeto", "produção", "aprendizado",
+)
+
+
+def _gerar_texto(rng: np.random.Generator, minimo: int, maximo: int) -> str:
+    """
+    Gera um texto (em português) com uma quantidade aleatória de palavras.
+
+    Parâmetros:
+    -----------
+    rng:np.random.Generator
+        Gerador de números aleatórios.
+    minimo:int
+        Quantidade mínima de palavras.
+    maximo:int
+        Quantidade máxima de palavras.
+
+    Retornos:
+    ----------
+    texto:str
+        Texto gerado.
+    """
+    palavras = rng.choice(PALAVRAS, size=rng.integers(minimo, maximo + 1))
+    return " ".join(palavras).capitalize()
+
+
+def gerar_estrutura(semente: int = 42) -> dict:
+    """
+    Gera a estrutura do questionário sintético (colunas, textos e dicionários).
+
+    Parâmetros:
+    -----------
+    semente:int
+        Semente do gerador de números aleatórios.
+
+    Retornos:
+    ----------
+    estrutura:dict
+        Dicionário com as colunas, os artefatos auxiliares (tipo_pergunta,
+        resposta_multipla, categoria_pergunta, textos_alternativo e
+        idx_perguntas) e os parâmetros de geração das respostas.
+    """
+    rng = np.random.default_rng(semente)
+    colunas = ["('P0', 'id')"]
+    textos_alternativo = ["Identificador do respondente"]
+    tipo_pergunta = {'unica': [], 'multipla': []}
+    resposta_multipla = {}
+    categoria_pergunta = {}
+    idx_perguntas = {}
+    unicas = {}
+    multiplas = {}
+    partes = {}
+
+    for parte, (qtde_unica, qtde_multipla, fracao) in ESTRUTURA_PARTES.items():
+        categoria_pergunta[parte] = []
+        partes[parte] = fracao
+
+        # As perguntas de unica e multipla escolha aparecem intercaladas
+        tipos = ["unica"] * qtde_unica + ["multipla"] * qtde_multipla
+        rng.shuffle(tipos)
+
+        for i, tipo in enumerate(tipos):
+            codigo = f"P{parte[1:]}_{chr(ord('a') + i) if i < 26 else 'z' + str(i)}"
+            idx = len(colunas)
+            colunas.append(f"('{codigo} ', '{_gerar_texto(rng, 1, 3)}')")
+            textos_alternativo.append(f"{_gerar_texto(rng, 4, 12)}? ({codigo})")
+            tipo_pergunta[tipo].append(idx)
+            categoria_pergunta[parte].append(idx)
+            idx_perguntas[codigo] = idx
+
+            if tipo == "unica":
+                k = int(rng.integers(*ALTERNATIVAS_UNICA))
+                categorias = np.array(sorted({_gerar_texto(rng, 1, 14) for _ in range(k)}),
+                                      dtype=object)
+                # Distribuição assimétrica (algumas alternativas concentram as respostas)
+                probabilidades = rng.dirichlet(np.full(len(categorias), 0.7))
+                unicas[idx] = (parte, categorias, probabilidades)
+            else:
+                k = int(rng.integers(*ALTERNATIVAS_MULTIPLA))
+                resposta_multipla[idx] = list(range(idx + 1, idx + 1 + k))
+                for j in range(k):
+                    colunas.append(f"('{codigo}_{j + 1} ', '{_gerar_texto(rng, 1, 3)}')")
+                    textos_alternativo.append(_gerar_texto(rng, 1, 6))
+                multiplas[idx] = (parte, rng.beta(0.8, 3.0, size=k))
+
+    return {
+        "colunas": colunas,
+        "tipo_pergunta": tipo_pergunta,
+        "resposta_multipla": resposta_multipla,
+        "categoria_pergunta": categoria_pergunta,
+        "textos_alternativo": textos_alternativo,
+        "idx_perguntas": idx_perguntas,
+        "unicas": unicas,
+        "multiplas": multiplas,
+        "partes": partes,
+    }
+
+
+def obter_esquema(estrutura: dict) -> pa.Schema:
+    """
+    Obtém o esquema (Arrow) do arquivo de respostas sintético.
+
+    Parâmetros:
+    -----------
+    estrutura:dict
+        Estrutura do questionário sintético.
+
+    Retornos:
+    ----------
+    esquema:pa.Schema
+        Esquema com o tipo de cada coluna.
+    """
+    tipos = [pa.string()] * len(estrutura["colunas"])
+    tipos[0] = pa.int64()
+    for colunas in estrutura["resposta_multipla"].values():
+        for c in colunas:
+            tipos[c] = pa.float64()
+    return pa.schema(list(zip(estrutura["colunas"], tipos)))
+
+
+def gerar_bloco(
+        estrutura: dict,
+        inicio: int,
+        n: int,
+        rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Gera um bloco de respostas sintéticas.
+
+    Parâmetros:
+    -----------
+    estrutura:dict
+        Estrutura do questionário sintético.
+    inicio:int
+        Identificador do primeiro respondente do bloco.
+    n:int
+        Quantidade de respondentes do bloco.
+    rng:np.random.Generator
+        Gerador de números aleatórios.
+
+    Retornos:
+    ----------
+    df:pd.DataFrame
+        Dataframe com as respostas (mesmo formato do arquivo df.parquet).
+    """
+    colunas = estrutura["colunas"]
+    valores = {colunas[0]: np.arange(inicio, inicio + n, dtype=np.int64)}
+
+    # Respondentes a quem cada parte do questionário foi apresentada
+    apresentada = {parte: rng.random(n) < fracao
+                   for parte, fracao in estrutura["partes"].items()}
+
+    for idx, (parte, categorias, probabilidades) in estrutura["unicas"].items():
+        respostas = categorias[rng.choice(len(categorias), size=n, p=probabilidades)]
+        respostas[~apresentada[parte] | (rng.random(n) < FRACAO_AUSENTES)] = None
+        valores[colunas[idx]] = respostas
+
+    for idx, (parte, probabilidades) in estrutura["multiplas"].items():
+        marcadas = rng.random((n, len(probabilidades))) < probabilidades
+        indicadores = marcadas.astype(np.float64)
+        indicadores[~apresentada[parte]] = np.nan
+
+        # A coluna da pergunta contém o texto da primeira alternativa marcada
+        textos = np.array([estrutura["textos_alternativo"][c]
+                           for c in estrutura["resposta_multipla"][idx]], dtype=object)
+        pergunta = textos[marcadas.argmax(axis=1)]
+        pergunta[~apresentada[parte] | ~marcadas.any(axis=1)] = None
+        valores[colunas[idx]] = pergunta
+
+        for j, c in enumerate(estrutura["resposta_multipla"][idx]):
+            valores[colunas[c]] = indicadores[:, j]
+
+    return pd.DataFrame(valores, columns=colunas)
+
+
+def gerar_dados(
+        n_respondentes: int,
+        pasta: str,
+        semente: int = 42,
+        tamanho_bloco: int = TAMANHO_BLOCO) -> dict:
+    """
+    Gera um conjunto de dados sintético no mesmo formato dos dados do dashboard
+    (df.parquet, os arquivos .pickle auxiliares e o catálogo de perguntas).
+
+    As respostas são geradas e gravadas em blocos, de forma que a memória
+    utilizada não depende da quantidade de respondentes.
+
+    Parâmetros:
+    -----------
+    n_respondentes:int
+        Quantidade de respondentes.
+    pasta:str
+        Pasta onde os arquivos serão gravados.
+    semente:int
+        Semente do gerador de números aleatórios.
+    tamanho_bloco:int
+        Quantidade de respondentes gerados por vez.
+
+    Retornos:
+    ----------
+    estrutura:dict
+        Estrutura do questionário sintético.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    estrutura = gerar_estrutura(semente)
+    esquema = obter_esquema(estrutura)
+    rng = np.random.default_rng(semente + 1)
+
+    with pq.ParquetWriter(os.path.join(pasta, ARQUIVO_PRINCIPAL), esquema) as escritor:
+        for inicio in range(0, n_respondentes, tamanho_bloco):
+            n = min(tamanho_bloco, n_respondentes - inicio)
+            bloco = gerar_bloco(estrutura, inicio, n, rng)
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema,
+                                                      preserve_index=False))
+
+    for nome in ("tipo_pergunta", "resposta_multipla", "categoria_pergunta",
+                 "textos_alternativo", "idx_perguntas"):
+        with open(os.path.join(pasta, f"{nome}.pickle"), "wb") as output_file:
+            pickle.dump(estrutura[nome], output_file)
+
+    catalogo = CatalogoPerguntas(estrutura["textos_alternativo"], estrutura["tipo_pergunta"],
+                                 estrutura["resposta_multipla"], estrutura["categoria_pergunta"])
+    salvar_catalogo(catalogo, os.path.join(pasta, ARQUIVO_CATALOGO))
+
+    return estrutura
+
+
+######################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(
+        description="Gera um conjunto de dados sintético do State of Data Brazil.")
+    parser.add_argument("pasta", help="Pasta onde os arquivos serão gravados.")
+    parser.add_argument("--respondentes", type=int, default=10_000,
+                        help="Quantidade de respondentes (ex.: 10000 a 10000000).")
+    parser.add_argument("--semente", type=int, default=42,
+                        help="Semente do gerador de números aleatórios.")
+    args = parser.parse_args()
+
+    estrutura = gerar_dados(args.respondentes, args.pasta, args.semente)
+    print(f"{args.respondentes} respondentes e {len(estrutura['colunas'])} colunas "
+          f"gravados em {args.pasta}")
@@ -0,0 +1,472 @@
+# Imports gerais
+import numpy as np
+import pandas as pd
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas
+
+
+# constantes
+# Quantidade de linhas processadas por vez no produto matricial
+# (float32 representa inteiros de forma exata até 2**24)
+TAMANHO_BLOCO = 65536
+
+
+def calcular_coocorrencia(
+        indicadores1: np.ndarray,
+        indicadores2: np.ndarray,
+        tamanho_bloco: int = TAMANHO_BLOCO,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a matriz de coocorrência entre as alternativas de duas perguntas
+    de multipla escolha (produto matricial entre as matrizes de indicadores).
+
+    O produto é realizado em blocos de linhas, de forma que a memória
+    adicional utilizada é limitada pelo tamanho do bloco. Com os pesos, as
+    linhas são ponderadas (somas ponderadas, sem arredondamento).
+
+    Parâmetros:
+    -----------
+    indicadores1:np.ndarray
+        Matriz (respondentes x alternativas) de indicadores da primeira pergunta.
+    indicadores2:np.ndarray
+        Matriz (respondentes x alternativas) de indicadores da segunda pergunta.
+    tamanho_bloco:int
+        Quantidade de linhas processadas por vez.
+    pesos:np.ndarray
+        Peso de cada respondente (opcional).
+
+    Retornos:
+    ----------
+    coocorrencia:np.ndarray
+        Matriz (alternativas1 x alternativas2) com a quantidade (ou a soma dos
+        pesos) de respondentes que marcaram as duas alternativas.
+    """
+    coocorrencia = np.zeros(
+        (indicadores1.shape[1], indicadores2.shape[1]), dtype=np.float64)
+
+    for inicio in range(0, indicadores1.shape[0], tamanho_bloco):
+        bloco1 = indicadores1[inicio:inicio + tamanho_bloco].astype(np.float32)
+        bloco2 = indicadores2[inicio:inicio + tamanho_bloco].astype(np.float32)
+        if pesos is not None:
+            # Os pesos são aplicados à matriz com menos colunas (o produto é o mesmo)
+            ponderado = bloco1 if bloco1.shape[1] <= bloco2.shape[1] else bloco2
+            ponderado *= pesos[inicio:inicio + tamanho_bloco, None].astype(np.float32)
+        coocorrencia += bloco1.T @ bloco2
+
+    if pesos is not None:
+        return coocorrencia
+    return np.rint(coocorrencia).astype(np.int64)
+
+
+def tabular_codigos(
+        codigos1: np.ndarray,
+        n1: int,
+        codigos2: np.ndarray,
+        n2: int,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a tabela de contingência entre duas perguntas de unica escolha.
+
+    Os pares de códigos são combinados em um único código (c1 * n2 + c2)
+    e contados (ou os pesos somados) com np.bincount.
+
+    Parâmetros:
+    -----------
+    codigos1:np.ndarray
+        Códigos das respostas da primeira pergunta (-1 para ausentes).
+    n1:int
+        Quantidade de alternativas da primeira pergunta.
+    codigos2:np.ndarray
+        Códigos das respostas da segunda pergunta (-1 para ausentes).
+    n2:int
+        Quantidade de alternativas da segunda pergunta.
+    pesos:np.ndarray
+        Peso de cada respondente (opcional).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Matriz (n1 x n2) com a quantidade de respondentes de cada combinação.
+    """
+    # Respostas ausentes (em qualquer uma das perguntas) vão para um código extra
+    combinado = codigos1.astype(np.int64) * n2 + codigos2
+    combinado[(codigos1 < 0) | (codigos2 < 0)] = n1 * n2
+    tabela = np.bincount(combinado, weights=pesos, minlength=n1 * n2 + 1)[:n1 * n2]
+    return tabela.reshape(n1, n2)
+
+
+def tabular_codigos_indicadores(
+        codigos: np.ndarray,
+        n: int,
+        indicadores: np.ndarray,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a tabela de contingência entre uma pergunta de unica escolha e as
+    alternativas de uma pergunta de multipla escolha.
+
+    Parâmetros:
+    -----------
+    codigos:np.ndarray
+        Códigos das respostas da pergunta de unica escolha (-1 para ausentes).
+    n:int
+        Quantidade de alternativas da pergunta de unica escolha.
+    indicadores:np.ndarray
+        Matriz (respondentes x alternativas) de indicadores da pergunta de
+        multipla escolha.
+    pesos:np.ndarray
+        Peso de cada respondente (opcional).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Matriz (n x alternativas) com a quantidade de respondentes.
+    """
+    # Respostas ausentes vão para um código extra (descartado ao final)
+    codigos = np.where(codigos < 0, n, codigos)
+    tabela = np.empty((n, indicadores.shape[1]),
+                      dtype=np.int64 if pesos is None else np.float64)
+    for j in range(indicadores.shape[1]):
+        ponderados = indicadores[:, j] if pesos is None else indicadores[:, j] * pesos
+        tabela[:, j] = np.bincount(codigos, weights=ponderados, minlength=n + 1)[:n]
+    return tabela
+
+
+def restringir_pesos(pesos: np.ndarray, mascara: np.ndarray = None) -> np.ndarray:
+    """
+    Obtém os pesos dos respondentes considerados (alinhados às respostas
+    obtidas com a mesma máscara).
+
+    Parâmetros:
+    -----------
+    pesos:np.ndarray
+        Peso de cada respondente (opcional).
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+
+    Retornos:
+    ----------
+    pesos:np.ndarray
+        Pesos dos respondentes considerados (None, se não houver pesos).
+    """
+    if pesos is None or mascara is None:
+        return pesos
+    return pesos[mascara]
+
+
+def calcular_coocorrencia_estendida(
+        respostas: RespostasCompactas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        mascara: np.ndarray = None,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a matriz de coocorrência entre duas perguntas de multipla escolha,
+    acrescida dos totais de linha e de coluna.
+
+    A coluna dos respondentes de ambas as perguntas (v) é acrescentada às
+    matrizes de indicadores, de forma que um único produto [x1 | v]' [x2 | v]
+    fornece a coocorrência, os totais de linha/coluna e o total de respondentes.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    idx_pergunta1:int
+        Índice da primeira pergunta de multipla escolha.
+    idx_pergunta2:int
+        Índice da segunda pergunta de multipla escolha.
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+    pesos:np.ndarray
+        Peso de cada respondente (opcional; todos os respondentes).
+
+    Retornos:
+    ----------
+    produto:np.ndarray
+        Matriz (alternativas1 + 1 x alternativas2 + 1); a última linha/coluna
+        contém os totais.
+    """
+    x1, validos1 = respostas.indicadores(idx_pergunta1, mascara)
+    x2, validos2 = respostas.indicadores(idx_pergunta2, mascara)
+    validos = (validos1 & validos2).astype(np.uint8)[:, None]
+    return calcular_coocorrencia(np.hstack([x1, validos]), np.hstack([x2, validos]),
+                                 pesos=restringir_pesos(pesos, mascara))
+
+
+def calcular_tabela_estendida(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        mascara: np.ndarray = None,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a tabela de contingência entre duas perguntas, acrescida dos
+    totais de linha e de coluna (somas dos pesos, quando informados).
+
+    Os totais correspondem aos respondentes de ambas as perguntas que
+    marcaram a alternativa da linha (coluna); para perguntas de multipla
+    escolha, não correspondem à soma da linha (coluna) da tabela.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+    pesos:np.ndarray
+        Peso de cada respondente (opcional; todos os respondentes).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Matriz (alternativas1 + 1 x alternativas2 + 1); a última linha/coluna
+        contém os totais.
+    """
+    multipla1 = catalogo.eh_multipla(idx_pergunta1)
+    multipla2 = catalogo.eh_multipla(idx_pergunta2)
+
+    if multipla1 and multipla2:
+        return calcular_coocorrencia_estendida(respostas, idx_pergunta1, idx_pergunta2, mascara,
+                                               pesos)
+    if multipla1:
+        return calcular_tabela_estendida(respostas, catalogo, idx_pergunta2, idx_pergunta1,
+                                         mascara, pesos).T
+
+    codigos1, categorias1 = respostas.codigos(idx_pergunta1, mascara)
+    if multipla2:
+        # A coluna dos respondentes da pergunta de multipla escolha fornece os
+        # totais de linha
+        indicadores, validos = respostas.indicadores(idx_pergunta2, mascara)
+        tabela = tabular_codigos_indicadores(
+            codigos1, len(categorias1),
+            np.hstack([indicadores, validos.astype(np.uint8)[:, None]]),
+            restringir_pesos(pesos, mascara))
+    else:
+        codigos2, categorias2 = respostas.codigos(idx_pergunta2, mascara)
+        tabela = tabular_codigos(codigos1, len(categorias1), codigos2, len(categorias2),
+                                 restringir_pesos(pesos, mascara))
+        tabela = np.hstack([tabela, tabela.sum(axis=1, keepdims=True)])
+
+    return np.vstack([tabela, tabela.sum(axis=0, keepdims=True)])
+
+
+def calcular_tabela_estratificada(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        idx_controle: int,
+        mascara: np.ndarray = None,
+        pesos: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula as tabelas de contingência (estendidas) entre duas perguntas em
+    cada estrato (alternativa) de uma pergunta de controle de unica escolha.
+
+    O cubo é calculado em uma única passagem pelas respostas: o código do
+    estrato é combinado ao código da primeira pergunta (s * n1 + c1) e as
+    combinações são contadas com np.bincount (ponderado pelos indicadores,
+    caso a segunda pergunta seja de multipla escolha). Entre duas perguntas
+    de multipla escolha, os respondentes são ordenados pelo estrato e a
+    coocorrência de cada estrato é um produto matricial sobre um intervalo
+    contíguo de linhas. Respondentes sem resposta na pergunta de controle
+    são descartados.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas das tabelas).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas das tabelas).
+    idx_controle:int
+        Índice da pergunta de controle (unica escolha).
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+    pesos:np.ndarray
+        Peso de cada respondente (opcional; todos os respondentes).
+
+    Retornos:
+    ----------
+    cubo:np.ndarray
+        Matriz (estratos x alternativas1 + 1 x alternativas2 + 1); em cada
+        estrato, a última linha/coluna contém os totais.
+    """
+    multipla1 = catalogo.eh_multipla(idx_pergunta1)
+    multipla2 = catalogo.eh_multipla(idx_pergunta2)
+    estratos, categorias = respostas.codigos(idx_controle, mascara)
+    k = len(categorias)
+    ponderados = restringir_pesos(pesos, mascara)
+
+    if multipla1 and multipla2:
+        x1, validos1 = respostas.indicadores(idx_pergunta1, mascara)
+        x2, validos2 = respostas.indicadores(idx_pergunta2, mascara)
+        validos = (validos1 & validos2).astype(np.uint8)[:, None]
+        x1 = np.hstack([x1, validos])
+        x2 = np.hstack([x2, validos])
+
+        # Respondentes agrupados por estrato (ausentes, com código -1, no início)
+        ordem = np.argsort(estratos, kind="stable")
+        inicios = np.searchsorted(estratos[ordem], np.arange(k + 1))
+        cubo = np.empty((k, x1.shape[1], x2.shape[1]),
+                        dtype=np.int64 if pesos is None else np.float64)
+        for s in range(k):
+            linhas = ordem[inicios[s]:inicios[s + 1]]
+            cubo[s] = calcular_coocorrencia(
+                x1[linhas], x2[linhas],
+                pesos=ponderados[linhas] if ponderados is not None else None)
+        return cubo
+    if multipla1:
+        return calcular_tabela_estratificada(respostas, catalogo, idx_pergunta2, idx_pergunta1,
+                                             idx_controle, mascara, pesos).transpose(0, 2, 1)
+
+    # Código combinado (estrato, alternativa da primeira pergunta); -1 se ausente
+    codigos1, categorias1 = respostas.codigos(idx_pergunta1, mascara)
+    n1 = len(categorias1)
+    combinado = estratos.astype(np.int64) * n1 + codigos1
+    combinado[(estratos < 0) | (codigos1 < 0)] = -1
+
+    if multipla2:
+        indicadores, validos = respostas.indicadores(idx_pergunta2, mascara)
+        tabela = tabular_codigos_indicadores(
+            combinado, k * n1, np.hstack([indicadores, validos.astype(np.uint8)[:, None]]),
+            ponderados)
+        cubo = tabela.reshape(k, n1, -1)
+    else:
+        codigos2, categorias2 = respostas.codigos(idx_pergunta2, mascara)
+        cubo = tabular_codigos(combinado, k * n1, codigos2, len(categorias2), ponderados)
+        cubo = cubo.reshape(k, n1, -1)
+        cubo = np.concatenate([cubo, cubo.sum(axis=2, keepdims=True)], axis=2)
+
+    return np.concatenate([cubo, cubo.sum(axis=1, keepdims=True)], axis=1)
+
+
+def calcular_tabela(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        mascara: np.ndarray = None) -> np.ndarray:
+    """
+    Calcula a tabela de contingência (sem rótulos) entre duas perguntas.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    mascara:np.ndarray
+        Vetor booleano dos respondentes considerados (opcional; todos, se omitido).
+
+    Retornos:
+    ----------
+    tabela:np.ndarray
+        Matriz com a quantidade de respondentes de cada combinação.
+    """
+    multipla1 = catalogo.eh_multipla(idx_pergunta1)
+    multipla2 = catalogo.eh_multipla(idx_pergunta2)
+
+    if multipla1 and multipla2:
+        return calcular_coocorrencia_estendida(respostas, idx_pergunta1, idx_pergunta2,
+                                               mascara)[:-1, :-1]
+    if multipla1:
+        codigos, categorias = respostas.codigos(idx_pergunta2, mascara)
+        indicadores, _ = respostas.indicadores(idx_pergunta1, mascara)
+        return tabular_codigos_indicadores(codigos, len(categorias), indicadores).T
+    if multipla2:
+        codigos, categorias = respostas.codigos(idx_pergunta1, mascara)
+        indicadores, _ = respostas.indicadores(idx_pergunta2, mascara)
+        return tabular_codigos_indicadores(codigos, len(categorias), indicadores)
+
+    codigos1, categorias1 = respostas.codigos(idx_pergunta1, mascara)
+    codigos2, categorias2 = respostas.codigos(idx_pergunta2, mascara)
+    return tabular_codigos(codigos1, len(categorias1), codigos2, len(categorias2))
+
+
+def obter_rotulos(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta: int) -> pd.Index:
+    """
+    Obtém os rótulos (alternativas) de uma pergunta, na ordem das tabelas.
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta:int
+        Índice da pergunta.
+
+    Retornos:
+    ----------
+    rotulos:pd.Index
+        Alternativas da pergunta (nomeadas com o texto da pergunta).
+    """
+    if catalogo.eh_multipla(idx_pergunta):
+        return pd.Index(catalogo.textos_alternativas(idx_pergunta),
+                        name=catalogo.texto(idx_pergunta))
+    _, categorias = respostas.codigos(idx_pergunta)
+    return categorias.rename(catalogo.texto(idx_pergunta))
+
+
+def tabela_cruzada(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        idx_pergunta1: int,
+        idx_pergunta2: int,
+        cubo=None) -> pd.DataFrame:
+    """
+    Obtém a tabela cruzada (quantidade de respondentes) entre duas perguntas.
+
+    Apenas as respostas das duas perguntas são acessadas e os rótulos são
+    aplicados somente ao resultado, de forma que a memória utilizada é
+    proporcional à tabela e não ao conjunto de dados. Caso o cubo de tabelas
+    pré-calculadas contenha o par de perguntas, a tabela é obtida diretamente
+    do cubo (sem cópia).
+
+    Parâmetros:
+    -----------
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    idx_pergunta1:int
+        Índice da primeira pergunta (linhas da tabela).
+    idx_pergunta2:int
+        Índice da segunda pergunta (colunas da tabela).
+    cubo:CuboTabelas
+        Cubo de tabelas pré-calculadas (opcional).
+
+    Retornos:
+    ----------
+    tabela:pd.DataFrame
+        Tabela com as alternativas da primeira pergunta nas linhas e as da
+        segunda pergunta nas colunas.
+    """
+    tabela = None
+    if cubo is not None:
+        tabela = cubo.tabela(idx_pergunta1, idx_pergunta2)
+    if tabela is None:
+        tabela = calcular_tabela(respostas, catalogo, idx_pergunta1, idx_pergunta2)
+
+    return pd.DataFrame(tabela,
+                        index=obter_rotulos(respostas, catalogo, idx_pergunta1),
+                        columns=obter_rotulos(respostas, catalogo, idx_pergunta2))
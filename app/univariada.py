@@ -1,190 +1,121 @@
 # Imports gerais
+import math
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-from st_aggrid import AgGrid
+import plotly.io as pio
+# st_aggrid é importado nas funções que apresentam as tabelas (inicialização mais rápida)
 
 # Imports específicos
-from reuse import dict_partes_questionario
-
-
-def obter_dataframe_respostas_multiplas(
-        df: pd.DataFrame,
-        resposta_multipla: dict,
+from reuse import dict_partes_questionario, qtde_perguntas_pagina
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas
+from segmentos import Segmento
+from figuras import obter_conteudo_comparacao, obter_conteudo_univariado
+from edicoes import listar_edicoes
+from intervalos import METODOS_INTERVALO, NIVEL_CONFIANCA
+from instrumentacao import instrumentar, medir
+
+
+@instrumentar()
+def apresentar_pergunta_univariada(
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
         idx_pergunta: int,
-        textos_alternativo: list,
-        qtde_perc: str) -> pd.DataFrame:
+        qtde_perc: str,
+        agregados: dict = None,
+        segmento: Segmento = None,
+        intervalo: str = "Nenhum"):
     """
-    Obtém um dataframe com as respostas de uma pergunta de multipla escolha.
+    Apresenta a tabela e o gráfico de uma pergunta do questionário.
 
     Parâmetros:
     -----------
-    df:pd.DataFrame
-        Dataframe com as respostas do questionário.
-    resposta_multipla:dict
-        Dicionário com as respostas de uma pergunta de multipla escolha.
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
     idx_pergunta:int
-        Índice da pergunta de multipla escolha.
-    textos_alternativo:list
-        Lista de textos alternativos para as perguntas.
+        Índice da pergunta.
     qtde_perc:str
         Quantidade ou percentual a ser apresentado.
-
-
-    Retornos:
-    ----------
-    sub:pd.DataFrame
-        Dataframe com as respostas de uma pergunta de multipla escolha.
+    agregados:dict
+        Dicionário com as contagens pré-calculadas de cada pergunta (opcional).
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    intervalo:str
+        Método do intervalo de confiança do percentual (ver METODOS_INTERVALO).
     """
 
-    # Obtém as respostas da pergunta de multipla escolha (e realiza a soma)
-    sub = df[df.columns[resposta_multipla[idx_pergunta]]].sum(
-        axis=0).to_frame()
-
-    # Converte para percentual se necessário
-    if qtde_perc == 'Percentual':
-        limit = df[df.columns[resposta_multipla[idx_pergunta]]
-                   ].dropna().shape[0]
-        sub = np.round((sub / limit) * 100, 2)
+    from st_aggrid import AgGrid
 
-    sub = sub.reset_index()
+    # Obtém a tabela e o gráfico (do cache compartilhado, quando disponíveis)
+    sub, figura = obter_conteudo_univariado(respostas, catalogo, idx_pergunta, qtde_perc,
+                                            agregados, segmento, intervalo)
+    with medir("render.grid"):
+        AgGrid(sub,
+               theme='material',
+               fit_columns_on_grid_load=True)
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
 
-    # Adiciona o texto alternativo da pergunta
-    sub['texto_alternativo'] = textos_alternativo[resposta_multipla[idx_pergunta]
-                                                  [0]:resposta_multipla[idx_pergunta][-1]+1]
+    # Se a pergunta for de multipla escolha
+    if catalogo.eh_multipla(idx_pergunta):
+        st.markdown(
+            "<small>**Observação:** Para perguntas de multiplas escolhas a soma das quantidades das respostas pode ultrapassar a quantidade de respondentes</small>", unsafe_allow_html=True)
 
-    # Converte para percentual se necessário
-    if qtde_perc == 'Percentual':
-        sub.rename(columns={
-                   0: 'Percentual (%)', 'texto_alternativo': textos_alternativo[idx_pergunta]}, inplace=True)
-    else:
-        sub = sub.rename(
-            columns={0: "Quantidade", 'texto_alternativo': textos_alternativo[idx_pergunta]})
 
-    # Seleciona as colunas de interesse
-    sub = sub[[sub.columns[2], sub.columns[1]]]
-    return sub
-
-
-def obter_dataframe_resposta_unica(
-        df: pd.DataFrame,
+@instrumentar()
+def apresentar_comparacao_edicoes(
+        catalogo: CatalogoPerguntas,
         idx_pergunta: int,
-        texto_alternativo: list,
-        qtde_perc: str) -> pd.DataFrame:
-    """
-    Obtém um dataframe com as respostas de uma pergunta de unica escolha.
-
-    Parâmetros:
-    -----------
-    df:pd.DataFrame
-        Dataframe com as respostas do questionário.
-    idx_pergunta:int    
-        Índice da pergunta de unica escolha.
-    texto_alternativo:list  
-        Lista de textos alternativos para as perguntas.
-    qtde_perc:str   
-        Quantidade ou percentual a ser apresentado.
-
-    Retornos:
-    ----------
-    sub:pd.DataFrame
-        Dataframe com as respostas de uma pergunta de unica escolha.
-    """
-
-    # Obtém as respostas da pergunta de unica escolha (e realiza a contagem)
-    sub = df[[df.columns[idx_pergunta]]]
-    # Coluna fantasma para contar as respostas
-    sub['c'] = 1
-    sub_agg = sub.groupby(sub.columns[0]).agg('count')[['c']]
-
-    # Converte para percentual se necessário
-    if qtde_perc == "Percentual":
-        sub_agg = np.round((sub_agg / sub.shape[0]) * 100, 2)
-
-    # Realiza a ordenação pela quantidade de respostas
-    sub_agg = sub_agg.reset_index()
-    sub_agg = sub_agg.sort_values(['c'], ascending=False, ignore_index=True)
-
-    # Converte para percentual se necessário
-    if qtde_perc == "Quantidade":
-        sub_agg.rename(columns={
-                       'c': 'Quantidade', sub.columns[0]: texto_alternativo[idx_pergunta]}, inplace=True)
-    else:
-        sub_agg.rename(columns={
-                       'c': 'Percentual (%)', sub.columns[0]: texto_alternativo[idx_pergunta]}, inplace=True)
-
-    return sub_agg
-
-
-def obter_grafico_resposta_unica(
-        sub: pd.DataFrame,
-        textos_alternativo: dict,
-        idx_pergunta: int) -> px.bar:
+        qtde_perc: str,
+        edicao: str):
     """
-    Obtém um gráfico de barras com as respostas de uma pergunta de unica escolha.
+    Apresenta o gráfico de uma pergunta em todas as edições em que ela existe.
 
     Parâmetros:
     -----------
-    sub:pd.DataFrame
-        Dataframe com as respostas de uma pergunta de unica escolha.
-    textos_alternativo:dict
-        Dicionário com as respostas de uma pergunta de unica escolha.
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas da edição.
     idx_pergunta:int
-        Índice da pergunta de unica escolha.
-
-    Retornos:
-    ----------
-    fig:px.bar
-        Gráfico de barras com as respostas de uma pergunta de unica escolha.
-    """
-
-    sub['texto_curto'] = sub[sub.columns[0]].apply(
-        lambda x: x if len(x) < 60 else x[0:60] + "...")
-    fig = px.bar(sub, x='texto_curto', y=sub.columns[1],
-                 labels={"texto_curto": textos_alternativo[idx_pergunta]},)
-    return fig
-
-
-def obter_grafico_resposta_multiplas(sub: pd.DataFrame) -> px.bar:
+        Índice da pergunta (no catálogo da edição).
+    qtde_perc:str
+        Quantidade ou percentual a ser apresentado.
+    edicao:str
+        Nome da edição selecionada.
     """
-    Obtém um gráfico de barras com as respostas de uma pergunta de multipla escolha.
-
-    Parâmetros:
-    -----------
-    sub:pd.DataFrame
-        Dataframe com as respostas de uma pergunta de multipla escolha.
+    sub, figura = obter_conteudo_comparacao(edicao, idx_pergunta, qtde_perc)
+    if sub["Edição"].nunique() < 2:
+        st.caption("Pergunta sem correspondência nas outras edições.")
+        return
 
-    Retornos:
-    ----------
-    fig:px.bar
-        Gráfico de barras com as respostas de uma pergunta de multipla escolha.
-    """
-    fig = px.bar(sub, x=sub.columns[0], y=sub.columns[1])
-    return fig
+    st.write("*Comparação entre as edições:*")
+    with medir("render.grafico"):
+        st.plotly_chart(pio.from_json(figura))
 
 
+@instrumentar()
 def apresentar_analise_univariada(
-        df: pd.DataFrame,
-        tipo_pergunta: dict,
-        resposta_multipla: dict,
-        categoria_pergunta: dict,
-        textos_alternativo: dict):
+        respostas: RespostasCompactas,
+        catalogo: CatalogoPerguntas,
+        agregados: dict = None,
+        segmento: Segmento = None,
+        edicao: str = None):
     """
     Apresenta a análise univariada.
 
     Parâmetros:
     -----------
-    df:pd.DataFrame
-        Dataframe com as respostas do questionário.
-    tipo_pergunta:dict
-        Dicionário com os tipos de perguntas.
-    resposta_multipla:dict
-        Dicionário com as respostas de perguntas de multipla escolha.
-    categoria_pergunta:dict
-        Dicionário com as categorias de perguntas.
-    textos_alternativo:dict
-        Dicionário com os textos alternativos para as perguntas.
+    respostas:RespostasCompactas
+        Respostas do questionário (representação compacta).
+    catalogo:CatalogoPerguntas
+        Catálogo das perguntas do questionário.
+    agregados:dict
+        Dicionário com as contagens pré-calculadas de cada pergunta (opcional).
+        Perguntas ausentes do dicionário são calculadas a partir do dataframe.
+    segmento:Segmento
+        Segmento de respondentes (opcional; todos, se omitido).
+    edicao:str
+        Nome da edição selecionada (opcional; permite a comparação entre as edições).
     """
 
     # Cria um subheader para a analise univariada
@@ -196,44 +127,48 @@ def apresentar_analise_univariada(
     # Cria a caixa de seleção o modo de exibição do gráfico/tabela
     qtde_perc = st.sidebar.selectbox("Apresentar quantidade ou percentual?", [
                                      "Quantidade", "Percentual"])
+    # Intervalo de confiança dos percentuais (barras de erro)
+    intervalo = "Nenhum"
+    if qtde_perc == "Percentual":
+        intervalo = st.sidebar.selectbox(f"Intervalo de confiança ({NIVEL_CONFIANCA:.0%}):",
+                                         METODOS_INTERVALO, key="intervalo")
+    # Comparação entre as edições (quando houver mais de uma edição disponível)
+    comparar = False
+    if edicao is not None and len(listar_edicoes()) > 1:
+        comparar = st.sidebar.checkbox("Comparar com as outras edições", key="comparar_edicoes")
 
     # Se a parte do questionário for selecionada
     if opcao_parte != "":
         st.write(f"##### {opcao_parte}")
 
-        # Cria o spinner enquanto os dados são processados
-        with st.spinner('Processando...'):
-            
-            parte = dict_partes_questionario[opcao_parte]
-            perguntas = categoria_pergunta[parte]
-            
-            # Para cada pergunta pertencente àquela parte do questionário
-            for p in perguntas:
-
-                # Exibe o texto da pergunta
-                st.write(f"**{textos_alternativo[p]}**")
-
-                # Se a pergunta for de multipla escolha
-                if p in tipo_pergunta['multipla']:
-                    sub = obter_dataframe_respostas_multiplas(df, resposta_multipla,
-                                                              p, textos_alternativo, qtde_perc)
-
-                    AgGrid(sub,
-                           theme='material',
-                           fit_columns_on_grid_load=True)
-
-                    st.plotly_chart(obter_grafico_resposta_multiplas(
-                        sub, textos_alternativo, p))
-                    st.markdown(
-                        "<small>**Observação:** Para perguntas de multiplas escolhas a soma das quantidades das respostas pode ultrapassar a quantidade de respondentes</small>", unsafe_allow_html=True)
-                
-                # Se a pergunta for de unica escolha
-                else:
-                    sub = obter_dataframe_resposta_unica(
-                        df, p, textos_alternativo, qtde_perc)
-                    AgGrid(sub,
-                           theme='material',
-                           fit_columns_on_grid_load=True)
-
-                    st.plotly_chart(obter_grafico_resposta_unica(
-                        sub, textos_alternativo, p))
+        parte = dict_partes_questionario[opcao_parte]
+        perguntas = catalogo.perguntas(parte)
+
+        # Paginação: apenas as perguntas da página selecionada são processadas
+        qtde_paginas = math.ceil(len(perguntas) / qtde_perguntas_pagina)
+        pagina = 1
+        if qtde_paginas > 1:
+            pagina = st.sidebar.selectbox(f"Página (de {qtde_paginas}):",
+                                          range(1, qtde_paginas + 1), key=f"pagina_{parte}")
+        inicio = (pagina - 1) * qtde_perguntas_pagina
+        perguntas_pagina = perguntas[inicio:inicio + qtde_perguntas_pagina]
+        st.caption(f"Perguntas {inicio + 1} a {inicio + len(perguntas_pagina)} "
+                   f"de {len(perguntas)}")
+        if comparar and segmento is not None:
+            st.caption("A comparação entre as edições considera todos os respondentes.")
+        if intervalo != "Nenhum":
+            st.caption(f"As barras de erro representam o intervalo de confiança de "
+                       f"{NIVEL_CONFIANCA:.0%} ({intervalo}) de cada percentual.")
+
+        # Para cada pergunta da página (cada uma é exibida assim que processada)
+        for p in perguntas_pagina:
+
+            # Exibe o texto da pergunta
+            st.write(f"**{catalogo.texto(p)}**")
+
+            # Cria o spinner enquanto os dados da pergunta são processados
+            with st.spinner('Processando...'):
+                apresentar_pergunta_univariada(respostas, catalogo, p, qtde_perc,
+                                               agregados, segmento, intervalo)
+                if comparar:
+                    apresentar_comparacao_edicoes(catalogo, p, qtde_perc, edicao)
@@ -0,0 +1,46 @@
+# Imports gerais
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Os módulos do dashboard são importados pelo nome (como em 'streamlit run ./app/dash.py')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "app"))
+
+# Imports específicos
+from sintetico import gerar_dados
+from dados import ARQUIVO_PRINCIPAL, carregar_dados
+
+
+# constantes
+RESPONDENTES_TESTE = 3000
+# Vários blocos (row groups), como na geração de conjuntos grandes
+TAMANHO_BLOCO_TESTE = 1100
+
+
+@pytest.fixture(scope="session")
+def pasta_sintetica(tmp_path_factory) -> str:
+    """
+    Pasta com um conjunto de dados sintético (ver sintetico.py).
+    """
+    pasta = str(tmp_path_factory.mktemp("sintetico"))
+    gerar_dados(RESPONDENTES_TESTE, pasta, semente=7, tamanho_bloco=TAMANHO_BLOCO_TESTE)
+    return pasta
+
+
+@pytest.fixture(scope="session")
+def dados(pasta_sintetica):
+    """
+    Artefatos de dados carregados do conjunto sintético.
+    """
+    return carregar_dados(pasta_sintetica)
+
+
+@pytest.fixture(scope="session")
+def df(pasta_sintetica) -> pd.DataFrame:
+    """
+    Dataframe original (como lido pela versão anterior do dashboard).
+    """
+    return pd.read_parquet(os.path.join(pasta_sintetica, ARQUIVO_PRINCIPAL))
@@ -0,0 +1,153 @@
+# Imports gerais
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Imports específicos
+from agregacao import (obter_dataframe_resposta_unica, obter_dataframe_respostas_multiplas,
+                       obter_tabela_cruzada, obter_tabelas_bivariadas)
+from cubo import construir_cubo, obter_cubo
+from dados import carregar_dados
+from segmentos import obter_segmento
+from tabulacao import calcular_coocorrencia, tabela_cruzada
+
+
+# Agregações da versão anterior do dashboard (groupby sobre o dataframe original)
+
+def contar_unica_groupby(df: pd.DataFrame, idx: int) -> pd.Series:
+    sub = df[[df.columns[idx]]].copy()
+    sub["c"] = 1
+    return sub.groupby(sub.columns[0]).agg("count")["c"]
+
+
+def contar_multipla_groupby(df: pd.DataFrame, colunas: list) -> tuple:
+    sub = df[df.columns[colunas]]
+    return sub.sum(axis=0), sub.dropna().shape[0]
+
+
+def cruzar_groupby(df: pd.DataFrame, idx1: int, idx2: int) -> pd.Series:
+    sub = df[[df.columns[idx1], df.columns[idx2]]].copy()
+    sub["c"] = 1
+    return sub.groupby([df.columns[idx1], df.columns[idx2]]).agg("count")["c"]
+
+
+def cruzar_unica_multiplas_groupby(df: pd.DataFrame, idx: int, colunas: list) -> pd.DataFrame:
+    sub = df[[df.columns[idx]] + list(df.columns[colunas])]
+    return sub.groupby(sub.columns[0]).sum()
+
+
+def como_dict(serie: pd.Series) -> dict:
+    # Alternativas (texto) e quantidades, sem as alternativas sem respostas
+    return {str(k): float(v) for k, v in serie.items() if v != 0}
+
+
+def test_resposta_unica_igual_groupby(dados, df):
+    for p in dados.catalogo.unicas:
+        esperado = contar_unica_groupby(df, p)
+        sub = obter_dataframe_resposta_unica(dados.respostas, dados.catalogo, p, "Quantidade")
+        assert como_dict(sub.set_index(sub.columns[0])["Quantidade"]) == como_dict(esperado)
+        # Ordenação decrescente pela quantidade
+        assert sub["Quantidade"].is_monotonic_decreasing
+
+        sub = obter_dataframe_resposta_unica(dados.respostas, dados.catalogo, p, "Percentual")
+        percentuais = sub.set_index(sub.columns[0])["Percentual (%)"]
+        esperado = np.round(esperado / df.shape[0] * 100, 2)
+        assert percentuais.loc[esperado.index.astype(str)].to_numpy() == pytest.approx(
+            esperado.to_numpy())
+
+
+def test_respostas_multiplas_igual_groupby(dados, df):
+    for p in dados.catalogo.multiplas:
+        colunas = list(dados.catalogo.alternativas(p))
+        somas, respondentes = contar_multipla_groupby(df, colunas)
+
+        sub = obter_dataframe_respostas_multiplas(dados.respostas, dados.catalogo, p, "Quantidade")
+        assert sub["Quantidade"].to_numpy() == pytest.approx(somas.to_numpy())
+
+        sub = obter_dataframe_respostas_multiplas(dados.respostas, dados.catalogo, p, "Percentual")
+        assert sub["Percentual (%)"].to_numpy() == pytest.approx(
+            np.round(somas.to_numpy() / respondentes * 100, 2))
+
+
+def test_tabela_unica_unica_igual_groupby(dados, df):
+    unicas = dados.catalogo.unicas
+    for p1, p2 in zip(unicas[:-1], unicas[1:]):
+        tabela = tabela_cruzada(dados.respostas, dados.catalogo, p1, p2)
+        esperado = cruzar_groupby(df, p1, p2)
+        for (a, b), quantidade in esperado.items():
+            assert tabela.loc[a, b] == quantidade
+        assert tabela.to_numpy().sum() == esperado.sum()
+
+
+def test_percentuais_unica_unica_igual_crosstab(dados, df):
+    p1, p2 = dados.catalogo.unicas[:2]
+    tabelas = obter_tabelas_bivariadas(dados.respostas, dados.catalogo, p1, p2)
+    esperado = pd.crosstab(df.iloc[:, p1], df.iloc[:, p2], normalize="index") * 100
+    obtido = tabelas["Percentual (linha)"].loc[esperado.index, esperado.columns]
+    assert obtido.to_numpy() == pytest.approx(np.round(esperado.to_numpy(), 2))
+
+    esperado = pd.crosstab(df.iloc[:, p1], df.iloc[:, p2], normalize="columns") * 100
+    obtido = tabelas["Percentual (coluna)"].loc[esperado.index, esperado.columns]
+    assert obtido.to_numpy() == pytest.approx(np.round(esperado.to_numpy(), 2))
+
+
+@pytest.mark.parametrize("posicao", [0, 1, -1])
+def test_tabela_unica_multipla_igual_groupby(dados, df, posicao):
+    unica = dados.catalogo.unicas[posicao]
+    multipla = dados.catalogo.multiplas[posicao]
+    alternativas = list(dados.catalogo.alternativas(multipla))
+    esperado = cruzar_unica_multiplas_groupby(df, unica, alternativas)
+
+    tabela = tabela_cruzada(dados.respostas, dados.catalogo, unica, multipla)
+    obtido = tabela.loc[esperado.index]
+    assert obtido.to_numpy() == pytest.approx(esperado.to_numpy())
+    # Alternativas sem respondentes não aparecem no groupby
+    assert tabela.drop(esperado.index).to_numpy().sum() == 0
+
+    # Multipla x unica: a tabela transposta
+    transposta = tabela_cruzada(dados.respostas, dados.catalogo, multipla, unica)
+    assert transposta.to_numpy() == pytest.approx(tabela.to_numpy().T)
+
+
+def test_coocorrencia_multipla_multipla(dados, df):
+    p1, p2 = dados.catalogo.multiplas[:2]
+    a = (df.iloc[:, list(dados.catalogo.alternativas(p1))] == 1).astype(np.int64).to_numpy()
+    b = (df.iloc[:, list(dados.catalogo.alternativas(p2))] == 1).astype(np.int64).to_numpy()
+
+    tabela = tabela_cruzada(dados.respostas, dados.catalogo, p1, p2)
+    assert tabela.to_numpy() == pytest.approx(a.T @ b)
+    assert calcular_coocorrencia(a.astype(np.uint8), b.astype(np.uint8)) == pytest.approx(a.T @ b)
+
+
+def test_segmento_igual_dataframe_filtrado(dados, df):
+    p_filtro, p1, p2 = dados.catalogo.unicas[:3]
+    alternativas = list(contar_unica_groupby(df, p_filtro).index[:2])
+    segmento = obter_segmento(dados, {p_filtro: alternativas})
+    filtrado = df[df.iloc[:, p_filtro].isin(alternativas)]
+    assert segmento.n_respondentes == len(filtrado)
+
+    tabela = obter_tabela_cruzada(dados.respostas, dados.catalogo, p1, p2, segmento=segmento)
+    esperado = cruzar_groupby(filtrado, p1, p2)
+    for (a, b), quantidade in esperado.items():
+        assert tabela.loc[a, b] == quantidade
+    assert tabela.to_numpy().sum() == esperado.sum()
+
+
+def test_cubo_igual_calculo_direto(pasta_sintetica, tmp_path):
+    pasta = str(tmp_path / "dados")
+    shutil.copytree(pasta_sintetica, pasta)
+    construir_cubo(pasta, processos=1)
+    dados = carregar_dados(pasta)
+    cubo = obter_cubo(dados, pasta)
+    assert cubo is not None
+
+    catalogo = dados.catalogo
+    pares = [(catalogo.unicas[0], catalogo.unicas[1]), (catalogo.unicas[0], catalogo.multiplas[0]),
+             (catalogo.multiplas[0], catalogo.unicas[0]),
+             (catalogo.multiplas[0], catalogo.multiplas[1])]
+    for p1, p2 in pares:
+        pd.testing.assert_frame_equal(
+            tabela_cruzada(dados.respostas, catalogo, p1, p2, cubo),
+            tabela_cruzada(dados.respostas, catalogo, p1, p2), check_dtype=False)
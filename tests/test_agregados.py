@@ -0,0 +1,50 @@
+# Imports gerais
+import os
+
+import numpy as np
+import pandas as pd
+
+# Imports específicos
+from agregacao import contar_resposta_unica, contar_respostas_multiplas
+from agregados import obter_agregados_univariados, salvar_agregados_univariados
+from catalogo import ARQUIVO_CATALOGO, CatalogoPerguntas, salvar_catalogo
+from dados import ARQUIVO_PRINCIPAL, carregar_dados
+
+
+def test_agregados_iguais_contagens(dados, pasta_sintetica, tmp_path):
+    pasta = str(tmp_path)
+    for nome in os.listdir(pasta_sintetica):
+        os.link(os.path.join(pasta_sintetica, nome), os.path.join(pasta, nome))
+    salvar_agregados_univariados(dados, pasta)
+    agregados = obter_agregados_univariados(carregar_dados(pasta), pasta)
+
+    for p in dados.catalogo.unicas:
+        pd.testing.assert_series_equal(agregados[p][0], contar_resposta_unica(dados.respostas, p)[0],
+                                       check_dtype=False)
+    for p in dados.catalogo.multiplas:
+        contagem, denominador = contar_respostas_multiplas(dados.respostas, dados.catalogo, p)
+        pd.testing.assert_series_equal(agregados[p][0], contagem, check_dtype=False)
+        assert agregados[p][1] == denominador
+
+
+def test_agregados_mantem_tipo_das_respostas(tmp_path):
+    # Respostas numéricas (ex.: idade) devem manter o tipo e a ordem do cálculo direto
+    pasta = str(tmp_path)
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"idade": rng.integers(18, 60, 400).astype(float),
+                       "filhos": rng.integers(0, 4, 400),
+                       "nivel": rng.choice(["Júnior", "Pleno", "Sênior"], 400)})
+    df.loc[:9, "idade"] = np.nan
+    df.to_parquet(os.path.join(pasta, ARQUIVO_PRINCIPAL))
+    catalogo = CatalogoPerguntas(["Idade", "Filhos", "Nível"],
+                                 {"unica": [0, 1, 2], "multipla": []}, {}, {"p1": [0, 1, 2]})
+    salvar_catalogo(catalogo, os.path.join(pasta, ARQUIVO_CATALOGO))
+
+    dados = carregar_dados(pasta)
+    salvar_agregados_univariados(dados, pasta)
+    agregados = obter_agregados_univariados(dados, pasta)
+    for p in catalogo.unicas:
+        contagem, denominador = contar_resposta_unica(dados.respostas, p)
+        pd.testing.assert_series_equal(agregados[p][0], contagem, check_dtype=False)
+        assert agregados[p][0].index.dtype == contagem.index.dtype
+        assert agregados[p][1] == denominador
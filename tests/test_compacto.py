@@ -0,0 +1,88 @@
+# Imports gerais
+import os
+
+import numpy as np
+import pandas as pd
+
+# Imports específicos
+from catalogo import CatalogoPerguntas
+from compacto import RespostasCompactas, RespostasParticionadas
+from particoes import ler_indice_particoes, particionar
+
+
+def assert_respostas_iguais(obtidas: RespostasCompactas, esperadas: RespostasCompactas,
+                            catalogo: CatalogoPerguntas):
+    assert obtidas.n_respondentes == esperadas.n_respondentes
+    for p in catalogo.unicas:
+        codigos, categorias = obtidas.codigos(p)
+        codigos_esperados, categorias_esperadas = esperadas.codigos(p)
+        np.testing.assert_array_equal(codigos, codigos_esperados)
+        pd.testing.assert_index_equal(categorias, categorias_esperadas)
+        assert obtidas.hash_pergunta(p) == esperadas.hash_pergunta(p)
+    for p in catalogo.multiplas:
+        indicadores, validos = obtidas.indicadores(p)
+        indicadores_esperados, validos_esperados = esperadas.indicadores(p)
+        np.testing.assert_array_equal(indicadores, indicadores_esperados)
+        np.testing.assert_array_equal(validos, validos_esperados)
+        assert obtidas.hash_pergunta(p) == esperadas.hash_pergunta(p)
+
+
+def test_publicar_anexar(dados, tmp_path):
+    caminho = str(tmp_path / "respostas.arrow")
+    dados.respostas.publicar(caminho, {"origem": "teste"})
+    respostas, metadados = RespostasCompactas.anexar(caminho)
+    assert metadados == {"origem": "teste"}
+    assert respostas.identificador != dados.respostas.identificador
+    assert_respostas_iguais(respostas, dados.respostas, dados.catalogo)
+
+    # Os códigos e bitsets são visões (somente leitura) do arquivo mapeado em memória
+    codigos, _ = respostas.codigos(dados.catalogo.unicas[0])
+    assert not codigos.flags.writeable
+
+
+def test_publicar_anexar_com_mascara(dados, tmp_path):
+    caminho = str(tmp_path / "respostas.arrow")
+    dados.respostas.publicar(caminho)
+    respostas, _ = RespostasCompactas.anexar(caminho)
+    mascara = np.arange(dados.respostas.n_respondentes) % 3 == 0
+    p = dados.catalogo.multiplas[0]
+    indicadores, validos = respostas.indicadores(p, mascara)
+    esperados, validos_esperados = dados.respostas.indicadores(p, mascara)
+    np.testing.assert_array_equal(indicadores, esperados)
+    np.testing.assert_array_equal(validos, validos_esperados)
+
+
+def test_publicar_anexar_tabela_vazia(tmp_path):
+    df = pd.DataFrame({"unica": pd.Series([], dtype=object),
+                       "alternativa1": pd.Series([], dtype=float),
+                       "alternativa2": pd.Series([], dtype=float),
+                       "multipla": pd.Series([], dtype=float)})
+    catalogo = CatalogoPerguntas(["Unica", "A1", "A2", "Multipla"],
+                                 {"unica": [0], "multipla": [3]}, {3: [1, 2]}, {"p1": [0, 3]})
+    vazias = RespostasCompactas(df, catalogo)
+
+    caminho = str(tmp_path / "respostas.arrow")
+    vazias.publicar(caminho)
+    respostas, _ = RespostasCompactas.anexar(caminho)
+    assert respostas.n_respondentes == 0
+    assert_respostas_iguais(respostas, vazias, catalogo)
+    assert respostas.indicadores(3)[0].shape == (0, 2)
+
+
+def test_particionadas_sob_demanda(pasta_sintetica, dados, tmp_path):
+    pasta = str(tmp_path / "edicao")
+    catalogo = particionar(dados.catalogo, os.path.join(pasta_sintetica, "df.parquet"), pasta)
+    respostas = RespostasParticionadas(pasta, catalogo, ler_indice_particoes(pasta),
+                                       dados.respostas.n_respondentes)
+    assert respostas.carregadas() == 0 and respostas.memoria() == 0
+
+    # Apenas a pergunta utilizada é lida das partições
+    respostas.codigos(catalogo.unicas[0])
+    assert respostas.carregadas() == 1
+
+    respostas.carregar_todas()
+    assert respostas.carregadas() == len(catalogo.unicas) + len(catalogo.multiplas)
+    for p, q in zip(catalogo.unicas, dados.catalogo.unicas):
+        assert respostas.hash_pergunta(p) == dados.respostas.hash_pergunta(q)
+    for p, q in zip(catalogo.multiplas, dados.catalogo.multiplas):
+        assert respostas.hash_pergunta(p) == dados.respostas.hash_pergunta(q)
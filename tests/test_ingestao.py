@@ -0,0 +1,60 @@
+# Imports gerais
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Imports específicos
+from catalogo import ARQUIVO_CATALOGO, ler_catalogo
+from dados import ARQUIVO_PRINCIPAL
+from ingestao import ingerir_csv
+
+
+# Cabeçalhos no formato do CSV da pesquisa: "('<código>', '<texto>')"
+CABECALHOS = ["('P0', 'id')", "('P1_a ', 'Idade')", "('P1_b ', 'Linguagens')",
+              "('P1_b_1 ', 'Python')", "('P1_b_2 ', 'R')", "('P1_c ', 'Anos')"]
+
+
+def ingerir(tmp_path, linhas: list) -> tuple:
+    arquivo = str(tmp_path / "pesquisa.csv")
+    pd.DataFrame(linhas, columns=CABECALHOS).to_csv(arquivo, index=False)
+    pasta = str(tmp_path / "dados")
+    resumo = ingerir_csv(arquivo, pasta, tamanho_grupo=2)
+    esquema = pq.read_schema(os.path.join(pasta, ARQUIVO_PRINCIPAL))
+    return resumo, esquema, ler_catalogo(os.path.join(pasta, ARQUIVO_CATALOGO)), pasta
+
+
+def test_ingestao_blocos(tmp_path):
+    linhas = [[i, "25-29", None, 1, 0, 3] for i in range(5)]
+    resumo, esquema, catalogo, pasta = ingerir(tmp_path, linhas)
+    assert resumo["respondentes"] == 5
+    assert esquema.field(CABECALHOS[1]).type == pa.string()
+    assert esquema.field(CABECALHOS[5]).type == pa.float64()
+    assert list(catalogo.multiplas) == [2] and list(catalogo.alternativas(2)) == [3, 4]
+    assert pq.ParquetFile(os.path.join(pasta, ARQUIVO_PRINCIPAL)).num_row_groups == 3
+    assert not [nome for nome in os.listdir(pasta) if nome.endswith(".tmp")]
+
+
+def test_ingestao_valor_nao_numerico_apos_primeiro_bloco(tmp_path):
+    # "Anos" é numérica no primeiro bloco e possui texto no último
+    linhas = [[i, "25-29", None, 1, 0, 3] for i in range(4)] + [[4, "30-34", None, 0, 1, "10+"]]
+    resumo, esquema, catalogo, pasta = ingerir(tmp_path, linhas)
+    assert resumo["respondentes"] == 5
+    assert esquema.field(CABECALHOS[5]).type == pa.string()
+    df = pd.read_parquet(os.path.join(pasta, ARQUIVO_PRINCIPAL))
+    assert list(df[CABECALHOS[5]]) == ["3", "3", "3", "3", "10+"]
+
+
+def test_ingestao_coluna_vazia_no_primeiro_bloco(tmp_path):
+    # "R" não possui respostas no primeiro bloco, mas é uma alternativa (0/1)
+    linhas = [[0, "25-29", None, 1, None, 3], [1, "25-29", None, 0, None, 3],
+              [2, "25-29", None, 1, 1, 3], [3, "25-29", None, 0, 0, 5]]
+    _, esquema, catalogo, _ = ingerir(tmp_path, linhas)
+    assert esquema.field(CABECALHOS[4]).type == pa.float64()
+    assert list(catalogo.alternativas(2)) == [3, 4]
+
+    # Alternativa com valores diferentes de 0/1 após o primeiro bloco: pergunta de unica escolha
+    linhas[3][4] = 2
+    _, _, catalogo, _ = ingerir(tmp_path, linhas)
+    assert 4 in catalogo.unicas and list(catalogo.alternativas(2)) == [3]
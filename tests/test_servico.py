@@ -0,0 +1,121 @@
+# Imports gerais
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+import pyarrow as pa
+import pytest
+
+# Imports específicos
+from servico import ServicoAgregados
+from agregacao import contar_resposta_unica, obter_tabelas_bivariadas
+
+
+@pytest.fixture(scope="module")
+def servico(pasta_sintetica):
+    """
+    Instância local do serviço (em uma thread, com o seu próprio laço de eventos).
+    """
+    laco = asyncio.new_event_loop()
+    instancia = ServicoAgregados(pasta_sintetica)
+    servidor = laco.run_until_complete(asyncio.start_server(instancia.atender, "127.0.0.1", 0))
+    thread = threading.Thread(target=laco.run_forever, daemon=True)
+    thread.start()
+    yield instancia, servidor.sockets[0].getsockname()[1]
+    laco.call_soon_threadsafe(laco.stop)
+    thread.join()
+    servidor.close()
+    laco.close()
+
+
+def requisitar(porta: int, caminho: str) -> tuple:
+    conexao = http.client.HTTPConnection("127.0.0.1", porta, timeout=30)
+    try:
+        conexao.request("GET", caminho)
+        resposta = conexao.getresponse()
+        return resposta.status, resposta.getheader("Content-Type"), resposta.read()
+    finally:
+        conexao.close()
+
+
+def test_perguntas(servico, dados):
+    _, porta = servico
+    status, tipo, corpo = requisitar(porta, "/perguntas")
+    assert status == 200 and tipo.startswith("application/json")
+    perguntas = json.loads(corpo)
+    ids = {p["id"] for p in perguntas}
+    assert set(dados.catalogo.unicas) <= ids and set(dados.catalogo.multiplas) <= ids
+    assert {p["tipo"] for p in perguntas} == {"unica", "multipla"}
+
+
+def test_univariada_json(servico, dados):
+    _, porta = servico
+    p = dados.catalogo.unicas[0]
+    status, _, corpo = requisitar(porta, f"/univariada?pergunta={p}&modo=quantidade")
+    assert status == 200
+    resposta = json.loads(corpo)
+    contagem, _ = contar_resposta_unica(dados.respostas, p)
+    assert resposta["respostas"] == [str(r) for r in contagem.index]
+    assert resposta["valores"] == contagem.tolist()
+
+
+def test_bivariada_arrow(servico, dados):
+    _, porta = servico
+    p1, p2 = dados.catalogo.unicas[0], dados.catalogo.multiplas[0]
+    status, tipo, corpo = requisitar(
+        porta, f"/bivariada?pergunta1={p1}&pergunta2={p2}&modo=linha&formato=arrow")
+    assert status == 200 and tipo == "application/vnd.apache.arrow.stream"
+    tabela = pa.ipc.open_stream(corpo).read_all().to_pandas()
+
+    esperado = obter_tabelas_bivariadas(dados.respostas, dados.catalogo, p1, p2)
+    esperado = esperado["Percentual (linha)"]
+    assert len(tabela) == esperado.size
+    obtido = tabela.pivot(index="linha", columns="coluna", values="valor")
+    esperado = esperado.rename(index=str, columns=str)
+    assert obtido.loc[esperado.index, esperado.columns].to_numpy() == pytest.approx(
+        esperado.to_numpy())
+
+
+def test_cache_de_respostas(servico, dados):
+    instancia, porta = servico
+    p = dados.catalogo.multiplas[0]
+    caminho = f"/univariada?pergunta={p}&modo=percentual"
+    _, _, primeiro = requisitar(porta, caminho)
+    acertos = instancia.cache.estatisticas()["acertos"]
+    _, _, segundo = requisitar(porta, caminho)
+    assert segundo == primeiro
+    assert instancia.cache.estatisticas()["acertos"] == acertos + 1
+
+    status, _, corpo = requisitar(porta, "/saude")
+    assert status == 200 and json.loads(corpo)["respondentes"] == dados.respostas.n_respondentes
+
+
+@pytest.mark.parametrize("caminho, esperado", [
+    ("/univariada", 400),
+    ("/univariada?pergunta=abc", 400),
+    ("/univariada?pergunta=999999", 404),
+    ("/univariada?pergunta={p}&modo=media", 400),
+    ("/univariada?pergunta={p}&formato=csv", 400),
+    ("/bivariada?pergunta1={p}&pergunta2={p}", 400),
+    ("/inexistente", 404),
+])
+def test_requisicoes_invalidas(servico, dados, caminho, esperado):
+    _, porta = servico
+    status, _, corpo = requisitar(porta, caminho.format(p=dados.catalogo.unicas[0]))
+    assert status == esperado
+    assert "erro" in json.loads(corpo)
+
+
+def test_content_length_invalido(servico):
+    _, porta = servico
+    with socket.create_connection(("127.0.0.1", porta), timeout=30) as conexao:
+        conexao.sendall(b"GET /saude HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+        resposta = b""
+        while True:
+            bloco = conexao.recv(4096)
+            if not bloco:
+                break
+            resposta += bloco
+    assert resposta.startswith(b"HTTP/1.1 400")